@@ -11,7 +11,7 @@ import logging.config
 import uvicorn
 import pipmaster as pm
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import RedirectResponse
+from fastapi.responses import RedirectResponse, PlainTextResponse
 from pathlib import Path
 import configparser
 from ascii_colors import ASCIIColors
@@ -49,6 +49,7 @@ from lightrag.api.routers.graph_routes import create_graph_routes
 from lightrag.api.routers.ollama_api import OllamaAPI
 
 from lightrag.utils import logger, set_verbose_debug
+from lightrag import metrics
 from lightrag.kg.shared_storage import (
     get_namespace_data,
     get_pipeline_status_lock,
@@ -264,6 +265,7 @@ def create_app(args):
     embedding_func = EmbeddingFunc(
         embedding_dim=args.embedding_dim,
         max_token_size=args.max_embed_tokens,
+        model_name=args.embedding_model,
         func=lambda texts: lollms_embed(
             texts,
             embed_model=args.embedding_model,
@@ -479,6 +481,22 @@ def create_app(args):
             logger.error(f"Error getting health status: {str(e)}")
             raise HTTPException(status_code=500, detail=str(e))
 
+    @app.get(
+        "/metrics",
+        dependencies=[Depends(combined_auth)],
+        response_class=PlainTextResponse,
+    )
+    async def get_metrics():
+        """Metrics of this worker process in Prometheus text format (ENABLE_METRICS=true)"""
+        if not metrics.registry.enabled:
+            raise HTTPException(
+                status_code=404, detail="Metrics are disabled, set ENABLE_METRICS=true"
+            )
+        return PlainTextResponse(
+            metrics.registry.render(),
+            media_type="text/plain; version=0.0.4; charset=utf-8",
+        )
+
     # Custom StaticFiles class to prevent caching of HTML files
     class NoCacheStaticFiles(StaticFiles):
         async def get_response(self, path: str, scope):
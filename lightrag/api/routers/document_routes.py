@@ -326,6 +326,10 @@ class PipelineStatusResponse(BaseModel):
         latest_message: Latest message from pipeline processing
         history_messages: List of history messages
         update_status: Status of update flags for all namespaces
+        concurrency_limits: Current LLM / embedding concurrency limits of this worker
+        unchanged_entities: Entity writes skipped in the current job because the merge changed nothing
+        unchanged_relations: Relation writes skipped in the current job because the merge changed nothing
+        deduplicated_chunks: Chunks in the current job whose stored extraction was reused instead of calling the LLM
     """
 
     autoscanned: bool = False
@@ -339,6 +343,10 @@ class PipelineStatusResponse(BaseModel):
     latest_message: str = ""
     history_messages: Optional[List[str]] = None
     update_status: Optional[dict] = None
+    concurrency_limits: Optional[dict] = None
+    unchanged_entities: int = 0
+    unchanged_relations: int = 0
+    deduplicated_chunks: int = 0
 
     @field_validator("job_start", mode="before")
     @classmethod
@@ -1175,6 +1183,7 @@ def create_document_routes(
                 - request_pending (bool): Flag for pending request for processing
                 - latest_message (str): Latest message from pipeline processing
                 - history_messages (List[str], optional): List of history messages
+                - concurrency_limits (dict, optional): Current LLM / embedding concurrency limits
 
         Raises:
             HTTPException: If an error occurs while retrieving pipeline status (500)
@@ -1208,6 +1217,9 @@ def create_document_routes(
             # Add processed update_status to the status dictionary
             status_dict["update_status"] = processed_update_status
 
+            # Live limits of this worker (the stored value is refreshed per document)
+            status_dict["concurrency_limits"] = rag.concurrency_limits()
+
             # Convert history_messages to a regular list if it's a Manager.list
             if "history_messages" in status_dict:
                 status_dict["history_messages"] = list(status_dict["history_messages"])
@@ -83,6 +83,11 @@ class QueryRequest(BaseModel):
         description="User-provided prompt for the query. If provided, this will be used instead of the default value from prompt template.",
     )
 
+    keyword_extractor: Optional[Literal["llm", "local"]] = Field(
+        default=None,
+        description="How keywords are extracted from the query: 'llm' asks the LLM, 'local' uses corpus statistics and falls back to the LLM when they do not cover the query.",
+    )
+
     @field_validator("query", mode="after")
     @classmethod
     def query_strip_after(cls, query: str) -> str:
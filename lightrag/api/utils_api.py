@@ -271,10 +271,12 @@ def display_splash_screen(args: argparse.Namespace) -> None:
     ASCIIColors.yellow(
         f"{get_env_value('MAX_TOKEN_SUMMARY', DEFAULT_MAX_TOKEN_SUMMARY, int)}"
     )
-    ASCIIColors.white("    └─ Force LLM Summary on Merge: ", end="")
+    ASCIIColors.white("    ├─ Force LLM Summary on Merge: ", end="")
     ASCIIColors.yellow(
         f"{get_env_value('FORCE_LLM_SUMMARY_ON_MERGE', DEFAULT_FORCE_LLM_SUMMARY_ON_MERGE, int)}"
     )
+    ASCIIColors.white("    └─ Summary Mode: ", end="")
+    ASCIIColors.yellow(f"{get_env_value('SUMMARY_MODE', 'full', str)}")
 
     # System Configuration
     ASCIIColors.magenta("\n💾 Storage Configuration:")
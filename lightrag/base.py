@@ -14,6 +14,7 @@ from typing import (
 )
 from .utils import EmbeddingFunc
 from .types import KnowledgeGraph
+from .constants import DEFAULT_KV_ITER_BATCH_SIZE
 
 # use the .env that is inside the current folder
 # allows to use different .env file for each lightrag instance
@@ -101,6 +102,12 @@ class QueryParam:
     cosine_better_than_threshold: float | None = None
     """Optional override for the cosine similarity threshold."""
 
+    keyword_extractor: Literal["llm", "local"] = os.getenv("KEYWORD_EXTRACTOR", "llm")
+    """How hl/ll keywords are extracted from the query:
+    - "llm": Ask the LLM.
+    - "local": Statistical extraction with corpus IDF statistics, no LLM call. Falls back to the LLM when the query terms are not covered by the corpus.
+    """
+
 
 @dataclass
 class StorageNameSpace(ABC):
@@ -314,9 +321,37 @@ class BaseKVStorage(StorageNameSpace, ABC):
         """
         pass
 
-    async def get_all_iter(self, prefix: str, batch_size: int) -> AsyncIterator[dict]:
-        """Yield all data from storage in batches, for a given prefix."""
-        yield {}
+    async def get_all_iter(
+        self, prefix: str = "", batch_size: int = DEFAULT_KV_ITER_BATCH_SIZE
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Yield all records whose id starts with prefix, in dicts of at most batch_size records
+
+        Backends override this with a streaming implementation that keeps memory bounded
+        by batch_size. This fallback loads everything through get_all() first.
+
+        The LLM response cache is yielded grouped by mode, as {mode: {cache_id: entry}}
+        (the JSON cache layout), and there prefix matches the mode, not the cache id.
+
+        Args:
+            prefix: Only yield records whose id (cache mode for the LLM response cache)
+                starts with this prefix
+            batch_size: Maximum number of records per yielded dict
+        """
+        get_all = getattr(self, "get_all", None)
+        if get_all is None:
+            raise NotImplementedError(
+                f"{self.__class__.__name__} does not support get_all_iter"
+            )
+        batch: dict[str, Any] = {}
+        for key, value in (await get_all()).items():
+            if not key.startswith(prefix):
+                continue
+            batch[key] = value
+            if len(batch) >= batch_size:
+                yield batch
+                batch = {}
+        if batch:
+            yield batch
 
 
     async def drop_cache_by_modes(self, modes: list[str] | None = None) -> bool:
@@ -334,6 +369,30 @@ class BaseKVStorage(StorageNameSpace, ABC):
              False: if the cache drop failed, or the cache mode is not supported
         """
 
+    async def drop_cache_entries(self, entries: dict[str, list[str]]) -> None:
+        """Delete single LLM cache entries
+
+        This default rewrites the mode records of storages that keep one record per
+        mode ({mode: {cache_id: entry}}); storages with a record per entry override it.
+
+        Args:
+            entries: Cache ids to delete, by cache mode
+        """
+        for mode, cache_ids in entries.items():
+            mode_cache = await self.get_by_id(mode)
+            if not mode_cache:
+                continue
+            doomed = set(cache_ids)
+            await self.upsert(
+                {
+                    mode: {
+                        cache_id: entry
+                        for cache_id, entry in mode_cache.items()
+                        if cache_id not in doomed
+                    }
+                }
+            )
+
 
 @dataclass
 class BaseGraphStorage(StorageNameSpace, ABC):
@@ -464,6 +523,27 @@ class BaseGraphStorage(StorageNameSpace, ABC):
             result[(src_id, tgt_id)] = degree
         return result
 
+    @property
+    def materialized_degree(self) -> bool:
+        """Whether nodes carry a `degree` property maintained by the write methods
+
+        Backends supporting it enable it with the enable_materialized_degree option;
+        get_nodes_batch results then include the degree of each node whose degree
+        is known. A missing degree (nodes written before the option was enabled)
+        is counted from the relations until recompute_degrees() is run.
+        """
+        return False
+
+    async def recompute_degrees(self) -> int:
+        """Recompute the materialized degree of every node from its relations
+
+        Returns:
+            The number of nodes updated
+        """
+        raise NotImplementedError(
+            f"{type(self).__name__} does not support materialized node degrees"
+        )
+
     async def get_edges_batch(
         self, pairs: list[dict[str, str]]
     ) -> dict[tuple[str, str], dict]:
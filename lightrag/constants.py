@@ -9,8 +9,25 @@ consistency and makes maintenance easier.
 # Default values for environment variables
 DEFAULT_MAX_TOKEN_SUMMARY = 500
 DEFAULT_FORCE_LLM_SUMMARY_ON_MERGE = 80
+DEFAULT_SUMMARY_BATCH_SIZE = 8
+DEFAULT_SUMMARY_DELTA_MAX_TOKENS = 2000
 DEFAULT_WOKERS = 2
 DEFAULT_TIMEOUT = 150
+DEFAULT_KV_ITER_BATCH_SIZE = 1000
+DEFAULT_CONTEXT_ROW_CACHE_SIZE = 10000
+DEFAULT_QUERY_CONTEXT_CACHE_MAX_MB = 64
+DEFAULT_QUERY_CONTEXT_CACHE_TTL = 300  # seconds
+DEFAULT_QUERY_CONTEXT_CACHE_MAX_ENTRIES = 10000
+DEFAULT_ENTITY_LINKING_REFRESH_INTERVAL = 300  # seconds
+DEFAULT_ENTITY_LINKING_MIN_COVERAGE = 0.5
+DEFAULT_KEYWORD_EXTRACTOR_MIN_CONFIDENCE = 0.6
+DEFAULT_WRITE_BEHIND_INTERVAL = 5  # seconds, 0 persists after every query
+DEFAULT_WRITE_BEHIND_MAX_PENDING = 100
+DEFAULT_QUERY_CACHE_EVICTION_INTERVAL = 600  # seconds, 0 disables eviction
+DEFAULT_QUERY_CACHE_EVICTION_MAX_VERSIONS = 50
+DEFAULT_ADAPTIVE_CONCURRENCY_LATENCY_TOLERANCE = 3.0
+DEFAULT_EMBEDDING_BATCH_WINDOW = 0.005  # seconds
+DEFAULT_EMBEDDING_CACHE_MAX_MB = 256
 
 # Logging configuration defaults
 DEFAULT_LOG_MAX_BYTES = 10485760  # Default 10MB
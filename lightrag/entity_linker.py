@@ -0,0 +1,260 @@
+"""
+Query-time entity linking over the entity names of the knowledge graph.
+
+EntityLinker keeps an Aho-Corasick automaton over all entity names, so that the
+entities a query names literally are found in one pass over the query text,
+without an LLM call or a vector search. Matches are only hints: callers verify
+them against the graph storage, so a slightly stale index can miss entities or
+propose deleted ones but never links to data that does not exist.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from typing import Iterable
+
+from .utils import logger
+
+# Pending names are scanned one by one until the automaton is rebuilt
+MAX_PENDING_NAMES = 1000
+
+
+def _is_word_char(char: str) -> bool:
+    # ASCII letters and digits form words, CJK characters need no boundaries
+    return char.isascii() and (char.isalnum() or char == "_")
+
+
+class _Automaton:
+    """Aho-Corasick automaton over lowercased names"""
+
+    def __init__(self, keys: Iterable[str]):
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        # length of the key ending at a state (0 if none), and the nearest state
+        # reachable through failure links that ends a key
+        self._length: list[int] = [0]
+        self._output_link: list[int] = [0]
+
+        for key in keys:
+            state = 0
+            for char in key:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._length.append(0)
+                    self._output_link.append(0)
+                state = next_state
+            self._length[state] = len(key)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(char, 0)
+                self._fail[next_state] = fail
+                self._output_link[next_state] = (
+                    fail if self._length[fail] else self._output_link[fail]
+                )
+
+    def __len__(self) -> int:
+        return len(self._goto)
+
+    def iter_matches(self, text: str):
+        """Yield (start, end) of every key occurrence in text"""
+        goto, fail, length, output_link = (
+            self._goto,
+            self._fail,
+            self._length,
+            self._output_link,
+        )
+        state = 0
+        for end, char in enumerate(text, 1):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            match = state if length[state] else output_link[state]
+            while match:
+                yield end - length[match], end
+                match = output_link[match]
+
+
+class EntityLinker:
+    """Find the entities of the knowledge graph named literally in a query
+
+    Names are matched case-insensitively; names made of ASCII letters and digits
+    must match whole words. Entities merged by the pipeline are added right away,
+    deletions and changes made by other workers are picked up by a background
+    rebuild from the graph storage once the workspace data version has changed,
+    at most every refresh_interval seconds.
+    """
+
+    def __init__(
+        self, workspace: str, min_name_length: int = 2, refresh_interval: float = 300
+    ):
+        self.workspace = workspace
+        self.min_name_length = min_name_length
+        self.refresh_interval = refresh_interval
+        # lowercased name -> entity names
+        self._names: dict[str, set[str]] = {}
+        self._automaton: _Automaton | None = None
+        self._pending: set[str] = set()
+        self._built_version: int | None = None
+        self._last_refresh = 0.0
+        self._refresh_task: asyncio.Task | None = None
+        self._rebuild_task: asyncio.Task | None = None
+
+    @property
+    def ready(self) -> bool:
+        return self._automaton is not None
+
+    def _key(self, name: str) -> str | None:
+        key = name.strip().strip('"').lower()
+        if len(key) < self.min_name_length or key.isdigit():
+            return None
+        return key
+
+    def add(self, names: Iterable[str]) -> None:
+        """Make newly merged entity names linkable"""
+        for name in names:
+            key = self._key(name)
+            if key is None:
+                continue
+            entry = self._names.setdefault(key, set())
+            if name not in entry:
+                entry.add(name)
+                self._pending.add(key)
+        if len(self._pending) > MAX_PENDING_NAMES:
+            self._schedule_rebuild()
+
+    def _schedule_rebuild(self) -> None:
+        if self._rebuild_task is None or self._rebuild_task.done():
+            self._rebuild_task = asyncio.create_task(self._rebuild())
+
+    async def _rebuild(self) -> None:
+        pending = set(self._pending)
+        keys = list(self._names)
+        self._automaton = await asyncio.to_thread(_Automaton, keys)
+        self._pending -= pending
+
+    async def refresh(self, graph) -> None:
+        """Rebuild the automaton from all entity names of the graph storage"""
+        from .base import BaseGraphStorage
+        from .kg.shared_storage import get_data_version
+
+        version = await get_data_version(self.workspace)
+        start = time.perf_counter()
+        names: dict[str, set[str]] = {}
+        if type(graph).get_all_labels_iter is not BaseGraphStorage.get_all_labels_iter:
+            batches = graph.get_all_labels_iter()
+        else:
+            batches = _single_batch(await graph.get_all_labels())
+        async for batch in batches:
+            for name in batch:
+                key = self._key(name)
+                if key is not None:
+                    names.setdefault(key, set()).add(name)
+
+        indexed = set(names)
+        automaton = await asyncio.to_thread(_Automaton, indexed)
+        # names merged while the storage was read stay pending
+        for key in self._pending:
+            names.setdefault(key, set()).update(self._names.get(key, ()))
+        self._names = names
+        self._automaton = automaton
+        self._pending -= indexed
+        self._built_version = version
+        self._last_refresh = time.monotonic()
+        logger.info(
+            f"Entity linker indexed {len(names)} names ({len(automaton)} states) "
+            f"in {time.perf_counter() - start:.2f}s"
+        )
+
+    async def maybe_refresh(self, graph) -> None:
+        """Start a background rebuild if the data changed since the last one"""
+        from .kg.shared_storage import get_data_version
+
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return
+        if (
+            self._automaton is not None
+            and await get_data_version(self.workspace) == self._built_version
+        ):
+            return
+        if (
+            self._last_refresh
+            and time.monotonic() - self._last_refresh < self.refresh_interval
+        ):
+            return
+        self._last_refresh = time.monotonic()
+        self._refresh_task = asyncio.create_task(self._refresh_logged(graph))
+
+    async def _refresh_logged(self, graph) -> None:
+        try:
+            await self.refresh(graph)
+        except Exception as e:
+            logger.warning(f"Entity linker refresh failed: {e}")
+
+    def match(self, text: str) -> list[str]:
+        """Return entity names found in text, leftmost-longest and non-overlapping"""
+        return self.match_with_coverage(text)[0]
+
+    def match_with_coverage(self, text: str) -> tuple[list[str], float]:
+        """Return the names found in text and the share of its letters and
+        digits they cover"""
+        if self._automaton is None:
+            return [], 0.0
+        lowered = text.lower()
+        spans = list(self._automaton.iter_matches(lowered))
+        for key in self._pending:
+            start = lowered.find(key)
+            while start != -1:
+                spans.append((start, start + len(key)))
+                start = lowered.find(key, start + 1)
+
+        spans.sort(key=lambda span: (span[0], span[0] - span[1]))
+        names: list[str] = []
+        seen: set[str] = set()
+        covered = 0
+        matched_chars = 0
+        for start, end in spans:
+            if start < covered:
+                continue
+            if _is_word_char(lowered[start]) and start > 0 and _is_word_char(
+                lowered[start - 1]
+            ):
+                continue
+            if (
+                _is_word_char(lowered[end - 1])
+                and end < len(lowered)
+                and _is_word_char(lowered[end])
+            ):
+                continue
+            entry = self._names.get(lowered[start:end])
+            if not entry:
+                continue
+            covered = end
+            matched_chars += sum(char.isalnum() for char in lowered[start:end])
+            for name in sorted(entry):
+                if name not in seen:
+                    seen.add(name)
+                    names.append(name)
+        total_chars = sum(char.isalnum() for char in lowered)
+        return names, matched_chars / total_chars if total_chars else 0.0
+
+    async def close(self) -> None:
+        for task in (self._refresh_task, self._rebuild_task):
+            if task is not None and not task.done():
+                task.cancel()
+
+
+async def _single_batch(names: list[str]):
+    yield names
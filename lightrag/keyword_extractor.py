@@ -0,0 +1,248 @@
+"""
+Statistical keyword extraction for queries, without an LLM call.
+
+LocalKeywordExtractor splits a query into RAKE-style candidate phrases (runs of
+content words between stopwords and punctuation) and weights their terms with
+IDF statistics of the corpus, computed from the text chunks. Latin words are
+terms; CJK runs are split into character bigrams. The result carries a
+confidence, the share of query terms known to the corpus, so callers can fall
+back to LLM keyword extraction for queries the corpus statistics do not cover.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+
+from .utils import logger
+
+_TOKEN_RE = re.compile(
+    r"[A-Za-z0-9][A-Za-z0-9_\-\.']*[A-Za-z0-9]|[A-Za-z0-9]|[\u3400-\u4dbf\u4e00-\u9fff]+"
+)
+_CJK_RE = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff]")
+
+_STOPWORDS = frozenset(
+    """
+    a about above after again against all am an and any are as at be because been
+    before being below between both but by can could did do does doing down during
+    each few for from further had has have having he her here hers him his how i if
+    in into is it its itself just me more most my no nor not of off on once only or
+    other our ours out over own same she should so some such than that the their
+    theirs them then there these they this those through to too under until up very
+    was we were what when where which while who whom why will with would you your
+    yours tell explain describe please give list show know
+    """.split()
+)
+# CJK function words; query runs are cut at them before bigrams are formed
+_CJK_STOPWORDS = sorted(
+    """
+    什么 怎么 怎样 如何 哪些 哪个 为什么 是否 可以 能否 请问 请 关于 有关 以及 或者
+    还是 并且 而且 我们 你们 他们 这个 那个 这些 那些 的 了 吗 呢 吧 是 在 和 与 及
+    或 对 把 被 从 向 有 也 都 就 还 又 之 其 给 让 中 上 下 哪
+    """.split(),
+    key=len,
+    reverse=True,
+)
+_CJK_STOP_RE = re.compile("|".join(map(re.escape, _CJK_STOPWORDS)))
+
+
+def _split_cjk(run: str) -> list[str]:
+    return [part for part in _CJK_STOP_RE.split(run) if part]
+
+
+def _cjk_terms(part: str) -> list[str]:
+    if len(part) == 1:
+        return [part]
+    return [part[i : i + 2] for i in range(len(part) - 1)]
+
+
+def _corpus_terms(text: str) -> set[str]:
+    """Distinct terms of a text, as counted in document frequencies"""
+    terms = set()
+    for token in _TOKEN_RE.findall(text):
+        if _CJK_RE.match(token):
+            for part in _split_cjk(token):
+                terms.update(_cjk_terms(part))
+        else:
+            token = token.lower()
+            if token not in _STOPWORDS:
+                terms.add(token)
+    return terms
+
+
+def _count_document_frequencies(texts: list[str]) -> Counter:
+    counts: Counter = Counter()
+    for text in texts:
+        counts.update(_corpus_terms(text))
+    return counts
+
+
+@dataclass
+class KeywordExtraction:
+    hl_keywords: list[str] = field(default_factory=list)
+    ll_keywords: list[str] = field(default_factory=list)
+    confidence: float = 0.0
+    """Share of the query terms that occur in the corpus, 0 for queries without terms"""
+
+
+class LocalKeywordExtractor:
+    """Extract hl/ll keywords from a query with corpus IDF statistics
+
+    Statistics are computed from the text chunks storage in the background on
+    first use, and recomputed after the workspace data version has changed, at
+    most every refresh_interval seconds. Until they are available extract()
+    returns None and callers use the LLM extractor.
+    """
+
+    def __init__(
+        self,
+        workspace: str,
+        text_chunks,
+        max_ll_keywords: int = 5,
+        max_hl_keywords: int = 3,
+        refresh_interval: float = 300,
+    ):
+        self.workspace = workspace
+        self.text_chunks = text_chunks
+        self.max_ll_keywords = max_ll_keywords
+        self.max_hl_keywords = max_hl_keywords
+        self.refresh_interval = refresh_interval
+        self._document_frequencies: Counter | None = None
+        self._documents = 0
+        self._built_version: int | None = None
+        self._last_refresh = 0.0
+        self._refresh_task: asyncio.Task | None = None
+
+    @property
+    def ready(self) -> bool:
+        return self._document_frequencies is not None
+
+    async def refresh(self) -> None:
+        """Recompute document frequencies from all text chunks"""
+        from .kg.shared_storage import get_data_version
+
+        version = await get_data_version(self.workspace)
+        start = time.perf_counter()
+        frequencies: Counter = Counter()
+        documents = 0
+        async for batch in self.text_chunks.get_all_iter():
+            texts = [
+                record.get("content", "")
+                for record in batch.values()
+                if isinstance(record, dict)
+            ]
+            documents += len(texts)
+            frequencies.update(
+                await asyncio.to_thread(_count_document_frequencies, texts)
+            )
+        self._document_frequencies = frequencies
+        self._documents = documents
+        self._built_version = version
+        self._last_refresh = time.monotonic()
+        logger.info(
+            f"Keyword extractor indexed {len(frequencies)} terms of {documents} chunks "
+            f"in {time.perf_counter() - start:.2f}s"
+        )
+
+    async def maybe_refresh(self) -> None:
+        """Start a background recomputation if the data changed since the last one"""
+        from .kg.shared_storage import get_data_version
+
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return
+        if (
+            self._document_frequencies is not None
+            and await get_data_version(self.workspace) == self._built_version
+        ):
+            return
+        if (
+            self._last_refresh
+            and time.monotonic() - self._last_refresh < self.refresh_interval
+        ):
+            return
+        self._last_refresh = time.monotonic()
+        self._refresh_task = asyncio.create_task(self._refresh_logged())
+
+    async def _refresh_logged(self) -> None:
+        try:
+            await self.refresh()
+        except Exception as e:
+            logger.warning(f"Keyword extractor refresh failed: {e}")
+
+    def _idf(self, term: str) -> float:
+        frequency = self._document_frequencies.get(term, 0)
+        return math.log((self._documents + 1) / (frequency + 1)) + 1
+
+    def _phrases(self, text: str) -> list[tuple[str, list[str]]]:
+        """Candidate phrases of a query as (surface text, terms)
+
+        Latin phrases are runs of at most 4 content words between stopwords and
+        punctuation, split again at words unknown to the corpus, which cannot
+        match anything in retrieval. CJK runs are cut at function words.
+        """
+        phrases: list[tuple[str, list[str]]] = []
+        words: list[str] = []
+
+        def close_phrase():
+            if words:
+                phrases.append((" ".join(words), [w.lower() for w in words]))
+                words.clear()
+
+        position = 0
+        for match in _TOKEN_RE.finditer(text):
+            # punctuation between tokens ends a phrase, whitespace does not
+            if text[position : match.start()].strip():
+                close_phrase()
+            position = match.end()
+            token = match.group()
+            if _CJK_RE.match(token):
+                close_phrase()
+                for part in _split_cjk(token):
+                    phrases.append((part, _cjk_terms(part)))
+            elif token.lower() in _STOPWORDS:
+                close_phrase()
+            elif token.lower() not in self._document_frequencies:
+                close_phrase()
+                phrases.append((token, [token.lower()]))
+            else:
+                words.append(token)
+                if len(words) == 4:
+                    close_phrase()
+        close_phrase()
+        return phrases
+
+    def extract(self, text: str) -> KeywordExtraction | None:
+        """Keywords of a query, or None while corpus statistics are not available"""
+        if self._document_frequencies is None:
+            return None
+
+        scored: dict[str, tuple[float, int]] = {}
+        known = total = 0
+        for surface, terms in self._phrases(text):
+            total += len(terms)
+            known_terms = [t for t in terms if t in self._document_frequencies]
+            known += len(known_terms)
+            if not known_terms:
+                continue
+            # rare terms make specific keywords, phrases of several terms broad ones
+            specificity = max(self._idf(t) for t in known_terms)
+            if surface not in scored or scored[surface][0] < specificity:
+                scored[surface] = (specificity, len(terms))
+
+        if not total:
+            return KeywordExtraction()
+
+        ranked = sorted(scored, key=lambda s: scored[s][0], reverse=True)
+        ll_keywords = ranked[: self.max_ll_keywords]
+        hl_keywords = [s for s in ranked if scored[s][1] > 1][: self.max_hl_keywords]
+        if not hl_keywords and ranked:
+            hl_keywords = [" ".join(ranked[: self.max_hl_keywords])]
+        return KeywordExtraction(hl_keywords, ll_keywords, known / total)
+
+    async def close(self) -> None:
+        if self._refresh_task is not None and not self._refresh_task.done():
+            self._refresh_task.cancel()
@@ -37,6 +37,9 @@ import psycopg  # type: ignore
 from psycopg.rows import namedtuple_row  # type: ignore
 from psycopg_pool import AsyncConnectionPool, PoolTimeout  # type: ignore
 
+# UNION ALL branches sent in one statement by the batch queries
+BATCH_QUERY_BRANCHES = 100
+
 
 class AGEQueryException(Exception):
     """Exception for the AGE queries."""
@@ -507,6 +510,119 @@ class AGEStorage(BaseGraphStorage):
 
         return edges
 
+    async def _query_union(self, branches: list[str]) -> List[Dict[str, Any]]:
+        """
+        Run cypher branches sharing the same RETURN columns as UNION ALL statements.
+
+        Every entity is stored under its own encoded vertex label, and labels cannot
+        be bound from an UNWIND variable, so batch queries match each label in its
+        own branch and send BATCH_QUERY_BRANCHES branches per round trip.
+        """
+        results = []
+        for start in range(0, len(branches), BATCH_QUERY_BRANCHES):
+            query = "\nUNION ALL\n".join(branches[start : start + BATCH_QUERY_BRANCHES])
+            results.extend(await self._query(query))
+        return results
+
+    async def get_nodes_batch(self, node_ids: list[str]) -> dict[str, dict]:
+        if not node_ids:
+            return {}
+        labels = {node_id.strip('"') for node_id in node_ids}
+        branches = [
+            f"MATCH (n:`{AGEStorage._encode_graph_label(label)}`) RETURN n"
+            for label in labels
+        ]
+        nodes = {}
+        for record in await self._query_union(branches):
+            if record["n"]:
+                nodes.setdefault(record["n"]["label"], record["n"])
+        return {
+            node_id: nodes[node_id.strip('"')]
+            for node_id in node_ids
+            if node_id.strip('"') in nodes
+        }
+
+    async def node_degrees_batch(self, node_ids: list[str]) -> dict[str, int]:
+        if not node_ids:
+            return {}
+        encoded = {
+            AGEStorage._encode_graph_label(node_id.strip('"'))
+            for node_id in node_ids
+        }
+        branches = [
+            f"MATCH (n:`{label}`)-[]->(x) "
+            f"RETURN '{label}' AS node_label, count(x) AS total_edge_count"
+            for label in encoded
+        ]
+        degrees = {
+            AGEStorage._decode_graph_label(record["node_label"]): int(
+                record["total_edge_count"]
+            )
+            for record in await self._query_union(branches)
+        }
+        return {node_id: degrees.get(node_id.strip('"'), 0) for node_id in node_ids}
+
+    async def edge_degrees_batch(
+        self, edge_pairs: list[tuple[str, str]]
+    ) -> dict[tuple[str, str], int]:
+        if not edge_pairs:
+            return {}
+        degrees = await self.node_degrees_batch(
+            list({node_id for pair in edge_pairs for node_id in pair})
+        )
+        return {
+            (src, tgt): degrees.get(src, 0) + degrees.get(tgt, 0)
+            for src, tgt in edge_pairs
+        }
+
+    async def get_edges_batch(
+        self, pairs: list[dict[str, str]]
+    ) -> dict[tuple[str, str], dict]:
+        if not pairs:
+            return {}
+        labels = list(
+            dict.fromkeys(
+                (pair["src"].strip('"'), pair["tgt"].strip('"')) for pair in pairs
+            )
+        )
+        branches = [
+            f"MATCH (a:`{AGEStorage._encode_graph_label(src)}`)"
+            f"-[r]->(b:`{AGEStorage._encode_graph_label(tgt)}`) "
+            f"RETURN {index} AS pair_index, properties(r) AS edge_properties"
+            for index, (src, tgt) in enumerate(labels)
+        ]
+        edges = {}
+        for record in await self._query_union(branches):
+            if record["edge_properties"]:
+                edges.setdefault(
+                    labels[record["pair_index"]], record["edge_properties"]
+                )
+        result = {}
+        for pair in pairs:
+            edge = edges.get((pair["src"].strip('"'), pair["tgt"].strip('"')))
+            if edge is not None:
+                result[(pair["src"], pair["tgt"])] = edge
+        return result
+
+    async def get_nodes_edges_batch(
+        self, node_ids: list[str]
+    ) -> dict[str, list[tuple[str, str]]]:
+        if not node_ids:
+            return {}
+        labels = {node_id.strip('"') for node_id in node_ids}
+        branches = [
+            f"MATCH (n:`{AGEStorage._encode_graph_label(label)}`) "
+            "OPTIONAL MATCH (n)-[r]-(connected) RETURN n, r, connected"
+            for label in labels
+        ]
+        edges: dict[str, list[tuple[str, str]]] = {}
+        for record in await self._query_union(branches):
+            source_label = record["n"]["label"] if record["n"] else None
+            target_label = record["connected"]["label"] if record["connected"] else None
+            if source_label and target_label:
+                edges.setdefault(source_label, []).append((source_label, target_label))
+        return {node_id: edges.get(node_id.strip('"'), []) for node_id in node_ids}
+
     @retry(
         stop=stop_after_attempt(3),
         wait=wait_exponential(multiplier=1, min=4, max=10),
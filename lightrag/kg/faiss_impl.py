@@ -12,7 +12,7 @@ from lightrag.utils import logger, compute_mdhash_id
 from lightrag.base import BaseVectorStorage
 
 from .shared_storage import (
-    get_storage_lock,
+    get_namespace_storage_lock,
     get_update_flag,
     set_all_update_flags,
 )
@@ -25,6 +25,15 @@ FAISS_PACKAGE = "faiss-gpu" if USE_GPU else "faiss-cpu"
 if not pm.is_installed(FAISS_PACKAGE):
     pm.install(FAISS_PACKAGE)
 
+# Supported index types for the underlying Faiss index
+FAISS_INDEX_TYPES = ("flat", "ivf", "hnsw")
+
+# Compact the index once tombstoned vectors exceed this share of the index
+FAISS_COMPACT_RATIO = 0.2
+
+# Minimum training points per IVF list, below this Faiss clustering degrades
+FAISS_IVF_MIN_POINTS_PER_LIST = 39
+
 
 @final
 @dataclass
@@ -32,6 +41,11 @@ class FaissVectorDBStorage(BaseVectorStorage):
     """
     A Faiss-based Vector DB Storage for LightRAG.
     Uses cosine similarity by storing normalized vectors in a Faiss index with inner product search.
+
+    Vectors live only in the Faiss index, which is wrapped in an IndexIDMap2 so that
+    every vector keeps a stable int64 id. The metadata file only holds metadata.
+    Index types that cannot remove vectors in place (HNSW) use tombstones, which are
+    compacted away during index_done_callback.
     """
 
     def __post_init__(self):
@@ -44,6 +58,32 @@ class FaissVectorDBStorage(BaseVectorStorage):
             )
         self.cosine_better_than_threshold = cosine_threshold
 
+        # Index type and tuning parameters, kwargs take precedence over env vars
+        self._index_type = str(
+            kwargs.get("faiss_index_type", os.getenv("FAISS_INDEX_TYPE", "flat"))
+        ).lower()
+        if self._index_type not in FAISS_INDEX_TYPES:
+            raise ValueError(
+                f"Unsupported faiss_index_type '{self._index_type}', "
+                f"choose from: {', '.join(FAISS_INDEX_TYPES)}"
+            )
+        self._ivf_nlist = int(
+            kwargs.get("faiss_ivf_nlist", os.getenv("FAISS_IVF_NLIST", 1024))
+        )
+        self._ivf_nprobe = int(
+            kwargs.get("faiss_ivf_nprobe", os.getenv("FAISS_IVF_NPROBE", 16))
+        )
+        self._hnsw_m = int(kwargs.get("faiss_hnsw_m", os.getenv("FAISS_HNSW_M", 32)))
+        self._hnsw_ef_construction = int(
+            kwargs.get(
+                "faiss_hnsw_ef_construction",
+                os.getenv("FAISS_HNSW_EF_CONSTRUCTION", 200),
+            )
+        )
+        self._hnsw_ef_search = int(
+            kwargs.get("faiss_hnsw_ef_search", os.getenv("FAISS_HNSW_EF_SEARCH", 128))
+        )
+
         # Where to save index file if you want persistent storage
         self._faiss_index_file = os.path.join(
             self.global_config["working_dir"], f"faiss_index_{self.namespace}.index"
@@ -54,25 +94,125 @@ class FaissVectorDBStorage(BaseVectorStorage):
         # Embedding dimension (e.g. 768) must match your embedding function
         self._dim = self.embedding_func.embedding_dim
 
-        # Create an empty Faiss index for inner product (useful for normalized vectors = cosine similarity).
-        # If you have a large number of vectors, you might want IVF or other indexes.
-        # For demonstration, we use a simple IndexFlatIP.
-        self._index = faiss.IndexFlatIP(self._dim)
-        # Keep a local store for metadata, IDs, etc.
+        self._reset_state()
+        self._load_faiss_index()
+
+    def _reset_state(self):
+        """Reset the in-memory index and all lookup structures"""
+        self._index = self._create_index()
         # Maps <int faiss_id> → metadata (including your original ID).
-        self._id_to_meta = {}
+        self._id_to_meta: dict[int, dict[str, Any]] = {}
+        # Maps <custom id> → <int faiss_id> for O(1) lookups
+        self._custom_id_to_fid: dict[str, int] = {}
+        # Faiss ids that are deleted but still physically present in the index
+        self._tombstones: set[int] = set()
+        # Search selector excluding the tombstones, built on demand
+        self._tombstone_selector = None
+        self._next_fid = 0
+
+    def _create_index(self, n_vectors: int = 0):
+        """
+        Create an empty index of the configured type, every vector is addressed by its faiss id.
+        IVF needs enough vectors for training, so IVF namespaces start with a flat index
+        and are promoted once they hold FAISS_IVF_MIN_POINTS_PER_LIST * nlist vectors.
+        """
+        if self._index_type == "ivf" and n_vectors >= self._ivf_min_vectors():
+            quantizer = faiss.IndexFlatIP(self._dim)
+            index = faiss.IndexIVFFlat(
+                quantizer, self._dim, self._ivf_nlist, faiss.METRIC_INNER_PRODUCT
+            )
+            # Keep the quantizer alive as long as the IVF index
+            index.own_fields = True
+            quantizer.this.disown()
+            # Hashtable direct map allows remove_ids and reconstruct by faiss id
+            index.set_direct_map_type(faiss.DirectMap.Hashtable)
+        else:
+            if self._index_type == "hnsw":
+                base = faiss.IndexHNSWFlat(
+                    self._dim, self._hnsw_m, faiss.METRIC_INNER_PRODUCT
+                )
+                base.hnsw.efConstruction = self._hnsw_ef_construction
+            else:
+                base = faiss.IndexFlatIP(self._dim)
+            index = faiss.IndexIDMap2(base)
+            index.own_fields = True
+            base.this.disown()
+        self._apply_search_params(index)
+        return index
+
+    def _ivf_min_vectors(self) -> int:
+        return self._ivf_nlist * FAISS_IVF_MIN_POINTS_PER_LIST
+
+    def _apply_search_params(self, index):
+        """Apply query-time parameters (nprobe / efSearch) to the index"""
+        if isinstance(index, faiss.IndexIVF):
+            index.nprobe = self._ivf_nprobe
+        elif self._index_type == "hnsw":
+            faiss.downcast_index(index.index).hnsw.efSearch = self._hnsw_ef_search
+
+    def _supports_remove(self) -> bool:
+        # HNSW graphs can not drop vectors in place
+        return self._index_type != "hnsw"
+
+    def _rebuild_index(self):
+        """
+        Rebuild the index from the live vectors only.
+        Used to compact tombstones, to promote a grown IVF namespace from flat to IVF,
+        and to switch index types. Vectors are reconstructed from the index itself.
+        Caller must hold the storage lock.
+        """
+        fids = np.fromiter(self._id_to_meta.keys(), dtype=np.int64)
+        vectors = (
+            self._index.reconstruct_batch(fids)
+            if len(fids)
+            else np.empty((0, self._dim), dtype=np.float32)
+        )
+        index = self._create_index(len(fids))
+        if not index.is_trained:
+            index.train(vectors)
+        if len(fids):
+            index.add_with_ids(vectors, fids)
+        logger.info(
+            f"FAISS: rebuilt {self._index_type} index for {self.namespace} with {len(fids)} vectors, "
+            f"dropped {len(self._tombstones)} tombstoned vectors"
+        )
+        self._index = index
+        self._tombstones = set()
+        self._tombstone_selector = None
 
-        self._load_faiss_index()
+    def _search_params(self, top_k: int):
+        """HNSW search parameters skipping tombstoned vectors, None without tombstones
+
+        Filtering inside the graph search keeps k at top_k, whatever the number of
+        tombstones waiting for the next compaction.
+        """
+        if not self._tombstones:
+            return None
+        if self._tombstone_selector is None:
+            batch = faiss.IDSelectorBatch(
+                np.fromiter(self._tombstones, dtype=np.int64)
+            )
+            selector = faiss.IDSelectorNot(batch)
+            # The Python objects own the C++ selectors, keep both alive
+            self._tombstone_selector = (selector, batch)
+        return faiss.SearchParametersHNSW(
+            sel=self._tombstone_selector[0],
+            efSearch=max(self._hnsw_ef_search, top_k),
+        )
 
     async def initialize(self):
         """Initialize storage data"""
         # Get the update flag for cross-process update notification
         self.storage_updated = await get_update_flag(self.namespace)
         # Get the storage lock for use in other methods
-        self._storage_lock = get_storage_lock()
+        self._storage_lock = await get_namespace_storage_lock(self.namespace)
 
     async def _get_index(self):
         """Check if the shtorage should be reloaded"""
+        # Fast path: no reload pending, serve the current snapshot without locking
+        if not self.storage_updated.value:
+            return self._index
+
         # Acquire lock to prevent concurrent read and write
         async with self._storage_lock:
             # Check if storage was updated by another process
@@ -81,8 +221,7 @@ class FaissVectorDBStorage(BaseVectorStorage):
                     f"Process {os.getpid()} FAISS reloading {self.namespace} due to update by another process"
                 )
                 # Reload data
-                self._index = faiss.IndexFlatIP(self._dim)
-                self._id_to_meta = {}
+                self._reset_state()
                 self._load_faiss_index()
                 self.storage_updated.value = False
             return self._index
@@ -138,33 +277,33 @@ class FaissVectorDBStorage(BaseVectorStorage):
             return []
 
         # Convert to float32 and normalize embeddings for cosine similarity (in-place)
-        embeddings = embeddings.astype(np.float32)
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
         faiss.normalize_L2(embeddings)
 
-        # Upsert logic:
-        # 1. Identify which vectors to remove if they exist
-        # 2. Remove them
-        # 3. Add the new vectors
-        existing_ids_to_remove = []
-        for meta, emb in zip(list_data, embeddings):
-            faiss_internal_id = self._find_faiss_id_by_custom_id(meta["__id__"])
-            if faiss_internal_id is not None:
-                existing_ids_to_remove.append(faiss_internal_id)
-
-        if existing_ids_to_remove:
-            await self._remove_faiss_ids(existing_ids_to_remove)
+        # Make sure the index reflects other processes' updates before mutating it
+        await self._get_index()
 
-        # Step 2: Add new vectors
-        index = await self._get_index()
-        start_idx = index.ntotal
-        index.add(embeddings)
+        async with self._storage_lock:
+            # Upsert logic:
+            # 1. Drop the vectors of ids that already exist
+            # 2. Add the new vectors under freshly allocated faiss ids
+            existing_fids = [
+                self._custom_id_to_fid[meta["__id__"]]
+                for meta in list_data
+                if meta["__id__"] in self._custom_id_to_fid
+            ]
+            if existing_fids:
+                self._remove_faiss_ids(existing_fids)
+
+            fids = np.arange(
+                self._next_fid, self._next_fid + len(list_data), dtype=np.int64
+            )
+            self._index.add_with_ids(embeddings, fids)
+            self._next_fid += len(list_data)
 
-        # Step 3: Store metadata + vector for each new ID
-        for i, meta in enumerate(list_data):
-            fid = start_idx + i
-            # Store the raw vector so we can rebuild if something is removed
-            meta["__vector__"] = embeddings[i].tolist()
-            self._id_to_meta.update({fid: meta})
+            for fid, meta in zip(fids.tolist(), list_data):
+                self._id_to_meta[fid] = meta
+                self._custom_id_to_fid[meta["__id__"]] = fid
 
         logger.info(f"Upserted {len(list_data)} vectors into Faiss index.")
         return [m["__id__"] for m in list_data]
@@ -197,7 +336,11 @@ class FaissVectorDBStorage(BaseVectorStorage):
 
         # Perform the similarity search
         index = await self._get_index()
-        distances, indices = index.search(embedding, top_k)
+        if index.ntotal == 0:
+            return []
+        distances, indices = index.search(
+            embedding, min(top_k, index.ntotal), params=self._search_params(top_k)
+        )
 
         distances = distances[0]
         indices = indices[0]
@@ -212,7 +355,10 @@ class FaissVectorDBStorage(BaseVectorStorage):
             if dist < threshold:
                 continue
 
-            meta = self._id_to_meta.get(idx, {})
+            meta = self._id_to_meta.get(int(idx))
+            if meta is None:
+                # Deleted by another coroutine while searching
+                continue
             results.append(
                 {
                     **meta,
@@ -221,6 +367,8 @@ class FaissVectorDBStorage(BaseVectorStorage):
                     "created_at": meta.get("__created_at__"),
                 }
             )
+            if len(results) >= top_k:
+                break
 
         return results
 
@@ -239,14 +387,13 @@ class FaissVectorDBStorage(BaseVectorStorage):
            KG-storage-log should be used to avoid data corruption
         """
         logger.info(f"Deleting {len(ids)} vectors from {self.namespace}")
-        to_remove = []
-        for cid in ids:
-            fid = self._find_faiss_id_by_custom_id(cid)
-            if fid is not None:
-                to_remove.append(fid)
+        to_remove = [
+            self._custom_id_to_fid[cid] for cid in ids if cid in self._custom_id_to_fid
+        ]
 
         if to_remove:
-            await self._remove_faiss_ids(to_remove)
+            async with self._storage_lock:
+                self._remove_faiss_ids(to_remove)
         logger.debug(
             f"Successfully deleted {len(to_remove)} vectors from {self.namespace}"
         )
@@ -277,7 +424,8 @@ class FaissVectorDBStorage(BaseVectorStorage):
 
         logger.debug(f"Found {len(relations)} relations for {entity_name}")
         if relations:
-            await self._remove_faiss_ids(relations)
+            async with self._storage_lock:
+                self._remove_faiss_ids(relations)
             logger.debug(f"Deleted {len(relations)} relations for {entity_name}")
 
     # --------------------------------------------------------------------------------
@@ -288,48 +436,49 @@ class FaissVectorDBStorage(BaseVectorStorage):
         """
         Return the Faiss internal ID for a given custom ID, or None if not found.
         """
-        for fid, meta in self._id_to_meta.items():
-            if meta.get("__id__") == custom_id:
-                return fid
-        return None
+        return self._custom_id_to_fid.get(custom_id)
 
-    async def _remove_faiss_ids(self, fid_list):
+    def _remove_faiss_ids(self, fid_list):
         """
         Remove a list of internal Faiss IDs from the index.
-        Because IndexFlatIP doesn't support 'removals',
-        we rebuild the index excluding those vectors.
+        Index types that support removal drop the vectors right away,
+        others (HNSW) keep them as tombstones until the next compaction.
+        Caller must hold the storage lock.
         """
-        keep_fids = [fid for fid in self._id_to_meta if fid not in fid_list]
-
-        # Rebuild the index
-        vectors_to_keep = []
-        new_id_to_meta = {}
-        for new_fid, old_fid in enumerate(keep_fids):
-            vec_meta = self._id_to_meta[old_fid]
-            vectors_to_keep.append(vec_meta["__vector__"])  # stored as list
-            new_id_to_meta[new_fid] = vec_meta
-
-        async with self._storage_lock:
-            # Re-init index
-            self._index = faiss.IndexFlatIP(self._dim)
-            if vectors_to_keep:
-                arr = np.array(vectors_to_keep, dtype=np.float32)
-                self._index.add(arr)
+        for fid in fid_list:
+            meta = self._id_to_meta.pop(fid, None)
+            if meta is not None:
+                self._custom_id_to_fid.pop(meta["__id__"], None)
 
-            self._id_to_meta = new_id_to_meta
+        if self._supports_remove():
+            self._index.remove_ids(np.asarray(fid_list, dtype=np.int64))
+        else:
+            self._tombstones.update(fid_list)
+            self._tombstone_selector = None
 
     def _save_faiss_index(self):
         """
         Save the current Faiss index + metadata to disk so it can persist across runs.
         """
+        if len(self._tombstones) > FAISS_COMPACT_RATIO * max(self._index.ntotal, 1):
+            self._rebuild_index()
+        elif (
+            self._index_type == "ivf"
+            and not isinstance(self._index, faiss.IndexIVF)
+            and self._index.ntotal >= self._ivf_min_vectors()
+        ):
+            self._rebuild_index()
+
         faiss.write_index(self._index, self._faiss_index_file)
 
-        # Save metadata dict to JSON. Convert all keys to strings for JSON storage.
-        # _id_to_meta is { int: { '__id__': doc_id, '__vector__': [float,...], ... } }
-        # We'll keep the int -> dict, but JSON requires string keys.
-        serializable_dict = {}
-        for fid, meta in self._id_to_meta.items():
-            serializable_dict[str(fid)] = meta
+        # Save metadata dict to JSON. JSON requires string keys, vectors are
+        # kept in the Faiss index only.
+        serializable_dict = {
+            "index_type": self._index_type,
+            "next_fid": self._next_fid,
+            "tombstones": list(self._tombstones),
+            "data": {str(fid): meta for fid, meta in self._id_to_meta.items()},
+        }
 
         with open(self._meta_file, "w", encoding="utf-8") as f:
             json.dump(serializable_dict, f)
@@ -345,16 +494,41 @@ class FaissVectorDBStorage(BaseVectorStorage):
 
         try:
             # Load the Faiss index
-            self._index = faiss.read_index(self._faiss_index_file)
+            index = faiss.read_index(self._faiss_index_file)
             # Load metadata
             with open(self._meta_file, "r", encoding="utf-8") as f:
                 stored_dict = json.load(f)
 
+            if "data" in stored_dict and isinstance(stored_dict["data"], dict):
+                meta_dict = stored_dict["data"]
+                stored_type = stored_dict.get("index_type", "flat")
+                self._tombstones = set(stored_dict.get("tombstones", []))
+            else:
+                # Legacy layout: IndexFlatIP with sequential ids and
+                # vectors duplicated in the metadata under "__vector__"
+                meta_dict = stored_dict
+                stored_type = "flat"
+                index = self._migrate_legacy_index(index)
+            self._index = index
+
             # Convert string keys back to int
-            self._id_to_meta = {}
-            for fid_str, meta in stored_dict.items():
+            for fid_str, meta in meta_dict.items():
                 fid = int(fid_str)
+                meta.pop("__vector__", None)
                 self._id_to_meta[fid] = meta
+                self._custom_id_to_fid[meta["__id__"]] = fid
+            self._next_fid = max(
+                stored_dict.get("next_fid", 0),
+                max(self._id_to_meta, default=-1) + 1,
+            )
+
+            if stored_type != self._index_type:
+                logger.info(
+                    f"FAISS: converting {self.namespace} index from '{stored_type}' to '{self._index_type}'"
+                )
+                self._rebuild_index()
+            else:
+                self._apply_search_params(self._index)
 
             logger.info(
                 f"Faiss index loaded with {self._index.ntotal} vectors from {self._faiss_index_file}"
@@ -362,8 +536,23 @@ class FaissVectorDBStorage(BaseVectorStorage):
         except Exception as e:
             logger.error(f"Failed to load Faiss index or metadata: {e}")
             logger.warning("Starting with an empty Faiss index.")
-            self._index = faiss.IndexFlatIP(self._dim)
-            self._id_to_meta = {}
+            self._reset_state()
+
+    def _migrate_legacy_index(self, legacy_index):
+        """Wrap a legacy sequential-id IndexFlatIP into an IndexIDMap2 keyed by the same ids"""
+        logger.info(
+            f"FAISS: migrating legacy index for {self.namespace} to IndexIDMap2 layout"
+        )
+        base = faiss.IndexFlatIP(self._dim)
+        index = faiss.IndexIDMap2(base)
+        index.own_fields = True
+        base.this.disown()
+        if legacy_index.ntotal:
+            vectors = legacy_index.reconstruct_n(0, legacy_index.ntotal)
+            index.add_with_ids(
+                vectors, np.arange(legacy_index.ntotal, dtype=np.int64)
+            )
+        return index
 
     async def index_done_callback(self) -> None:
         async with self._storage_lock:
@@ -373,8 +562,7 @@ class FaissVectorDBStorage(BaseVectorStorage):
                 logger.warning(
                     f"Storage for FAISS {self.namespace} was updated by another process, reloading..."
                 )
-                self._index = faiss.IndexFlatIP(self._dim)
-                self._id_to_meta = {}
+                self._reset_state()
                 self._load_faiss_index()
                 self.storage_updated.value = False
                 return False  # Return error
@@ -447,6 +635,19 @@ class FaissVectorDBStorage(BaseVectorStorage):
 
         return results
 
+    async def update_filepath_by_file_uuid(self, file_uuid: str) -> None:
+        """Update filepath by file uuid
+
+        Args:
+            file_uuid: The unique identifier of the file
+        """
+        modified_count = 0
+        for meta in self._id_to_meta.values():
+            if meta.get("file_uuid") == file_uuid:
+                meta["file_uuid_updated"] = True
+                modified_count += 1
+        logger.debug(f"Updated {modified_count} records with file_uuid: {file_uuid}")
+
     async def drop(self) -> dict[str, str]:
         """Drop all vector data from storage and clean up resources
 
@@ -465,18 +666,14 @@ class FaissVectorDBStorage(BaseVectorStorage):
         """
         try:
             async with self._storage_lock:
-                # Reset the index
-                self._index = faiss.IndexFlatIP(self._dim)
-                self._id_to_meta = {}
-
                 # Remove storage files if they exist
                 if os.path.exists(self._faiss_index_file):
                     os.remove(self._faiss_index_file)
                 if os.path.exists(self._meta_file):
                     os.remove(self._meta_file)
 
-                self._id_to_meta = {}
-                self._load_faiss_index()
+                # Reset the index
+                self._reset_state()
 
                 # Notify other processes
                 await set_all_update_flags(self.namespace)
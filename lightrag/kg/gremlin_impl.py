@@ -123,13 +123,23 @@ class GremlinStorage(BaseGraphStorage):
             props.append(f".property({prop_name}, {GremlinStorage._to_value_map(v)})")
         return "".join(props)
 
+    @staticmethod
+    def _entity_name(name: str) -> str:
+        """The entity_name value stored for a node id"""
+        return name.strip('"').replace(r"\'", "'")
+
     @staticmethod
     def _fix_name(name: str) -> str:
         """Strip double quotes and format as a proper field name"""
-        name = GremlinStorage._to_value_map(name.strip('"').replace(r"\'", "'"))
+        name = GremlinStorage._to_value_map(GremlinStorage._entity_name(name))
 
         return name
 
+    @staticmethod
+    def _within(names) -> str:
+        """A within() predicate matching several entity names"""
+        return "within(" + ", ".join(GremlinStorage._fix_name(n) for n in names) + ")"
+
     async def _query(self, query: str) -> List[Dict[str, Any]]:
         """
         Query the Gremlin graph
@@ -261,12 +271,13 @@ class GremlinStorage(BaseGraphStorage):
         query = f"""g
                  .V().has('graph', {self.graph_name})
                  .has('entity_name', {entity_name_source})
-                 .outE()
+                 .outE().as('edge')
                  .inV().has('graph', {self.graph_name})
                  .has('entity_name', {entity_name_target})
+                 .select('edge')
                  .limit(1)
                  .project('edge_properties')
-                 .by(__.bothE().elementMap())
+                 .by(elementMap())
                  """
         result = await self._query(query)
         if result:
@@ -300,6 +311,121 @@ class GremlinStorage(BaseGraphStorage):
 
         return edges
 
+    # The batch queries fold their results into one list or map, as _query only
+    # returns the first result batch of the server
+
+    async def get_nodes_batch(self, node_ids: list[str]) -> dict[str, dict]:
+        if not node_ids:
+            return {}
+        query = f"""g
+                 .V().has('graph', {self.graph_name})
+                 .has('entity_name', {GremlinStorage._within(set(node_ids))})
+                 .elementMap()
+                 .fold()
+                 """
+        result = await self._query(query)
+        nodes = {}
+        for node in result[0] if result else []:
+            nodes.setdefault(node["entity_name"], node)
+        return {
+            node_id: nodes[GremlinStorage._entity_name(node_id)]
+            for node_id in node_ids
+            if GremlinStorage._entity_name(node_id) in nodes
+        }
+
+    async def node_degrees_batch(self, node_ids: list[str]) -> dict[str, int]:
+        if not node_ids:
+            return {}
+        query = f"""g
+                 .V().has('graph', {self.graph_name})
+                 .has('entity_name', {GremlinStorage._within(set(node_ids))})
+                 .group()
+                    .by('entity_name')
+                    .by(__.outE().inV().has('graph', {self.graph_name}).count())
+                 """
+        result = await self._query(query)
+        degrees = result[0] if result else {}
+        return {
+            node_id: int(degrees.get(GremlinStorage._entity_name(node_id), 0))
+            for node_id in node_ids
+        }
+
+    async def edge_degrees_batch(
+        self, edge_pairs: list[tuple[str, str]]
+    ) -> dict[tuple[str, str], int]:
+        if not edge_pairs:
+            return {}
+        degrees = await self.node_degrees_batch(
+            list({node_id for pair in edge_pairs for node_id in pair})
+        )
+        return {(src, tgt): degrees[src] + degrees[tgt] for src, tgt in edge_pairs}
+
+    async def get_edges_batch(
+        self, pairs: list[dict[str, str]]
+    ) -> dict[tuple[str, str], dict]:
+        """
+        Fetch all edges from the requested sources to the requested targets in one
+        traversal, then keep those of the requested pairs.
+        """
+        if not pairs:
+            return {}
+        sources = {pair["src"] for pair in pairs}
+        targets = {pair["tgt"] for pair in pairs}
+        query = f"""g
+                 .V().has('graph', {self.graph_name})
+                 .has('entity_name', {GremlinStorage._within(sources)}).as('source')
+                 .outE().as('edge')
+                 .inV().has('graph', {self.graph_name})
+                 .has('entity_name', {GremlinStorage._within(targets)}).as('target')
+                 .select('source', 'edge', 'target')
+                    .by('entity_name')
+                    .by(elementMap())
+                    .by('entity_name')
+                 .fold()
+                 """
+        result = await self._query(query)
+        edges = {}
+        for res in result[0] if result else []:
+            edges.setdefault((res["source"], res["target"]), res["edge"])
+        found = {}
+        for pair in pairs:
+            edge = edges.get(
+                (
+                    GremlinStorage._entity_name(pair["src"]),
+                    GremlinStorage._entity_name(pair["tgt"]),
+                )
+            )
+            if edge is not None:
+                found[(pair["src"], pair["tgt"])] = edge
+        return found
+
+    async def get_nodes_edges_batch(
+        self, node_ids: list[str]
+    ) -> dict[str, list[tuple[str, str]]]:
+        if not node_ids:
+            return {}
+        query = f"""g
+                 .V().has('graph', {self.graph_name})
+                 .has('entity_name', {GremlinStorage._within(set(node_ids))})
+                 .bothE()
+                 .dedup()
+                 .project('source_name', 'target_name')
+                 .by(__.outV().values('entity_name'))
+                 .by(__.inV().values('entity_name'))
+                 .fold()
+                 """
+        result = await self._query(query)
+        edges: dict[str, list[tuple[str, str]]] = {}
+        for res in result[0] if result else []:
+            edge = (res["source_name"], res["target_name"])
+            edges.setdefault(edge[0], []).append(edge)
+            if edge[1] != edge[0]:
+                edges.setdefault(edge[1], []).append(edge)
+        return {
+            node_id: edges.get(GremlinStorage._entity_name(node_id), [])
+            for node_id in node_ids
+        }
+
     @retry(
         stop=stop_after_attempt(10),
         wait=wait_exponential(multiplier=1, min=4, max=10),
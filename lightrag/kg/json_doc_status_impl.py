@@ -1,3 +1,4 @@
+from contextlib import nullcontext
 from dataclasses import dataclass
 import os
 from typing import Any, Union, final
@@ -12,9 +13,10 @@ from lightrag.utils import (
     logger,
     write_json,
 )
+from .shared_kv import SharedKVStore
 from .shared_storage import (
-    get_namespace_data,
-    get_storage_lock,
+    get_namespace_kv_data,
+    get_namespace_storage_lock,
     get_data_init_lock,
     get_update_flag,
     set_all_update_flags,
@@ -33,16 +35,25 @@ class JsonDocStatusStorage(DocStatusStorage):
         self._file_name = os.path.join(working_dir, f"kv_store_{self.namespace}.json")
         self._data = None
         self._storage_lock = None
+        self._read_lock = None
         self.storage_updated = None
 
     async def initialize(self):
         """Initialize storage data"""
-        self._storage_lock = get_storage_lock()
+        self._storage_lock = await get_namespace_storage_lock(self.namespace)
         self.storage_updated = await get_update_flag(self.namespace)
         async with get_data_init_lock():
-            # check need_init must before get_namespace_data
+            # check need_init must before get_namespace_kv_data
             need_init = await try_initialize_namespace(self.namespace)
-            self._data = await get_namespace_data(self.namespace)
+            self._data = await get_namespace_kv_data(self.namespace)
+            # Reads only need the lock for Manager dict proxies: a plain dict is only
+            # touched synchronously by this event loop, and the shared-memory engine
+            # serves reads from a local replica
+            self._read_lock = (
+                nullcontext()
+                if isinstance(self._data, (dict, SharedKVStore))
+                else self._storage_lock
+            )
             if need_init:
                 loaded_data = load_json(self._file_name) or {}
                 async with self._storage_lock:
@@ -53,12 +64,12 @@ class JsonDocStatusStorage(DocStatusStorage):
 
     async def filter_keys(self, keys: set[str]) -> set[str]:
         """Return keys that should be processed (not in storage or not successfully processed)"""
-        async with self._storage_lock:
+        async with self._read_lock:
             return set(keys) - set(self._data.keys())
 
     async def get_by_ids(self, ids: list[str]) -> list[dict[str, Any]]:
         result: list[dict[str, Any]] = []
-        async with self._storage_lock:
+        async with self._read_lock:
             for id in ids:
                 data = self._data.get(id, None)
                 if data:
@@ -68,7 +79,7 @@ class JsonDocStatusStorage(DocStatusStorage):
     async def get_status_counts(self) -> dict[str, int]:
         """Get counts of documents in each status"""
         counts = {status.value: 0 for status in DocStatus}
-        async with self._storage_lock:
+        async with self._read_lock:
             for doc in self._data.values():
                 counts[doc["status"]] += 1
         return counts
@@ -78,7 +89,7 @@ class JsonDocStatusStorage(DocStatusStorage):
     ) -> dict[str, DocProcessingStatus]:
         """Get all documents with a specific status"""
         result = {}
-        async with self._storage_lock:
+        async with self._read_lock:
             count = 0
             for k, v in self._data.items():
                 if v["status"] == status.value:
@@ -129,7 +140,7 @@ class JsonDocStatusStorage(DocStatusStorage):
         await self.index_done_callback()
 
     async def get_by_id(self, id: str) -> Union[dict[str, Any], None]:
-        async with self._storage_lock:
+        async with self._read_lock:
             return self._data.get(id)
 
     async def delete(self, doc_ids: list[str]) -> None:
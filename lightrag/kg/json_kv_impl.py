@@ -1,6 +1,7 @@
 import os
+from contextlib import nullcontext
 from dataclasses import dataclass
-from typing import Any, final
+from typing import Any, AsyncIterator, final
 
 from lightrag.base import (
     BaseKVStorage,
@@ -10,9 +11,11 @@ from lightrag.utils import (
     logger,
     write_json,
 )
+from lightrag.constants import DEFAULT_KV_ITER_BATCH_SIZE
+from .shared_kv import SharedKVStore
 from .shared_storage import (
-    get_namespace_data,
-    get_storage_lock,
+    get_namespace_kv_data,
+    get_namespace_storage_lock,
     get_data_init_lock,
     get_update_flag,
     set_all_update_flags,
@@ -29,16 +32,25 @@ class JsonKVStorage(BaseKVStorage):
         self._file_name = os.path.join(working_dir, f"kv_store_{self.namespace}.json")
         self._data = None
         self._storage_lock = None
+        self._read_lock = None
         self.storage_updated = None
 
     async def initialize(self):
         """Initialize storage data"""
-        self._storage_lock = get_storage_lock()
+        self._storage_lock = await get_namespace_storage_lock(self.namespace)
         self.storage_updated = await get_update_flag(self.namespace)
         async with get_data_init_lock():
-            # check need_init must before get_namespace_data
+            # check need_init must before get_namespace_kv_data
             need_init = await try_initialize_namespace(self.namespace)
-            self._data = await get_namespace_data(self.namespace)
+            self._data = await get_namespace_kv_data(self.namespace)
+            # Reads only need the lock for Manager dict proxies: a plain dict is only
+            # touched synchronously by this event loop, and the shared-memory engine
+            # serves reads from a local replica
+            self._read_lock = (
+                nullcontext()
+                if isinstance(self._data, (dict, SharedKVStore))
+                else self._storage_lock
+            )
             if need_init:
                 loaded_data = load_json(self._file_name) or {}
                 async with self._storage_lock:
@@ -91,15 +103,37 @@ class JsonKVStorage(BaseKVStorage):
         Returns:
             Dictionary containing all stored data
         """
-        async with self._storage_lock:
+        async with self._read_lock:
             return dict(self._data)
 
+    async def get_all_iter(
+        self, prefix: str = "", batch_size: int = DEFAULT_KV_ITER_BATCH_SIZE
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Yield records whose id starts with prefix, in dicts of at most batch_size records
+
+        Iterates over a snapshot of the keys taken at the start; values are copied batch by
+        batch so that the lock is never held while the caller processes a batch.
+        Records deleted in the meantime are skipped.
+        """
+        async with self._read_lock:
+            keys = [key for key in self._data.keys() if key.startswith(prefix)]
+
+        for start in range(0, len(keys), batch_size):
+            async with self._read_lock:
+                batch = {
+                    key: self._data[key]
+                    for key in keys[start : start + batch_size]
+                    if key in self._data
+                }
+            if batch:
+                yield batch
+
     async def get_by_id(self, id: str) -> dict[str, Any] | None:
-        async with self._storage_lock:
+        async with self._read_lock:
             return self._data.get(id)
 
     async def get_by_ids(self, ids: list[str]) -> list[dict[str, Any]]:
-        async with self._storage_lock:
+        async with self._read_lock:
             return [
                 (
                     {k: v for k, v in self._data[id].items()}
@@ -110,7 +144,7 @@ class JsonKVStorage(BaseKVStorage):
             ]
 
     async def filter_keys(self, keys: set[str]) -> set[str]:
-        async with self._storage_lock:
+        async with self._read_lock:
             return set(keys) - set(self._data.keys())
 
     async def upsert(self, data: dict[str, dict[str, Any]]) -> None:
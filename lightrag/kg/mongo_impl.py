@@ -3,8 +3,9 @@ from dataclasses import dataclass, field
 import numpy as np
 import configparser
 import asyncio
+import re
 
-from typing import Any, List, Union, final
+from typing import Any, AsyncIterator, List, Union, final
 
 from ..base import (
     BaseGraphStorage,
@@ -16,6 +17,7 @@ from ..base import (
 )
 from ..namespace import NameSpace, is_namespace
 from ..utils import logger, compute_mdhash_id
+from ..constants import DEFAULT_KV_ITER_BATCH_SIZE
 from ..types import KnowledgeGraph, KnowledgeGraphNode, KnowledgeGraphEdge
 import pipmaster as pm
 
@@ -107,6 +109,41 @@ class MongoKVStorage(BaseKVStorage):
         existing_ids = {str(x["_id"]) async for x in cursor}
         return keys - existing_ids
 
+    async def get_all_iter(
+        self, prefix: str = "", batch_size: int = DEFAULT_KV_ITER_BATCH_SIZE
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Stream documents whose _id starts with prefix using a batched cursor
+
+        Yields dicts of at most batch_size documents. LLM cache documents are grouped
+        by mode like the JSON cache layout ({mode: {id: doc}}) and prefix matches
+        their mode.
+        """
+        is_cache = is_namespace(self.namespace, NameSpace.KV_STORE_LLM_RESPONSE_CACHE)
+        query = {}
+        if prefix:
+            # LLM cache _ids are "<mode>_<cache id>", modes contain no underscore
+            pattern = f"^{re.escape(prefix)}"
+            if is_cache:
+                pattern += "[^_]*_"
+            query = {"_id": {"$regex": pattern}}
+        cursor = self._data.find(query).batch_size(batch_size)
+
+        batch: dict[str, Any] = {}
+        count = 0
+        async for doc in cursor:
+            if is_cache:
+                mode, _, cache_id = doc["_id"].partition("_")
+                batch.setdefault(mode, {})[cache_id] = doc
+            else:
+                batch[doc["_id"]] = doc
+            count += 1
+            if count >= batch_size:
+                yield batch
+                batch = {}
+                count = 0
+        if batch:
+            yield batch
+
     async def upsert(self, data: dict[str, dict[str, Any]]) -> None:
         logger.info(f"Inserting {len(data)} to {self.namespace}")
         if not data:
@@ -189,6 +226,15 @@ class MongoKVStorage(BaseKVStorage):
             logger.error(f"Error deleting cache by modes {modes}: {e}")
             return False
 
+    async def drop_cache_entries(self, entries: dict[str, list[str]]) -> None:
+        await self.delete(
+            [
+                f"{mode}_{cache_id}"
+                for mode, cache_ids in entries.items()
+                for cache_id in cache_ids
+            ]
+        )
+
     async def drop(self) -> dict[str, str]:
         """Drop the storage by removing all documents in the collection.
 
@@ -609,6 +655,104 @@ class MongoGraphStorage(BaseGraphStorage):
         edges = result[0].get("edges", [])
         return [(source_node_id, e["target"]) for e in edges]
 
+    #
+    # -------------------------------------------------------------------------
+    # BATCH QUERIES
+    # -------------------------------------------------------------------------
+    #
+
+    async def _edges_by_source(self, source_ids: list[str]) -> dict[str, list[dict]]:
+        """Outbound edge arrays of several node docs, fetched with one $in query"""
+        cursor = self.collection.find(
+            {"_id": {"$in": list(set(source_ids))}}, {"edges": 1}
+        )
+        return {doc["_id"]: doc.get("edges", []) async for doc in cursor}
+
+    async def get_nodes_batch(self, node_ids: list[str]) -> dict[str, dict]:
+        """Fetch several node documents with a single $in query"""
+        if not node_ids:
+            return {}
+        cursor = self.collection.find({"_id": {"$in": list(set(node_ids))}})
+        docs = {doc["_id"]: doc async for doc in cursor}
+        return {node_id: docs[node_id] for node_id in node_ids if node_id in docs}
+
+    async def node_degrees_batch(self, node_ids: list[str]) -> dict[str, int]:
+        """
+        Degrees of several nodes with two aggregations: the size of each node's own
+        edges array, and the inbound edges of all nodes grouped by target.
+        Missing nodes have degree 0, as in node_degree().
+        """
+        if not node_ids:
+            return {}
+        unique_ids = list(set(node_ids))
+
+        outbound_cursor = self.collection.aggregate(
+            [
+                {"$match": {"_id": {"$in": unique_ids}}},
+                {"$project": {"outbound": {"$size": {"$ifNull": ["$edges", []]}}}},
+            ]
+        )
+        outbound = {doc["_id"]: doc["outbound"] async for doc in outbound_cursor}
+
+        inbound_cursor = self.collection.aggregate(
+            [
+                {"$match": {"edges.target": {"$in": unique_ids}}},
+                {"$unwind": "$edges"},
+                {"$match": {"edges.target": {"$in": unique_ids}}},
+                {"$group": {"_id": "$edges.target", "inbound": {"$sum": 1}}},
+            ]
+        )
+        inbound = {doc["_id"]: doc["inbound"] async for doc in inbound_cursor}
+
+        return {
+            node_id: outbound[node_id] + inbound.get(node_id, 0)
+            if node_id in outbound
+            else 0
+            for node_id in node_ids
+        }
+
+    async def edge_degrees_batch(
+        self, edge_pairs: list[tuple[str, str]]
+    ) -> dict[tuple[str, str], int]:
+        """Count the src -> tgt edges of several pairs from one fetch of source docs"""
+        if not edge_pairs:
+            return {}
+        edges_by_source = await self._edges_by_source([src for src, _ in edge_pairs])
+        return {
+            (src, tgt): sum(
+                1 for e in edges_by_source.get(src, []) if e.get("target") == tgt
+            )
+            for src, tgt in edge_pairs
+        }
+
+    async def get_edges_batch(
+        self, pairs: list[dict[str, str]]
+    ) -> dict[tuple[str, str], dict]:
+        """Fetch the edges of several (src, tgt) pairs from one fetch of source docs"""
+        if not pairs:
+            return {}
+        edges_by_source = await self._edges_by_source([pair["src"] for pair in pairs])
+        result = {}
+        for pair in pairs:
+            src, tgt = pair["src"], pair["tgt"]
+            for e in edges_by_source.get(src, []):
+                if e.get("target") == tgt:
+                    result[(src, tgt)] = e
+                    break
+        return result
+
+    async def get_nodes_edges_batch(
+        self, node_ids: list[str]
+    ) -> dict[str, list[tuple[str, str]]]:
+        """Outbound edges of several nodes from one $in query"""
+        if not node_ids:
+            return {}
+        edges_by_source = await self._edges_by_source(node_ids)
+        return {
+            node_id: [(node_id, e["target"]) for e in edges_by_source.get(node_id, [])]
+            for node_id in node_ids
+        }
+
     #
     # -------------------------------------------------------------------------
     # UPSERTS
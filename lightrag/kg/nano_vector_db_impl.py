@@ -17,7 +17,7 @@ if not pm.is_installed("nano-vectordb"):
 
 from nano_vectordb import NanoVectorDB
 from .shared_storage import (
-    get_storage_lock,
+    get_namespace_storage_lock,
     get_update_flag,
     set_all_update_flags,
 )
@@ -56,10 +56,14 @@ class NanoVectorDBStorage(BaseVectorStorage):
         # Get the update flag for cross-process update notification
         self.storage_updated = await get_update_flag(self.namespace)
         # Get the storage lock for use in other methods
-        self._storage_lock = get_storage_lock(enable_logging=False)
+        self._storage_lock = await get_namespace_storage_lock(self.namespace)
 
     async def _get_client(self):
         """Check if the storage should be reloaded"""
+        # Fast path: no reload pending, serve the current snapshot without locking
+        if not self.storage_updated.value:
+            return self._client
+
         # Acquire lock to prevent concurrent read and write
         async with self._storage_lock:
             # Check if data needs to be reloaded
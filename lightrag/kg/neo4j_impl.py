@@ -349,6 +349,10 @@ class Neo4JStorage(BaseGraphStorage):
             await result.consume()  # Make sure to consume the result fully
             return nodes
 
+    @property
+    def materialized_degree(self) -> bool:
+        return bool(self.global_config.get("enable_materialized_degree", False))
+
     async def node_degree(self, node_id: str) -> int:
         """Get the degree (number of relationships) of a node with the given label.
         If multiple nodes have the same label, returns the degree of the first node.
@@ -368,11 +372,18 @@ class Neo4JStorage(BaseGraphStorage):
             database=self._DATABASE, default_access_mode="READ"
         ) as session:
             try:
-                query = """
-                    MATCH (n:base {entity_id: $entity_id})
-                    OPTIONAL MATCH (n)-[r]-()
-                    RETURN COUNT(r) AS degree
-                """
+                if self.materialized_degree:
+                    query = """
+                        MATCH (n:base {entity_id: $entity_id})
+                        RETURN CASE WHEN n.degree IS NULL
+                            THEN count { (n)--() } ELSE n.degree END AS degree
+                    """
+                else:
+                    query = """
+                        MATCH (n:base {entity_id: $entity_id})
+                        OPTIONAL MATCH (n)-[r]-()
+                        RETURN COUNT(r) AS degree
+                    """
                 result = await session.run(query, entity_id=node_id)
                 try:
                     record = await result.single()
@@ -406,11 +417,21 @@ class Neo4JStorage(BaseGraphStorage):
         async with self._driver.session(
             database=self._DATABASE, default_access_mode="READ"
         ) as session:
-            query = """
-                UNWIND $node_ids AS id
-                MATCH (n:base {entity_id: id})
-                RETURN n.entity_id AS entity_id, count { (n)--() } AS degree;
-            """
+            if self.materialized_degree:
+                # the relations are only counted for nodes without a stored degree
+                query = """
+                    UNWIND $node_ids AS id
+                    MATCH (n:base {entity_id: id})
+                    RETURN n.entity_id AS entity_id,
+                        CASE WHEN n.degree IS NULL
+                            THEN count { (n)--() } ELSE n.degree END AS degree;
+                """
+            else:
+                query = """
+                    UNWIND $node_ids AS id
+                    MATCH (n:base {entity_id: id})
+                    RETURN n.entity_id AS entity_id, count { (n)--() } AS degree;
+                """
             result = await session.run(query, node_ids=node_ids)
             degrees = {}
             async for record in result:
@@ -750,19 +771,21 @@ class Neo4JStorage(BaseGraphStorage):
         entity_type = properties["entity_type"]
         if "entity_id" not in properties:
             raise ValueError("Neo4j: node properties must contain an 'entity_id' field")
+        if self.materialized_degree:
+            # the degree is owned by the edge and node write methods
+            properties = {k: v for k, v in properties.items() if k != "degree"}
+        on_create = "ON CREATE SET n.degree = 0" if self.materialized_degree else ""
 
         try:
             async with self._driver.session(database=self._DATABASE) as session:
 
                 async def execute_upsert(tx: AsyncManagedTransaction):
-                    query = (
-                        """
+                    query = """
                     MERGE (n:base {entity_id: $entity_id})
+                    %s
                     SET n += $properties
                     SET n:`%s`
-                    """
-                        % entity_type
-                    )
+                    """ % (on_create, entity_type)
                     result = await tx.run(
                         query, entity_id=node_id, properties=properties
                     )
@@ -809,14 +832,32 @@ class Neo4JStorage(BaseGraphStorage):
             async with self._driver.session(database=self._DATABASE) as session:
 
                 async def execute_upsert(tx: AsyncManagedTransaction):
-                    query = """
-                    MATCH (source:base {entity_id: $source_entity_id})
-                    WITH source
-                    MATCH (target:base {entity_id: $target_entity_id})
-                    MERGE (source)-[r:DIRECTED]-(target)
-                    SET r += $properties
-                    RETURN r, source, target
-                    """
+                    if self.materialized_degree:
+                        # a created relation adds 1 to the degree of both nodes
+                        # (2 for a self loop, as counted); null degrees stay null
+                        query = """
+                        MATCH (source:base {entity_id: $source_entity_id})
+                        WITH source
+                        MATCH (target:base {entity_id: $target_entity_id})
+                        OPTIONAL MATCH (source)-[existing:DIRECTED]-(target)
+                        WITH source, target, count(existing) = 0 AS created
+                        MERGE (source)-[r:DIRECTED]-(target)
+                        SET r += $properties
+                        SET source.degree = CASE WHEN created
+                            THEN source.degree + 1 ELSE source.degree END
+                        SET target.degree = CASE WHEN created
+                            THEN target.degree + 1 ELSE target.degree END
+                        RETURN r, source, target
+                        """
+                    else:
+                        query = """
+                        MATCH (source:base {entity_id: $source_entity_id})
+                        WITH source
+                        MATCH (target:base {entity_id: $target_entity_id})
+                        MERGE (source)-[r:DIRECTED]-(target)
+                        SET r += $properties
+                        RETURN r, source, target
+                        """
                     result = await tx.run(
                         query,
                         source_entity_id=source_node_id,
@@ -1383,6 +1424,17 @@ class Neo4JStorage(BaseGraphStorage):
         """
 
         async def _do_delete(tx: AsyncManagedTransaction):
+            if self.materialized_degree:
+                result = await tx.run(
+                    """
+                    MATCH (n:base {entity_id: $entity_id})-[r]-(m:base)
+                    WHERE m <> n
+                    WITH m, count(r) AS removed
+                    SET m.degree = m.degree - removed
+                    """,
+                    entity_id=node_id,
+                )
+                await result.consume()
             query = """
             MATCH (n:base {entity_id: $entity_id})
             DETACH DELETE n
@@ -1440,10 +1492,19 @@ class Neo4JStorage(BaseGraphStorage):
         for source, target in edges:
 
             async def _do_delete_edge(tx: AsyncManagedTransaction):
-                query = """
-                MATCH (source:base {entity_id: $source_entity_id})-[r]-(target:base {entity_id: $target_entity_id})
-                DELETE r
-                """
+                if self.materialized_degree:
+                    query = """
+                    MATCH (source:base {entity_id: $source_entity_id})-[r]-(target:base {entity_id: $target_entity_id})
+                    WITH source, target, collect(DISTINCT r) AS rels
+                    FOREACH (rel IN rels | DELETE rel)
+                    SET source.degree = source.degree - size(rels)
+                    SET target.degree = target.degree - size(rels)
+                    """
+                else:
+                    query = """
+                    MATCH (source:base {entity_id: $source_entity_id})-[r]-(target:base {entity_id: $target_entity_id})
+                    DELETE r
+                    """
                 result = await tx.run(
                     query, source_entity_id=source, target_entity_id=target
                 )
@@ -1457,6 +1518,24 @@ class Neo4JStorage(BaseGraphStorage):
                 logger.error(f"Error during edge deletion: {str(e)}")
                 raise
 
+    async def recompute_degrees(self) -> int:
+        """Recompute the stored degree of every node, committing every 1000 nodes"""
+        async with self._driver.session(database=self._DATABASE) as session:
+            # CALL ... IN TRANSACTIONS needs an auto-commit transaction
+            result = await session.run(
+                """
+                MATCH (n:base)
+                CALL { WITH n SET n.degree = count { (n)--() } }
+                IN TRANSACTIONS OF 1000 ROWS
+                """
+            )
+            await result.consume()
+            result = await session.run("MATCH (n:base) RETURN count(n) AS nodes")
+            record = await result.single()
+            await result.consume()
+        logger.info(f"Recomputed the degree of {record['nodes']} nodes")
+        return record["nodes"]
+
     async def drop(self) -> dict[str, str]:
         """Drop all data from storage and clean up resources
 
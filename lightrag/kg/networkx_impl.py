@@ -16,7 +16,7 @@ if not pm.is_installed("graspologic"):
 
 import networkx as nx
 from .shared_storage import (
-    get_storage_lock,
+    get_namespace_storage_lock,
     get_update_flag,
     set_all_update_flags,
 )
@@ -70,10 +70,14 @@ class NetworkXStorage(BaseGraphStorage):
         # Get the update flag for cross-process update notification
         self.storage_updated = await get_update_flag(self.namespace)
         # Get the storage lock for use in other methods
-        self._storage_lock = get_storage_lock()
+        self._storage_lock = await get_namespace_storage_lock(self.namespace)
 
     async def _get_graph(self):
         """Check if the storage should be reloaded"""
+        # Fast path: no reload pending, serve the current snapshot without locking
+        if not self.storage_updated.value:
+            return self._graph
+
         # Acquire lock to prevent concurrent read and write
         async with self._storage_lock:
             # Check if data needs to be reloaded
@@ -104,11 +108,11 @@ class NetworkXStorage(BaseGraphStorage):
 
     async def node_degree(self, node_id: str) -> int:
         graph = await self._get_graph()
-        return graph.degree(node_id)
+        # degree() of a node that is not in the graph is a DegreeView, not 0
+        return graph.degree(node_id) if graph.has_node(node_id) else 0
 
     async def edge_degree(self, src_id: str, tgt_id: str) -> int:
-        graph = await self._get_graph()
-        return graph.degree(src_id) + graph.degree(tgt_id)
+        return await self.node_degree(src_id) + await self.node_degree(tgt_id)
 
     async def get_edge(
         self, source_node_id: str, target_node_id: str
@@ -1,10 +1,11 @@
 import asyncio
 import json
 import os
+import struct
 import datetime
 from datetime import timezone
 from dataclasses import dataclass, field
-from typing import Any, Union, final
+from typing import Any, AsyncIterator, Union, final
 import numpy as np
 import configparser
 from ..prompt import PROMPTS, GRAPH_FIELD_SEP
@@ -29,6 +30,7 @@ from ..base import (
 )
 from ..namespace import NameSpace, is_namespace
 from ..utils import logger
+from ..constants import DEFAULT_KV_ITER_BATCH_SIZE
 
 import pipmaster as pm
 
@@ -48,6 +50,30 @@ load_dotenv(dotenv_path=".env", override=False)
 # Get maximum number of graph nodes from environment variable, default is 1000
 MAX_GRAPH_NODES = int(os.getenv("MAX_GRAPH_NODES", 1000))
 
+# pgvector operator classes supported for ANN indexes: ops class -> (distance operator, similarity expression)
+# vector_ip_ops matches cosine similarity only for normalized embeddings
+VECTOR_INDEX_OPS = {
+    "vector_cosine_ops": ("<=>", "1 - ({distance})"),
+    "vector_ip_ops": ("<#>", "-({distance})"),
+}
+VECTOR_INDEX_TYPES = ("none", "hnsw", "ivfflat")
+# Tables holding a content_vector column
+VECTOR_TABLES = ("LIGHTRAG_DOC_CHUNKS", "LIGHTRAG_VDB_ENTITY", "LIGHTRAG_VDB_RELATION")
+
+
+def _encode_vector(value: Any) -> bytes:
+    """Encode a vector into pgvector's binary format: dim(int16), unused(int16), float32[dim]"""
+    if isinstance(value, str):
+        value = json.loads(value)
+    vector = np.asarray(value, dtype=">f4").ravel()
+    return struct.pack(">HH", vector.shape[0], 0) + vector.tobytes()
+
+
+def _decode_vector(data: bytes) -> list[float]:
+    """Decode pgvector's binary format into a list of floats"""
+    dim, _ = struct.unpack_from(">HH", data)
+    return np.frombuffer(data, dtype=">f4", count=dim, offset=4).tolist()
+
 
 class PostgreSQLDB:
     def __init__(self, config: dict[str, Any], **kwargs: Any):
@@ -61,8 +87,25 @@ class PostgreSQLDB:
         self.increment = 1
         self.pool: Pool | None = None
 
+        # ANN index settings for content_vector columns
+        self.vector_index_type = str(config.get("vector_index_type", "none")).lower()
+        self.vector_index_ops = config.get("vector_index_ops", "vector_cosine_ops")
+        self.hnsw_m = int(config.get("hnsw_m", 16))
+        self.hnsw_ef_construction = int(config.get("hnsw_ef_construction", 64))
+        self.hnsw_ef_search = int(config.get("hnsw_ef_search", 40))
+        self.ivfflat_lists = int(config.get("ivfflat_lists", 100))
+        self.ivfflat_probes = int(config.get("ivfflat_probes", 1))
+
         if self.user is None or self.password is None or self.database is None:
             raise ValueError("Missing database user, password, or database")
+        if self.vector_index_type not in VECTOR_INDEX_TYPES:
+            raise ValueError(
+                f"Unsupported vector index type {self.vector_index_type}, choose from: {VECTOR_INDEX_TYPES}"
+            )
+        if self.vector_index_ops not in VECTOR_INDEX_OPS:
+            raise ValueError(
+                f"Unsupported vector index ops {self.vector_index_ops}, choose from: {list(VECTOR_INDEX_OPS)}"
+            )
 
     async def initdb(self):
         try:
@@ -74,6 +117,7 @@ class PostgreSQLDB:
                 port=self.port,
                 min_size=1,
                 max_size=self.max,
+                init=self._init_connection,
             )
 
             logger.info(
@@ -85,6 +129,23 @@ class PostgreSQLDB:
             )
             raise
 
+    @staticmethod
+    async def _init_connection(connection: asyncpg.Connection) -> None:
+        """Pass pgvector values in binary format instead of formatting them as text"""
+        schema = await connection.fetchval(
+            "SELECT n.nspname FROM pg_type t JOIN pg_namespace n ON n.oid = t.typnamespace WHERE t.typname = 'vector'"
+        )
+        if schema is None:
+            # pgvector extension is not installed in this database
+            return
+        await connection.set_type_codec(
+            "vector",
+            schema=schema,
+            encoder=_encode_vector,
+            decoder=_decode_vector,
+            format="binary",
+        )
+
     @staticmethod
     async def configure_age(connection: asyncpg.Connection, graph_name: str) -> None:
         """Set the Apache AGE environment and creates a graph if it does not exist.
@@ -198,6 +259,17 @@ class PostgreSQLDB:
                     f"PostgreSQL, Failed to create index on table {k}, Got: {e}"
                 )
 
+        # Chunk extraction tables created before records listed their documents
+        try:
+            await self.execute(
+                "ALTER TABLE LIGHTRAG_CHUNK_EXTRACTIONS "
+                "ADD COLUMN IF NOT EXISTS full_doc_ids JSONB"
+            )
+        except Exception as e:
+            logger.warning(
+                f"Failed to add LIGHTRAG_CHUNK_EXTRACTIONS.full_doc_ids: {e}"
+            )
+
         # After all tables are created, attempt to migrate timestamp fields
         try:
             await self._migrate_timestamp_columns()
@@ -205,6 +277,63 @@ class PostgreSQLDB:
             logger.error(f"PostgreSQL, Failed to migrate timestamp columns: {e}")
             # Don't throw an exception, allow the initialization process to continue
 
+    async def check_vector_index(self, table_name: str, embedding_dim: int):
+        """Create the configured ANN index on the content_vector column of a table
+
+        The column is declared as VECTOR without dimension, so the index is built on
+        an expression cast to the embedding dimension. Queries must order by the same
+        expression (see vector_column) for the planner to use the index.
+        """
+        if self.vector_index_type == "none":
+            return
+
+        ops = self.vector_index_ops.removeprefix("vector_").removesuffix("_ops")
+        index_name = (
+            f"idx_{table_name.lower()}_{self.vector_index_type}_{ops}_{embedding_dim}"
+        )
+        if self.vector_index_type == "hnsw":
+            with_clause = (
+                f"WITH (m = {self.hnsw_m}, ef_construction = {self.hnsw_ef_construction})"
+            )
+        else:
+            with_clause = f"WITH (lists = {self.ivfflat_lists})"
+
+        try:
+            check_index_sql = f"""
+            SELECT 1 FROM pg_indexes
+            WHERE indexname = '{index_name}'
+            AND tablename = '{table_name.lower()}'
+            """
+            index_exists = await self.query(check_index_sql)
+
+            if not index_exists:
+                create_index_sql = f"""CREATE INDEX {index_name} ON {table_name}
+                    USING {self.vector_index_type} ({self.vector_column(embedding_dim)} {self.vector_index_ops})
+                    {with_clause}"""
+                logger.info(
+                    f"PostgreSQL, Creating {self.vector_index_type} index {index_name} on table {table_name}"
+                )
+                await self.execute(create_index_sql)
+        except Exception as e:
+            logger.error(
+                f"PostgreSQL, Failed to create vector index on table {table_name}, Got: {e}"
+            )
+
+    def vector_column(self, embedding_dim: int, alias: str = "") -> str:
+        """content_vector expression matching the ANN index definition"""
+        column = f"{alias}.content_vector" if alias else "content_vector"
+        if self.vector_index_type == "none":
+            return column
+        return f"({column}::vector({embedding_dim}))"
+
+    def vector_search_settings(self) -> dict[str, int]:
+        """Per-query planner settings for the configured ANN index"""
+        if self.vector_index_type == "hnsw":
+            return {"hnsw.ef_search": self.hnsw_ef_search}
+        if self.vector_index_type == "ivfflat":
+            return {"ivfflat.probes": self.ivfflat_probes}
+        return {}
+
     async def query(
         self,
         sql: str,
@@ -212,7 +341,9 @@ class PostgreSQLDB:
         multirows: bool = False,
         with_age: bool = False,
         graph_name: str | None = None,
+        settings: dict[str, int] | None = None,
     ) -> dict[str, Any] | None | list[dict[str, Any]]:
+        """Run a query, settings are applied with SET LOCAL for this query only (e.g. {"hnsw.ef_search": 100})"""
         # start_time = time.time()
         # logger.info(f"PostgreSQL, Querying:\n{sql}")
 
@@ -223,7 +354,13 @@ class PostgreSQLDB:
                 raise ValueError("Graph name is required when with_age is True")
 
             try:
-                if params:
+                if settings:
+                    # SET LOCAL only lasts until the end of the transaction
+                    async with connection.transaction():
+                        for name, value in settings.items():
+                            await connection.execute(f"SET LOCAL {name} = {int(value)}")
+                        rows = await connection.fetch(sql, *(params or {}).values())
+                elif params:
                     rows = await connection.fetch(sql, *params.values())
                 else:
                     rows = await connection.fetch(sql)
@@ -250,6 +387,30 @@ class PostgreSQLDB:
                 logger.error(f"PostgreSQL database, error:{e}")
                 raise
 
+    async def iter_query(
+        self,
+        sql: str,
+        params: dict[str, Any] | None = None,
+        batch_size: int = DEFAULT_KV_ITER_BATCH_SIZE,
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        """Stream the rows of a query in lists of at most batch_size rows
+
+        Uses a server-side cursor inside a read transaction, so only one batch is held
+        in memory. The connection stays checked out until the iteration finishes.
+        """
+        async with self.pool.acquire() as connection:  # type: ignore
+            try:
+                async with connection.transaction(readonly=True):
+                    cursor = await connection.cursor(sql, *(params or {}).values())
+                    while True:
+                        rows = await cursor.fetch(batch_size)
+                        if not rows:
+                            break
+                        yield [dict(row) for row in rows]
+            except Exception as e:
+                logger.error(f"PostgreSQL database, error:{e}")
+                raise
+
     async def execute(
         self,
         sql: str,
@@ -281,6 +442,56 @@ class PostgreSQLDB:
             logger.error(f"PostgreSQL database,\nsql:{sql},\ndata:{data},\nerror:{e}")
             raise
 
+    async def execute_in_transaction(
+        self,
+        sqls: list[str],
+        with_age: bool = False,
+        graph_name: str | None = None,
+    ):
+        """Execute several statements on one connection in a single transaction.
+
+        Either all statements are committed or none is.
+        """
+        try:
+            async with self.pool.acquire() as connection:  # type: ignore
+                if with_age and graph_name:
+                    # before the transaction: configure_age ignores a failed
+                    # create_graph, which would abort the transaction
+                    await self.configure_age(connection, graph_name)  # type: ignore
+                elif with_age and not graph_name:
+                    raise ValueError("Graph name is required when with_age is True")
+
+                async with connection.transaction():
+                    for sql in sqls:
+                        await connection.execute(sql)  # type: ignore
+        except Exception as e:
+            logger.error(f"PostgreSQL database,\nsql:{sqls},\nerror:{e}")
+            raise
+
+    async def executemany(
+        self,
+        sql: str,
+        data: list[dict[str, Any]],
+    ):
+        """Execute one statement for many rows in a single transaction.
+
+        The rows are passed to asyncpg's executemany on one connection. Every dict
+        in data must have its keys in placeholder order.
+        """
+        if not data:
+            return
+        try:
+            async with self.pool.acquire() as connection:  # type: ignore
+                async with connection.transaction():
+                    await connection.executemany(
+                        sql, [tuple(row.values()) for row in data]
+                    )
+        except Exception as e:
+            logger.error(
+                f"PostgreSQL database,\nsql:{sql},\nrows:{len(data)},\nerror:{e}"
+            )
+            raise
+
 
 class ClientManager:
     _instances: dict[str, Any] = {"db": None, "ref_count": 0}
@@ -318,6 +529,33 @@ class ClientManager:
                 "POSTGRES_MAX_CONNECTIONS",
                 config.get("postgres", "max_connections", fallback=12),
             ),
+            "vector_index_type": os.environ.get(
+                "POSTGRES_VECTOR_INDEX_TYPE",
+                config.get("postgres", "vector_index_type", fallback="none"),
+            ),
+            "vector_index_ops": os.environ.get(
+                "POSTGRES_VECTOR_INDEX_OPS",
+                config.get("postgres", "vector_index_ops", fallback="vector_cosine_ops"),
+            ),
+            "hnsw_m": os.environ.get(
+                "POSTGRES_HNSW_M", config.get("postgres", "hnsw_m", fallback=16)
+            ),
+            "hnsw_ef_construction": os.environ.get(
+                "POSTGRES_HNSW_EF_CONSTRUCTION",
+                config.get("postgres", "hnsw_ef_construction", fallback=64),
+            ),
+            "hnsw_ef_search": os.environ.get(
+                "POSTGRES_HNSW_EF_SEARCH",
+                config.get("postgres", "hnsw_ef_search", fallback=40),
+            ),
+            "ivfflat_lists": os.environ.get(
+                "POSTGRES_IVFFLAT_LISTS",
+                config.get("postgres", "ivfflat_lists", fallback=100),
+            ),
+            "ivfflat_probes": os.environ.get(
+                "POSTGRES_IVFFLAT_PROBES",
+                config.get("postgres", "ivfflat_probes", fallback=1),
+            ),
         }
 
     @classmethod
@@ -364,6 +602,14 @@ class PGKVStorage(BaseKVStorage):
             await ClientManager.release_client(self.db)
             self.db = None
 
+    def _decode_row(self, row: dict[str, Any] | None) -> dict[str, Any] | None:
+        """Decode the JSONB columns of chunk extraction rows (returned as text)"""
+        if row and is_namespace(self.namespace, NameSpace.KV_STORE_CHUNK_EXTRACTIONS):
+            for field in ("entities", "relations", "full_doc_ids"):
+                if isinstance(row.get(field), str):
+                    row[field] = json.loads(row[field])
+        return row
+
     ################ QUERY METHODS ################
     async def get_all(self) -> dict[str, Any]:
         """Get all data from storage
@@ -391,11 +637,35 @@ class PGKVStorage(BaseKVStorage):
                     result_dict[mode][row["id"]] = row
                 return result_dict
             else:
-                return {row["id"]: row for row in results}
+                return {row["id"]: self._decode_row(row) for row in results}
         except Exception as e:
             logger.error(f"Error retrieving all data from {self.namespace}: {e}")
             return {}
 
+    async def get_all_iter(
+        self, prefix: str = "", batch_size: int = DEFAULT_KV_ITER_BATCH_SIZE
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Stream records whose id starts with prefix through a server-side cursor
+
+        Yields dicts of at most batch_size records, shaped like get_all(). For the
+        LLM cache, prefix matches the mode.
+        """
+        sql = SQL_TEMPLATES.get("get_all_iter_" + self.namespace)
+        if sql is None:
+            logger.error(f"Unknown namespace for get_all_iter: {self.namespace}")
+            return
+
+        params = {"workspace": self.db.workspace, "prefix": prefix}
+        is_cache = is_namespace(self.namespace, NameSpace.KV_STORE_LLM_RESPONSE_CACHE)
+        async for rows in self.db.iter_query(sql, params, batch_size=batch_size):
+            if is_cache:
+                batch: dict[str, Any] = {}
+                for row in rows:
+                    batch.setdefault(row["mode"], {})[row["id"]] = row
+                yield batch
+            else:
+                yield {row["id"]: self._decode_row(row) for row in rows}
+
     async def get_by_id(self, id: str) -> dict[str, Any] | None:
         """Get doc_full data by id."""
         sql = SQL_TEMPLATES["get_by_id_" + self.namespace]
@@ -408,7 +678,7 @@ class PGKVStorage(BaseKVStorage):
             return res if res else None
         else:
             response = await self.db.query(sql, params)
-            return response if response else None
+            return self._decode_row(response) if response else None
 
     async def get_by_mode_and_id(self, mode: str, id: str) -> Union[dict, None]:
         """Specifically for llm_response_cache."""
@@ -443,7 +713,8 @@ class PGKVStorage(BaseKVStorage):
                 dict_res[row["mode"]][row["id"]] = row
             return [{k: v} for k, v in dict_res.items()]
         else:
-            return await self.db.query(sql, params, multirows=True)
+            rows = await self.db.query(sql, params, multirows=True)
+            return [self._decode_row(row) for row in rows] if rows else rows
 
     async def get_by_status(self, status: str) -> Union[list[dict[str, Any]], None]:
         """Specifically for llm_response_cache."""
@@ -481,27 +752,45 @@ class PGKVStorage(BaseKVStorage):
         if is_namespace(self.namespace, NameSpace.KV_STORE_TEXT_CHUNKS):
             pass
         elif is_namespace(self.namespace, NameSpace.KV_STORE_FULL_DOCS):
-            for k, v in data.items():
-                upsert_sql = SQL_TEMPLATES["upsert_doc_full"]
-                _data = {
+            upsert_sql = SQL_TEMPLATES["upsert_doc_full"]
+            rows = [
+                {
                     "id": k,
                     "content": v["content"],
                     "workspace": self.db.workspace,
                 }
-                await self.db.execute(upsert_sql, _data)
+                for k, v in data.items()
+            ]
+            await self.db.executemany(upsert_sql, rows)
+        elif is_namespace(self.namespace, NameSpace.KV_STORE_CHUNK_EXTRACTIONS):
+            upsert_sql = SQL_TEMPLATES["upsert_chunk_extraction"]
+            rows = [
+                {
+                    "workspace": self.db.workspace,
+                    "id": k,
+                    "full_doc_id": v.get("full_doc_id", ""),
+                    "full_doc_ids": json.dumps(v.get("full_doc_ids", [])),
+                    "file_path": v.get("file_path"),
+                    "entities": json.dumps(v["entities"], ensure_ascii=False),
+                    "relations": json.dumps(v["relations"], ensure_ascii=False),
+                }
+                for k, v in data.items()
+            ]
+            await self.db.executemany(upsert_sql, rows)
         elif is_namespace(self.namespace, NameSpace.KV_STORE_LLM_RESPONSE_CACHE):
-            for mode, items in data.items():
-                for k, v in items.items():
-                    upsert_sql = SQL_TEMPLATES["upsert_llm_response_cache"]
-                    _data = {
-                        "workspace": self.db.workspace,
-                        "id": k,
-                        "original_prompt": v["original_prompt"],
-                        "return_value": v["return"],
-                        "mode": mode,
-                    }
-
-                    await self.db.execute(upsert_sql, _data)
+            upsert_sql = SQL_TEMPLATES["upsert_llm_response_cache"]
+            rows = [
+                {
+                    "workspace": self.db.workspace,
+                    "id": k,
+                    "original_prompt": v["original_prompt"],
+                    "return_value": v["return"],
+                    "mode": mode,
+                }
+                for mode, items in data.items()
+                for k, v in items.items()
+            ]
+            await self.db.executemany(upsert_sql, rows)
 
     async def index_done_callback(self) -> None:
         # PG handles persistence automatically
@@ -569,6 +858,16 @@ class PGKVStorage(BaseKVStorage):
             logger.error(f"Error deleting cache by modes {modes}: {e}")
             return False
 
+    async def drop_cache_entries(self, entries: dict[str, list[str]]) -> None:
+        if namespace_to_table_name(self.namespace) != "LIGHTRAG_LLM_CACHE":
+            return
+        sql = """DELETE FROM LIGHTRAG_LLM_CACHE
+                 WHERE workspace = $1 AND mode = $2 AND id = ANY($3)"""
+        for mode, cache_ids in entries.items():
+            await self.db.execute(
+                sql, {"workspace": self.db.workspace, "mode": mode, "ids": cache_ids}
+            )
+
     async def drop(self) -> dict[str, str]:
         """Drop the storage"""
         try:
@@ -616,6 +915,11 @@ class PGVectorStorage(BaseVectorStorage):
     async def initialize(self):
         if self.db is None:
             self.db = await ClientManager.get_client()
+        table_name = namespace_to_table_name(self.namespace)
+        if table_name in VECTOR_TABLES:
+            await self.db.check_vector_index(
+                table_name, self.embedding_func.embedding_dim
+            )
 
     async def finalize(self):
         if self.db is not None:
@@ -634,7 +938,7 @@ class PGVectorStorage(BaseVectorStorage):
                 "chunk_order_index": item["chunk_order_index"],
                 "full_doc_id": item["full_doc_id"],
                 "content": item["content"],
-                "content_vector": json.dumps(item["__vector__"].tolist()),
+                "content_vector": item["__vector__"],
                 "file_path": item["file_path"],
                 "create_time": current_time,
                 "update_time": current_time,
@@ -660,7 +964,7 @@ class PGVectorStorage(BaseVectorStorage):
             "id": item["__id__"],
             "entity_name": item["entity_name"],
             "content": item["content"],
-            "content_vector": json.dumps(item["__vector__"].tolist()),
+            "content_vector": item["__vector__"],
             "chunk_ids": chunk_ids,
             "file_path": item.get("file_path", None),
             "create_time": current_time,
@@ -684,7 +988,7 @@ class PGVectorStorage(BaseVectorStorage):
             "source_id": item["src_id"],
             "target_id": item["tgt_id"],
             "content": item["content"],
-            "content_vector": json.dumps(item["__vector__"].tolist()),
+            "content_vector": item["__vector__"],
             "chunk_ids": chunk_ids,
             "file_path": item.get("file_path", None),
             "create_time": current_time,
@@ -730,6 +1034,8 @@ class PGVectorStorage(BaseVectorStorage):
                 for i, d in enumerate(list_data):
                     d["__vector__"] = embeddings[i]
 
+        # Rows sharing the same column set are written with one executemany
+        grouped_rows: dict[str, list[dict[str, Any]]] = {}
         for item in list_data:
             has_vector = "__vector__" in item
 
@@ -748,7 +1054,7 @@ class PGVectorStorage(BaseVectorStorage):
                 }
                 update_cols = ["tokens", "chunk_order_index", "full_doc_id", "content", "file_path", "update_time"]
                 if has_vector:
-                    base_data["content_vector"] = json.dumps(item["__vector__"].tolist())
+                    base_data["content_vector"] = item["__vector__"]
                     update_cols.append("content_vector")
 
             elif is_namespace(self.namespace, NameSpace.VECTOR_STORE_ENTITIES):
@@ -767,7 +1073,7 @@ class PGVectorStorage(BaseVectorStorage):
                 }
                 update_cols = ["entity_name", "content", "chunk_ids", "file_path", "update_time"]
                 if has_vector:
-                    base_data["content_vector"] = json.dumps(item["__vector__"].tolist())
+                    base_data["content_vector"] = item["__vector__"]
                     update_cols.append("content_vector")
 
             elif is_namespace(self.namespace, NameSpace.VECTOR_STORE_RELATIONSHIPS):
@@ -787,7 +1093,7 @@ class PGVectorStorage(BaseVectorStorage):
                 }
                 update_cols = ["source_id", "target_id", "content", "chunk_ids", "file_path", "update_time"]
                 if has_vector:
-                    base_data["content_vector"] = json.dumps(item["__vector__"].tolist())
+                    base_data["content_vector"] = item["__vector__"]
                     update_cols.append("content_vector")
             else:
                 raise ValueError(f"{self.namespace} is not supported")
@@ -802,7 +1108,10 @@ VALUES ({placeholders})
 ON CONFLICT (id, workspace) DO UPDATE SET
 {update_placeholders}
 '''
-            await self.db.execute(upsert_sql, base_data)
+            grouped_rows.setdefault(upsert_sql, []).append(base_data)
+
+        for upsert_sql, rows in grouped_rows.items():
+            await self.db.executemany(upsert_sql, rows)
 
     #################### query method ###############
     async def query(
@@ -816,18 +1125,49 @@ ON CONFLICT (id, workspace) DO UPDATE SET
             [query], _priority=5
         )  # higher priority for query
         embedding = embeddings[0]
-        embedding_string = ",".join(map(str, embedding))
-        # Use parameterized document IDs (None means search across all documents)
-        sql = SQL_TEMPLATES[self.namespace].format(embedding_string=embedding_string)
-        params = {
-            "workspace": self.db.workspace,
-            "doc_ids": ids,
-            "better_than_threshold": better_than_threshold
+
+        operator, similarity = VECTOR_INDEX_OPS[self.db.vector_index_ops]
+        dim = self.embedding_func.embedding_dim
+        threshold = (
+            better_than_threshold
             if better_than_threshold is not None
-            else self.cosine_better_than_threshold,
-            "top_k": top_k,
-        }
-        results = await self.db.query(sql, params=params, multirows=True)
+            else self.cosine_better_than_threshold
+        )
+        # The embedding is passed as a binary query parameter
+        if ids is None:
+            # Plain ORDER BY distance LIMIT k so that the ANN index can be used
+            sql = SQL_TEMPLATES[f"{self.namespace}_ann"].format(
+                distance=f"{self.db.vector_column(dim)} {operator} $2",
+                similarity=similarity.format(
+                    distance=f"{self.db.vector_column(dim)} {operator} $2"
+                ),
+            )
+            params = {
+                "workspace": self.db.workspace,
+                "embedding": embedding,
+                "better_than_threshold": threshold,
+                "top_k": top_k,
+            }
+        else:
+            # Use parameterized document IDs
+            sql = SQL_TEMPLATES[self.namespace].format(
+                similarity=similarity.format(
+                    distance=f"{self.db.vector_column(dim, alias='v')} {operator} $5"
+                ),
+            )
+            params = {
+                "workspace": self.db.workspace,
+                "doc_ids": ids,
+                "better_than_threshold": threshold,
+                "top_k": top_k,
+                "embedding": embedding,
+            }
+        results = await self.db.query(
+            sql,
+            params=params,
+            multirows=True,
+            settings=self.db.vector_search_settings(),
+        )
         return results
 
     async def index_done_callback(self) -> None:
@@ -1032,13 +1372,16 @@ ON CONFLICT (id, workspace) DO UPDATE SET
         embeddings = np.concatenate(embeddings_list)
 
         for index, id in enumerate(id_list):
-             vector_array = embeddings[index]
-             entity_to_updates[id]["content_vector"] = json.dumps(vector_array.tolist())
-
-
-        for id, row in entity_to_updates.items():
-            update_sql = f"UPDATE {table_name} SET file_path=$1, content=$2, content_vector=$3 WHERE id=$4"
-            await self.db.execute(update_sql, {"file_path":row["file_path"], "content":row["content"], "content_vector": row["content_vector"], "id": id})
+             entity_to_updates[id]["content_vector"] = embeddings[index]
+
+        update_sql = f"UPDATE {table_name} SET file_path=$1, content=$2, content_vector=$3 WHERE id=$4"
+        await self.db.executemany(
+            update_sql,
+            [
+                {"file_path": row["file_path"], "content": row["content"], "content_vector": row["content_vector"], "id": id}
+                for id, row in entity_to_updates.items()
+            ],
+        )
 
         logger.info(f"Update entity records successfully: {len(entity_to_updates)}")
 
@@ -1709,6 +2052,21 @@ class PGGraphStorage(BaseGraphStorage):
 
         return result
 
+    async def _execute_in_transaction(self, queries: list[str]) -> None:
+        """Run write cypher queries in one transaction"""
+        try:
+            await self.db.execute_in_transaction(
+                queries, with_age=True, graph_name=self.graph_name
+            )
+        except Exception as e:
+            raise PGGraphQueryException(
+                {
+                    "message": f"Error executing graph queries: {queries}",
+                    "wrapped": queries,
+                    "detail": str(e),
+                }
+            ) from e
+
     async def has_node(self, node_id: str) -> bool:
         entity_name_label = self._normalize_node_id(node_id)
 
@@ -1763,7 +2121,16 @@ class PGGraphStorage(BaseGraphStorage):
             return node_dict
         return None
 
+    @property
+    def materialized_degree(self) -> bool:
+        return bool(self.global_config.get("enable_materialized_degree", False))
+
     async def node_degree(self, node_id: str) -> int:
+        if self.materialized_degree:
+            node = await self.get_node(node_id)
+            if node is not None and node.get("degree") is not None:
+                return int(node["degree"])
+
         label = self._normalize_node_id(node_id)
 
         query = """SELECT * FROM cypher('%s', $$
@@ -1865,17 +2232,34 @@ class PGGraphStorage(BaseGraphStorage):
             )
 
         label = self._normalize_node_id(node_id)
-        properties = self._format_properties(node_data)
 
-        query = """SELECT * FROM cypher('%s', $$
-                     MERGE (n:base {entity_id: "%s"})
-                     SET n += %s
-                     RETURN n
-                   $$) AS (n agtype)""" % (
-            self.graph_name,
-            label,
-            properties,
-        )
+        if self.materialized_degree:
+            # the degree is owned by the edge and node write methods,
+            # a created node starts at 0
+            node_data = {k: v for k, v in node_data.items() if k != "degree"}
+            query = """SELECT * FROM cypher('%s', $$
+                         OPTIONAL MATCH (existing:base {entity_id: "%s"})
+                         WITH count(existing) AS found
+                         MERGE (n:base {entity_id: "%s"})
+                         SET n += %s
+                         SET n.degree = CASE WHEN found = 0 THEN 0 ELSE n.degree END
+                         RETURN n
+                       $$) AS (n agtype)""" % (
+                self.graph_name,
+                label,
+                label,
+                self._format_properties(node_data),
+            )
+        else:
+            query = """SELECT * FROM cypher('%s', $$
+                         MERGE (n:base {entity_id: "%s"})
+                         SET n += %s
+                         RETURN n
+                       $$) AS (n agtype)""" % (
+                self.graph_name,
+                label,
+                self._format_properties(node_data),
+            )
 
         try:
             await self._query(query, readonly=False, upsert=True)
@@ -1904,11 +2288,25 @@ class PGGraphStorage(BaseGraphStorage):
         tgt_label = self._normalize_node_id(target_node_id)
         edge_properties = self._format_properties(edge_data)
 
+        # a created relation adds 1 to the degree of both nodes (2 for a self
+        # loop, as counted); null degrees stay null until recomputed
+        degree_update = (
+            """OPTIONAL MATCH (source)-[existing:DIRECTED]-(target)
+                     WITH source, target, count(existing) AS found
+                     MERGE (source)-[r:DIRECTED]-(target)
+                     SET source.degree = CASE WHEN found = 0
+                         THEN source.degree + 1 ELSE source.degree END
+                     SET target.degree = CASE WHEN found = 0
+                         THEN target.degree + 1 ELSE target.degree END"""
+            if self.materialized_degree
+            else "MERGE (source)-[r:DIRECTED]-(target)"
+        )
+
         query = """SELECT * FROM cypher('%s', $$
                      MATCH (source:base {entity_id: "%s"})
                      WITH source
                      MATCH (target:base {entity_id: "%s"})
-                     MERGE (source)-[r:DIRECTED]-(target)
+                     %s
                      SET r += %s
                      SET r += %s
                      RETURN r
@@ -1916,6 +2314,7 @@ class PGGraphStorage(BaseGraphStorage):
             self.graph_name,
             src_label,
             tgt_label,
+            degree_update,
             edge_properties,
             edge_properties,  # https://github.com/HKUDS/LightRAG/issues/1438#issuecomment-2826000195
         )
@@ -1944,7 +2343,9 @@ class PGGraphStorage(BaseGraphStorage):
                    $$) AS (n agtype)""" % (self.graph_name, label)
 
         try:
-            await self._query(query, readonly=False)
+            await self._delete_with_degrees(
+                self._release_neighbor_degrees_query(f'["{label}"]'), query
+            )
         except Exception as e:
             logger.error("Error during node deletion: {%s}", e)
             raise
@@ -1966,7 +2367,9 @@ class PGGraphStorage(BaseGraphStorage):
                    $$) AS (n agtype)""" % (self.graph_name, node_id_list)
 
         try:
-            await self._query(query, readonly=False)
+            await self._delete_with_degrees(
+                self._release_neighbor_degrees_query(f"[{node_id_list}]"), query
+            )
         except Exception as e:
             logger.error("Error during node removal: {%s}", e)
             raise
@@ -1987,13 +2390,60 @@ class PGGraphStorage(BaseGraphStorage):
                          DELETE r
                        $$) AS (r agtype)""" % (self.graph_name, src_label, tgt_label)
 
+            degree_query = None
+            if self.materialized_degree:
+                degree_query = """SELECT * FROM cypher('%s', $$
+                         MATCH (a:base {entity_id: "%s"})-[r]-(b:base {entity_id: "%s"})
+                         WITH a, b, count(r) AS removed
+                         SET a.degree = a.degree - removed
+                         SET b.degree = b.degree - removed
+                       $$) AS (a agtype)""" % (self.graph_name, src_label, tgt_label)
+
             try:
-                await self._query(query, readonly=False)
+                await self._delete_with_degrees(degree_query, query)
                 logger.debug(f"Deleted edge from '{source}' to '{target}'")
             except Exception as e:
                 logger.error(f"Error during edge deletion: {str(e)}")
                 raise
 
+    def _release_neighbor_degrees_query(self, node_id_list: str) -> str | None:
+        """Query taking the relations of the nodes to delete off their neighbours"""
+        if not self.materialized_degree:
+            return None
+        return """SELECT * FROM cypher('%s', $$
+                     MATCH (n:base)-[r]-(m:base)
+                     WHERE n.entity_id IN %s AND NOT m.entity_id IN %s
+                     WITH m, count(r) AS removed
+                     SET m.degree = m.degree - removed
+                   $$) AS (m agtype)""" % (self.graph_name, node_id_list, node_id_list)
+
+    async def _delete_with_degrees(
+        self, degree_query: str | None, delete_query: str
+    ) -> None:
+        """Run a delete, and the matching degree update in the same transaction
+
+        Committed separately, a failed or retried delete would leave the stored
+        degrees decremented for relations that still exist.
+        """
+        if degree_query is None:
+            await self._query(delete_query, readonly=False)
+        else:
+            await self._execute_in_transaction([degree_query, delete_query])
+
+    async def recompute_degrees(self) -> int:
+        """Recompute the stored degree of every node from its relations"""
+        query = """SELECT * FROM cypher('%s', $$
+                     MATCH (n:base)
+                     OPTIONAL MATCH (n)-[r]-()
+                     WITH n, count(r) AS degree
+                     SET n.degree = degree
+                     RETURN count(n) AS nodes
+                   $$) AS (nodes bigint)""" % self.graph_name
+        result = await self._query(query, readonly=False)
+        nodes = int(result[0]["nodes"]) if result else 0
+        logger.info(f"Recomputed the degree of {nodes} nodes")
+        return nodes
+
     async def get_nodes_batch(self, node_ids: list[str]) -> dict[str, dict]:
         """
         Retrieve multiple nodes in one query using UNWIND.
@@ -2047,6 +2497,34 @@ class PGGraphStorage(BaseGraphStorage):
         return nodes_dict
 
     async def node_degrees_batch(self, node_ids: list[str]) -> dict[str, int]:
+        if not node_ids or not self.materialized_degree:
+            return await self._count_node_degrees_batch(node_ids)
+
+        formatted_ids = ", ".join(
+            ['"' + self._normalize_node_id(node_id) + '"' for node_id in node_ids]
+        )
+        query = """SELECT * FROM cypher('%s', $$
+                     UNWIND [%s] AS node_id
+                     MATCH (n:base {entity_id: node_id})
+                     RETURN node_id, n.degree AS degree
+                   $$) AS (node_id text, degree integer)""" % (
+            self.graph_name,
+            formatted_ids,
+        )
+        stored = {
+            result["node_id"]: int(result["degree"])
+            for result in await self._query(query)
+            if result["node_id"] is not None and result["degree"] is not None
+        }
+        # relations are only counted for the nodes without a stored degree
+        unknown = [node_id for node_id in node_ids if node_id not in stored]
+        counted = await self._count_node_degrees_batch(unknown) if unknown else {}
+        return {
+            node_id: stored[node_id] if node_id in stored else counted[node_id]
+            for node_id in node_ids
+        }
+
+    async def _count_node_degrees_batch(self, node_ids: list[str]) -> dict[str, int]:
         """
         Retrieve the degree for multiple nodes in a single query using UNWIND.
         Calculates the total degree by counting distinct relationships.
@@ -2658,6 +3136,7 @@ NAMESPACE_TABLE_MAP = {
     NameSpace.VECTOR_STORE_RELATIONSHIPS: "LIGHTRAG_VDB_RELATION",
     NameSpace.DOC_STATUS: "LIGHTRAG_DOC_STATUS",
     NameSpace.KV_STORE_LLM_RESPONSE_CACHE: "LIGHTRAG_LLM_CACHE",
+    NameSpace.KV_STORE_CHUNK_EXTRACTIONS: "LIGHTRAG_CHUNK_EXTRACTIONS",
 }
 
 
@@ -2680,6 +3159,20 @@ TABLES = {
 	                CONSTRAINT LIGHTRAG_DOC_FULL_PK PRIMARY KEY (workspace, id)
                     )"""
     },
+    "LIGHTRAG_CHUNK_EXTRACTIONS": {
+        "ddl": """CREATE TABLE LIGHTRAG_CHUNK_EXTRACTIONS (
+                    id VARCHAR(255),
+                    workspace VARCHAR(255),
+                    full_doc_id VARCHAR(256),
+                    full_doc_ids JSONB,
+                    file_path TEXT NULL,
+                    entities JSONB,
+                    relations JSONB,
+                    create_time TIMESTAMP(0) DEFAULT CURRENT_TIMESTAMP,
+                    update_time TIMESTAMP(0) DEFAULT CURRENT_TIMESTAMP,
+	                CONSTRAINT LIGHTRAG_CHUNK_EXTRACTIONS_PK PRIMARY KEY (workspace, id)
+                    )"""
+    },
     "LIGHTRAG_DOC_CHUNKS": {
         "ddl": """CREATE TABLE LIGHTRAG_DOC_CHUNKS (
                     id VARCHAR(255),
@@ -2779,6 +3272,40 @@ SQL_TEMPLATES = {
     "get_by_ids_llm_response_cache": """SELECT id, original_prompt, COALESCE(return_value, '') as "return", mode
                                  FROM LIGHTRAG_LLM_CACHE WHERE workspace=$1 AND mode= IN ({ids})
                                 """,
+    "get_all_iter_full_docs": """SELECT id, COALESCE(content, '') as content
+                                 FROM LIGHTRAG_DOC_FULL
+                                 WHERE workspace=$1 AND left(id, char_length($2)) = $2
+                            """,
+    "get_all_iter_text_chunks": """SELECT id, tokens, COALESCE(content, '') as content,
+                                  chunk_order_index, full_doc_id, file_path
+                                   FROM LIGHTRAG_DOC_CHUNKS
+                                   WHERE workspace=$1 AND left(id, char_length($2)) = $2
+                                """,
+    "get_all_iter_llm_response_cache": """SELECT id, original_prompt, COALESCE(return_value, '') as "return", mode
+                                 FROM LIGHTRAG_LLM_CACHE
+                                 WHERE workspace=$1 AND left(mode, char_length($2)) = $2
+                                """,
+    "get_by_id_chunk_extractions": """SELECT id, full_doc_id, full_doc_ids, file_path, entities, relations
+                                FROM LIGHTRAG_CHUNK_EXTRACTIONS WHERE workspace=$1 AND id=$2
+                            """,
+    "get_by_ids_chunk_extractions": """SELECT id, full_doc_id, full_doc_ids, file_path, entities, relations
+                                FROM LIGHTRAG_CHUNK_EXTRACTIONS WHERE workspace=$1 AND id IN ({ids})
+                            """,
+    "get_all_iter_chunk_extractions": """SELECT id, full_doc_id, full_doc_ids, file_path, entities, relations
+                                FROM LIGHTRAG_CHUNK_EXTRACTIONS
+                                WHERE workspace=$1 AND left(id, char_length($2)) = $2
+                            """,
+    "upsert_chunk_extraction": """INSERT INTO LIGHTRAG_CHUNK_EXTRACTIONS
+                        (workspace, id, full_doc_id, full_doc_ids, file_path, entities, relations)
+                        VALUES ($1, $2, $3, $4, $5, $6, $7)
+                        ON CONFLICT (workspace,id) DO UPDATE
+                           SET full_doc_id = EXCLUDED.full_doc_id,
+                           full_doc_ids = EXCLUDED.full_doc_ids,
+                           file_path = EXCLUDED.file_path,
+                           entities = EXCLUDED.entities,
+                           relations = EXCLUDED.relations,
+                           update_time = CURRENT_TIMESTAMP
+                       """,
     "filter_keys": "SELECT id FROM {table_name} WHERE workspace=$1 AND id IN ({ids})",
     "upsert_doc_full": """INSERT INTO LIGHTRAG_DOC_FULL (id, content, workspace)
                         VALUES ($1, $2, $3)
@@ -2838,10 +3365,10 @@ SQL_TEMPLATES = {
     )
     SELECT source_id as src_id, target_id as tgt_id, EXTRACT(EPOCH FROM create_time)::BIGINT as created_at
     FROM (
-        SELECT r.id, r.source_id, r.target_id, r.create_time, 1 - (r.content_vector <=> '[{embedding_string}]'::vector) as distance
-        FROM LIGHTRAG_VDB_RELATION r
-        JOIN relevant_chunks c ON c.chunk_id = ANY(r.chunk_ids)
-        WHERE r.workspace=$1
+        SELECT v.id, v.source_id, v.target_id, v.create_time, {similarity} as distance
+        FROM LIGHTRAG_VDB_RELATION v
+        JOIN relevant_chunks c ON c.chunk_id = ANY(v.chunk_ids)
+        WHERE v.workspace=$1
     ) AS filtered
     WHERE distance>$3
     ORDER BY distance DESC
@@ -2855,10 +3382,10 @@ SQL_TEMPLATES = {
         )
         SELECT entity_name, EXTRACT(EPOCH FROM create_time)::BIGINT as created_at FROM
             (
-                SELECT e.id, e.entity_name, e.create_time, 1 - (e.content_vector <=> '[{embedding_string}]'::vector) as distance
-                FROM LIGHTRAG_VDB_ENTITY e
-                JOIN relevant_chunks c ON c.chunk_id = ANY(e.chunk_ids)
-                WHERE e.workspace=$1
+                SELECT v.id, v.entity_name, v.create_time, {similarity} as distance
+                FROM LIGHTRAG_VDB_ENTITY v
+                JOIN relevant_chunks c ON c.chunk_id = ANY(v.chunk_ids)
+                WHERE v.workspace=$1
             ) as chunk_distances
             WHERE distance>$3
             ORDER BY distance DESC
@@ -2872,15 +3399,53 @@ SQL_TEMPLATES = {
         )
         SELECT id, content, file_path, EXTRACT(EPOCH FROM create_time)::BIGINT as created_at FROM
             (
-                SELECT id, content, file_path, create_time, 1 - (content_vector <=> '[{embedding_string}]'::vector) as distance
-                FROM LIGHTRAG_DOC_CHUNKS
-                WHERE workspace=$1
-                AND id IN (SELECT chunk_id FROM relevant_chunks)
+                SELECT v.id, v.content, v.file_path, v.create_time, {similarity} as distance
+                FROM LIGHTRAG_DOC_CHUNKS v
+                WHERE v.workspace=$1
+                AND v.id IN (SELECT chunk_id FROM relevant_chunks)
             ) as chunk_distances
             WHERE distance>$3
             ORDER BY distance DESC
             LIMIT $4
     """,
+    # ANN variants without document filter: the inner ORDER BY <distance> LIMIT k
+    # matches the pgvector index, the threshold is applied to the candidates only
+    "relationships_ann": """
+    SELECT source_id as src_id, target_id as tgt_id, EXTRACT(EPOCH FROM create_time)::BIGINT as created_at
+    FROM (
+        SELECT source_id, target_id, create_time, {similarity} as distance
+        FROM LIGHTRAG_VDB_RELATION
+        WHERE workspace=$1
+        ORDER BY {distance}
+        LIMIT $4
+    ) AS candidates
+    WHERE distance>$3
+    ORDER BY distance DESC
+    """,
+    "entities_ann": """
+    SELECT entity_name, EXTRACT(EPOCH FROM create_time)::BIGINT as created_at
+    FROM (
+        SELECT entity_name, create_time, {similarity} as distance
+        FROM LIGHTRAG_VDB_ENTITY
+        WHERE workspace=$1
+        ORDER BY {distance}
+        LIMIT $4
+    ) AS candidates
+    WHERE distance>$3
+    ORDER BY distance DESC
+    """,
+    "chunks_ann": """
+    SELECT id, content, file_path, EXTRACT(EPOCH FROM create_time)::BIGINT as created_at
+    FROM (
+        SELECT id, content, file_path, create_time, {similarity} as distance
+        FROM LIGHTRAG_DOC_CHUNKS
+        WHERE workspace=$1
+        ORDER BY {distance}
+        LIMIT $4
+    ) AS candidates
+    WHERE distance>$3
+    ORDER BY distance DESC
+    """,
     # DROP tables
     "drop_specifiy_table_workspace": """
         DELETE FROM {table_name} WHERE workspace=$1
@@ -16,6 +16,7 @@ if not pm.is_installed("redis"):
 from redis.asyncio import Redis, ConnectionPool  # type: ignore
 from redis.exceptions import RedisError, ConnectionError  # type: ignore
 from lightrag.utils import logger
+from lightrag.constants import DEFAULT_KV_ITER_BATCH_SIZE
 
 from lightrag.base import BaseKVStorage
 import json
@@ -187,25 +188,52 @@ class RedisKVStorage(BaseKVStorage):
         """Ensure Redis resources are cleaned up when exiting context."""
         await self.close()
 
-    async def get_all_iter(self, prefix: str = "", batch_size: int = 100) -> AsyncIterator[dict]:
-        """Yield all data from storage in batches, for a given prefix."""
-        logger.info(f"Streaming all data in text chunks from {self.namespace} with prefix '{prefix}'")
+    async def get_all_iter(
+        self, prefix: str = "", batch_size: int = DEFAULT_KV_ITER_BATCH_SIZE
+    ) -> AsyncIterator[dict]:
+        """Yield all data from storage in batches, for a given prefix.
+
+        Keys are collected with SCAN (COUNT=batch_size) and their values fetched with one
+        MGET per batch, so memory is bounded by batch_size and there is one round trip per batch.
+        """
+        logger.info(f"Streaming all data from {self.namespace} with prefix '{prefix}'")
+        key_offset = len(self.namespace) + 1
         async with self._get_redis_connection() as redis:
-            batch = {}
             try:
-                async for key in redis.scan_iter(f"{self.namespace}:{prefix}*"):
-                    value = await redis.get(key)
-                    if value:
-                        batch[key.split(":")[-1]] = json.loads(value)
-                        if len(batch) >= batch_size:
+                keys = []
+                async for key in redis.scan_iter(
+                    f"{self.namespace}:{prefix}*", count=batch_size
+                ):
+                    # Skip the full_doc_id -> chunk ids reverse index
+                    if key[key_offset:].startswith("doc_id:"):
+                        continue
+                    keys.append(key)
+                    if len(keys) >= batch_size:
+                        batch = await self._mget_batch(redis, keys, key_offset)
+                        if batch:
                             yield batch
-                            batch = {}
-                if batch:
-                    yield batch
-            except json.JSONDecodeError as e:
-                logger.error(f"JSON decode error during iteration: {e}")
+                        keys = []
+                if keys:
+                    batch = await self._mget_batch(redis, keys, key_offset)
+                    if batch:
+                        yield batch
             except Exception as e:
-                logger.error(f"Error during data iteration: {e}")
+                logger.error(f"Error during data iteration of {self.namespace}: {e}")
+                raise
+
+    @staticmethod
+    async def _mget_batch(redis, keys: list[str], key_offset: int) -> dict[str, Any]:
+        values = await redis.mget(keys)
+        batch = {}
+        for key, value in zip(keys, values):
+            if not value:
+                continue
+            # A corrupted value only loses its own record
+            try:
+                batch[key[key_offset:]] = json.loads(value)
+            except json.JSONDecodeError as e:
+                logger.error(f"JSON decode error for {key} during iteration: {e}")
+        return batch
 
     async def get_all(self, prefix:str="") -> list[dict[str, Any]]:
         """
@@ -0,0 +1,306 @@
+"""
+Shared-memory KV engine for the JSON storages in multi-worker mode.
+
+Each namespace is an append-only log in a shared-memory directory (/dev/shm when
+available) plus a small mmap-ed control block holding the log generation and the
+committed log length. Every process keeps a local dict replica and replays the log
+records appended since its last read, so reads never leave the process and never
+take a lock: the control block is read with a sequence counter (seqlock) and the log
+bytes below the committed length are immutable.
+
+Writes are serialized by an flock on the control file (single writer at a time):
+the writer first catches up with the log, appends its record, applies it locally and
+then publishes the new committed length. When the log grows well beyond the live
+data, the writer compacts it into a new generation holding one snapshot record.
+
+A reader that keeps finding the control block mid-update falls back to the flock.
+If the sequence is still odd under the flock, the writer died while publishing: the
+control block is recovered from the log itself.
+"""
+
+import json
+import mmap
+import os
+import re
+import struct
+from collections.abc import Iterator, MutableMapping
+from typing import Any
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows, where multi-worker mode is unsupported
+    fcntl = None
+
+# Control block: seq (odd while being updated), generation, committed log length
+_CONTROL = struct.Struct("<QQQ")
+# Record header: op code, payload length
+_RECORD = struct.Struct("<BI")
+
+OP_UPDATE = 1  # payload: {key: value, ...}
+OP_DELETE = 2  # payload: [key, ...]
+OP_CLEAR = 3  # payload: empty
+
+# Reads of an odd sequence before falling back to the flock
+SEQLOCK_SPINS = 1000
+
+# Compact when the log is larger than ratio * live data and at least this many bytes
+SHARED_KV_COMPACT_RATIO = 4
+SHARED_KV_COMPACT_MIN_BYTES = 16 * 1024 * 1024
+
+
+class SharedKVStore(MutableMapping):
+    """Dict-like view of one namespace backed by a shared append log
+
+    Supports the subset of the dict / DictProxy interface used by the JSON storages,
+    including `_getvalue()` for taking a plain dict snapshot. Values must be JSON
+    serializable. Values returned by reads belong to the local replica: mutating them
+    does not reach other workers until they are written back with `update()`.
+    """
+
+    def __init__(self, directory: str, namespace: str):
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", namespace)
+        self._base_path = os.path.join(directory, safe_name)
+        self._control_fd = os.open(
+            f"{self._base_path}.ctl", os.O_RDWR | os.O_CREAT, 0o600
+        )
+        fcntl.flock(self._control_fd, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._control_fd).st_size < _CONTROL.size:
+                os.ftruncate(self._control_fd, _CONTROL.size)
+        finally:
+            fcntl.flock(self._control_fd, fcntl.LOCK_UN)
+        self._control = mmap.mmap(self._control_fd, _CONTROL.size)
+
+        self._data: dict[str, Any] = {}
+        self._sizes: dict[str, int] = {}  # approximate payload bytes per live key
+        self._live_bytes = 0
+        self._generation = 0
+        self._offset = 0
+        self._log_fd: int | None = None
+
+    def _log_path(self, generation: int) -> str:
+        return f"{self._base_path}.{generation}.log"
+
+    def _read_control(self, locked: bool = False) -> tuple[int, int]:
+        """Return a consistent (generation, length) pair
+
+        Lock-free unless the control block stays mid-update for SEQLOCK_SPINS reads;
+        `locked` tells that the caller already holds the flock.
+        """
+        for _ in range(SEQLOCK_SPINS):
+            seq, generation, length = _CONTROL.unpack_from(self._control, 0)
+            if not seq & 1 and _CONTROL.unpack_from(self._control, 0)[0] == seq:
+                return generation, length
+            if locked:
+                break
+            os.sched_yield()
+
+        # A live writer publishes under the flock, so waiting for it is bounded
+        if not locked:
+            fcntl.flock(self._control_fd, fcntl.LOCK_EX)
+        try:
+            seq, generation, length = _CONTROL.unpack_from(self._control, 0)
+            if seq & 1:
+                generation, length = self._recover_control()
+            return generation, length
+        finally:
+            if not locked:
+                fcntl.flock(self._control_fd, fcntl.LOCK_UN)
+
+    def _recover_control(self) -> tuple[int, int]:
+        """Repair the control block left odd by a writer that died (flock held)
+
+        The generation is written before the length and the log before both, so the
+        generation field is current and the committed length is the end of the last
+        complete record of its log.
+        """
+        seq, generation, _ = _CONTROL.unpack_from(self._control, 0)
+        try:
+            with open(self._log_path(generation), "rb") as f:
+                buffer = f.read()
+        except FileNotFoundError:
+            buffer = b""
+        length = 0
+        while length + _RECORD.size <= len(buffer):
+            size = _RECORD.unpack_from(buffer, length)[1]
+            if length + _RECORD.size + size > len(buffer):
+                break
+            length += _RECORD.size + size
+        struct.pack_into("<QQQ", self._control, 0, seq + 1, generation, length)
+        return generation, length
+
+    def _write_control(self, generation: int, length: int):
+        seq = _CONTROL.unpack_from(self._control, 0)[0]
+        struct.pack_into("<Q", self._control, 0, seq + 1)
+        struct.pack_into("<Q", self._control, 8, generation)
+        struct.pack_into("<Q", self._control, 16, length)
+        struct.pack_into("<Q", self._control, 0, seq + 2)
+
+    def _reset(self, generation: int):
+        if self._log_fd is not None:
+            os.close(self._log_fd)
+            self._log_fd = None
+        self._data = {}
+        self._sizes = {}
+        self._live_bytes = 0
+        self._generation = generation
+        self._offset = 0
+
+    def _apply(self, op: int, payload: bytes):
+        if op == OP_UPDATE:
+            items = json.loads(payload)
+            size = len(payload) // max(len(items), 1)
+            for key, value in items.items():
+                self._live_bytes += size - self._sizes.get(key, 0)
+                self._sizes[key] = size
+                self._data[key] = value
+        elif op == OP_DELETE:
+            for key in json.loads(payload):
+                self._live_bytes -= self._sizes.pop(key, 0)
+                self._data.pop(key, None)
+        elif op == OP_CLEAR:
+            self._data.clear()
+            self._sizes.clear()
+            self._live_bytes = 0
+
+    def _sync(self, locked: bool = False):
+        """Replay log records committed by other processes since the last sync"""
+        while True:
+            generation, length = self._read_control(locked)
+            if generation != self._generation:
+                self._reset(generation)
+            if length <= self._offset:
+                return
+            try:
+                if self._log_fd is None:
+                    self._log_fd = os.open(self._log_path(generation), os.O_RDONLY)
+            except FileNotFoundError:
+                # Compacted again before we could open it: re-read the control block
+                continue
+            buffer = os.pread(self._log_fd, length - self._offset, self._offset)
+            position = 0
+            while position < len(buffer):
+                op, size = _RECORD.unpack_from(buffer, position)
+                position += _RECORD.size
+                self._apply(op, buffer[position : position + size])
+                position += size
+            self._offset = length
+            return
+
+    def _append(self, op: int, payload: bytes = b""):
+        fcntl.flock(self._control_fd, fcntl.LOCK_EX)
+        try:
+            self._sync(locked=True)
+            record = _RECORD.pack(op, len(payload)) + payload
+            fd = os.open(
+                self._log_path(self._generation), os.O_RDWR | os.O_CREAT, 0o600
+            )
+            try:
+                os.pwrite(fd, record, self._offset)
+            finally:
+                os.close(fd)
+            self._apply(op, payload)
+            self._offset += len(record)
+            self._write_control(self._generation, self._offset)
+            if self._offset > max(
+                SHARED_KV_COMPACT_MIN_BYTES,
+                SHARED_KV_COMPACT_RATIO * self._live_bytes,
+            ):
+                self._compact()
+        finally:
+            fcntl.flock(self._control_fd, fcntl.LOCK_UN)
+
+    def _compact(self):
+        """Rewrite the live data as a single record in a new log generation"""
+        old_generation = self._generation
+        payload = json.dumps(self._data, ensure_ascii=False).encode("utf-8")
+        record = _RECORD.pack(OP_UPDATE, len(payload)) + payload
+        fd = os.open(
+            self._log_path(old_generation + 1), os.O_WRONLY | os.O_CREAT | os.O_TRUNC,
+            0o600,
+        )
+        try:
+            os.write(fd, record)
+        finally:
+            os.close(fd)
+        data = self._data
+        self._reset(old_generation + 1)
+        self._data = data
+        self._offset = len(record)
+        self._sizes = {key: len(payload) // max(len(data), 1) for key in data}
+        self._live_bytes = len(payload)
+        self._write_control(self._generation, self._offset)
+        try:
+            os.unlink(self._log_path(old_generation))
+        except FileNotFoundError:
+            pass
+
+    # Read interface: local replica after catching up, no locking
+    def __getitem__(self, key: str) -> Any:
+        self._sync()
+        return self._data[key]
+
+    def __contains__(self, key: object) -> bool:
+        self._sync()
+        return key in self._data
+
+    def __len__(self) -> int:
+        self._sync()
+        return len(self._data)
+
+    def __iter__(self) -> Iterator[str]:
+        self._sync()
+        return iter(list(self._data))
+
+    def get(self, key: str, default: Any = None) -> Any:
+        self._sync()
+        return self._data.get(key, default)
+
+    def keys(self):
+        self._sync()
+        return self._data.keys()
+
+    def values(self):
+        self._sync()
+        return self._data.values()
+
+    def items(self):
+        self._sync()
+        return self._data.items()
+
+    def _getvalue(self) -> dict[str, Any]:
+        """Plain dict snapshot, mirroring DictProxy._getvalue()"""
+        self._sync()
+        return dict(self._data)
+
+    # Write interface: one log record per call
+    def __setitem__(self, key: str, value: Any):
+        self.update({key: value})
+
+    def __delitem__(self, key: str):
+        if self.pop(key, None) is None:
+            raise KeyError(key)
+
+    def update(self, data: dict[str, Any] = (), **kwargs):
+        data = {**dict(data), **kwargs}
+        if data:
+            payload = json.dumps(data, ensure_ascii=False).encode("utf-8")
+            self._append(OP_UPDATE, payload)
+
+    def pop(self, key: str, default: Any = None) -> Any:
+        self._sync()
+        if key not in self._data:
+            return default
+        value = self._data[key]
+        self._append(OP_DELETE, json.dumps([key], ensure_ascii=False).encode("utf-8"))
+        return value
+
+    def clear(self):
+        self._append(OP_CLEAR)
+
+    def close(self):
+        if self._log_fd is not None:
+            os.close(self._log_fd)
+            self._log_fd = None
+        self._control.close()
+        os.close(self._control_fd)
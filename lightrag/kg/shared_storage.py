@@ -1,10 +1,15 @@
 import os
 import sys
+import shutil
 import asyncio
+import tempfile
+import time
 from multiprocessing.synchronize import Lock as ProcessLock
 from multiprocessing import Manager
 from typing import Any, Dict, Optional, Union, TypeVar, Generic
 
+from lightrag import metrics
+
 
 # Define a direct print function for critical logs that must be visible in all processes
 def direct_log(message, level="INFO", enable_output: bool = True):
@@ -34,6 +39,11 @@ _shared_dicts: Optional[Dict[str, Any]] = None
 _init_flags: Optional[Dict[str, bool]] = None  # namespace -> initialized
 _update_flags: Optional[Dict[str, bool]] = None  # namespace -> updated
 
+# shared-memory KV engine for JSON storages in multiprocess mode
+_shared_kv_dir: Optional[str] = None  # created by the master process, None if disabled
+_shared_kv_stores: Optional[Dict[str, Any]] = None  # per-process namespace -> store
+_shared_kv_owner: Optional[int] = None  # pid of the process that created the directory
+
 # locks for mutex access
 _storage_lock: Optional[LockType] = None
 _internal_lock: Optional[LockType] = None
@@ -44,6 +54,44 @@ _data_init_lock: Optional[LockType] = None
 # async locks for coroutine synchronization in multiprocess mode
 _async_locks: Optional[Dict[str, asyncio.Lock]] = None
 
+# per-namespace storage locks: namespace -> lock (shared), and their per-process
+# async counterparts in multiprocess mode
+_namespace_locks: Optional[Dict[str, Any]] = None
+_namespace_async_locks: Optional[Dict[str, asyncio.Lock]] = None
+
+# lock wait statistics of this process: lock name -> [acquisitions, total wait, max wait]
+_lock_wait_stats: Dict[str, list] = {}
+
+
+def _record_lock_wait(name: str, wait: float):
+    metrics.LOCK_WAIT_SECONDS.observe(wait, name)
+    stats = _lock_wait_stats.get(name)
+    if stats is None:
+        _lock_wait_stats[name] = [1, wait, wait]
+    else:
+        stats[0] += 1
+        stats[1] += wait
+        if wait > stats[2]:
+            stats[2] = wait
+
+
+def get_lock_wait_stats() -> Dict[str, Dict[str, float]]:
+    """
+    Get lock wait-time statistics of the current process.
+
+    Returns:
+        Dict[str, Dict[str, float]]: lock name -> {"acquisitions", "wait_seconds_total",
+        "wait_seconds_max"}. Per-namespace storage locks are named "storage_lock:<namespace>".
+    """
+    return {
+        name: {
+            "acquisitions": count,
+            "wait_seconds_total": total,
+            "wait_seconds_max": max_wait,
+        }
+        for name, (count, total, max_wait) in _lock_wait_stats.items()
+    }
+
 
 class UnifiedLock(Generic[T]):
     """Provide a unified lock interface type for asyncio.Lock and multiprocessing.Lock"""
@@ -62,8 +110,10 @@ class UnifiedLock(Generic[T]):
         self._name = name  # for debug only
         self._enable_logging = enable_logging  # for debug only
         self._async_lock = async_lock  # auxiliary lock for coroutine synchronization
+        self._acquired_at = 0.0  # for hold time metrics, the lock has a single holder
 
     async def __aenter__(self) -> "UnifiedLock[T]":
+        wait_start = time.perf_counter()
         try:
             # direct_log(
             #     f"== Lock == Process {self._pid}: Acquiring lock '{self._name}' (async={self._is_async})",
@@ -87,6 +137,8 @@ class UnifiedLock(Generic[T]):
                 await self._lock.acquire()
             else:
                 self._lock.acquire()
+            self._acquired_at = time.perf_counter()
+            _record_lock_wait(self._name, self._acquired_at - wait_start)
 
             direct_log(
                 f"== Lock == Process {self._pid}: Lock '{self._name}' acquired (async={self._is_async})",
@@ -111,6 +163,9 @@ class UnifiedLock(Generic[T]):
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         main_lock_released = False
+        metrics.LOCK_HOLD_SECONDS.observe(
+            time.perf_counter() - self._acquired_at, self._name
+        )
         try:
             # Release main lock first
             if self._is_async:
@@ -174,7 +229,10 @@ class UnifiedLock(Generic[T]):
                 f"== Lock == Process {self._pid}: Acquiring lock '{self._name}' (sync)",
                 enable_output=self._enable_logging,
             )
+            wait_start = time.perf_counter()
             self._lock.acquire()
+            self._acquired_at = time.perf_counter()
+            _record_lock_wait(self._name, self._acquired_at - wait_start)
             direct_log(
                 f"== Lock == Process {self._pid}: Lock '{self._name}' acquired (sync)",
                 enable_output=self._enable_logging,
@@ -190,6 +248,9 @@ class UnifiedLock(Generic[T]):
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         """For backward compatibility"""
+        metrics.LOCK_HOLD_SECONDS.observe(
+            time.perf_counter() - self._acquired_at, self._name
+        )
         try:
             if self._is_async:
                 raise RuntimeError("Use 'async with' for shared_storage lock")
@@ -235,6 +296,37 @@ def get_storage_lock(enable_logging: bool = False) -> UnifiedLock:
     )
 
 
+async def get_namespace_storage_lock(
+    namespace: str, enable_logging: bool = False
+) -> UnifiedLock:
+    """return unified storage lock scoped to one namespace
+
+    Storages guard their in-memory data and files with this lock instead of the global
+    storage lock, so that persisting one namespace never blocks reads of another.
+    """
+    if _namespace_locks is None:
+        raise ValueError("Try to get namespace lock before Shared-Data is initialized")
+
+    if namespace not in _namespace_locks:
+        async with get_internal_lock():
+            if namespace not in _namespace_locks:
+                if _is_multiprocess and _manager is not None:
+                    _namespace_locks[namespace] = _manager.Lock()
+                else:
+                    _namespace_locks[namespace] = asyncio.Lock()
+
+    async_lock = None
+    if _is_multiprocess:
+        async_lock = _namespace_async_locks.setdefault(namespace, asyncio.Lock())
+    return UnifiedLock(
+        lock=_namespace_locks[namespace],
+        is_async=not _is_multiprocess,
+        name=f"storage_lock:{namespace}",
+        enable_logging=enable_logging,
+        async_lock=async_lock,
+    )
+
+
 def get_pipeline_status_lock(enable_logging: bool = False) -> UnifiedLock:
     """return unified storage lock for data consistency"""
     async_lock = _async_locks.get("pipeline_status_lock") if _is_multiprocess else None
@@ -302,7 +394,12 @@ def initialize_share_data(workers: int = 1):
         _init_flags, \
         _initialized, \
         _update_flags, \
-        _async_locks
+        _async_locks, \
+        _shared_kv_dir, \
+        _shared_kv_stores, \
+        _shared_kv_owner, \
+        _namespace_locks, \
+        _namespace_async_locks
 
     # Check if already initialized
     if _initialized:
@@ -324,6 +421,8 @@ def initialize_share_data(workers: int = 1):
         _shared_dicts = _manager.dict()
         _init_flags = _manager.dict()
         _update_flags = _manager.dict()
+        _namespace_locks = _manager.dict()
+        _namespace_async_locks = {}
 
         # Initialize async locks for multiprocess mode
         _async_locks = {
@@ -334,6 +433,22 @@ def initialize_share_data(workers: int = 1):
             "data_init_lock": asyncio.Lock(),
         }
 
+        # With SHARED_KV_ENGINE=shm, JSON storages keep their data in a shared-memory
+        # append log instead of Manager dicts
+        _shared_kv_stores = {}
+        if (
+            os.name == "posix"
+            and os.getenv("SHARED_KV_ENGINE", "manager").lower() == "shm"
+        ):
+            shm_root = os.getenv("SHARED_KV_DIR") or (
+                "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+            )
+            _shared_kv_dir = tempfile.mkdtemp(prefix="lightrag_kv_", dir=shm_root)
+            _shared_kv_owner = os.getpid()
+            direct_log(
+                f"Process {os.getpid()} Shared KV engine created in {_shared_kv_dir}"
+            )
+
         direct_log(
             f"Process {os.getpid()} Shared-Data created for Multiple Process (workers={workers})"
         )
@@ -347,7 +462,11 @@ def initialize_share_data(workers: int = 1):
         _shared_dicts = {}
         _init_flags = {}
         _update_flags = {}
+        _namespace_locks = {}
+        _namespace_async_locks = None
         _async_locks = None  # No need for async locks in single process mode
+        _shared_kv_dir = None
+        _shared_kv_stores = None
         direct_log(f"Process {os.getpid()} Shared-Data created for Single Process")
 
     # Mark as initialized
@@ -378,6 +497,10 @@ async def initialize_pipeline_status():
                 "batchs": 0,  # Number of batches for processing documents
                 "cur_batch": 0,  # Current processing batch
                 "request_pending": False,  # Flag for pending request for processing
+                "concurrency_limits": {},  # Current LLM / embedding concurrency limits
+                "unchanged_entities": 0,  # Entity writes skipped by merge change detection
+                "unchanged_relations": 0,  # Relation writes skipped by merge change detection
+                "deduplicated_chunks": 0,  # Chunks whose stored extraction was reused
                 "latest_message": "",  # Latest message from pipeline processing
                 "history_messages": history_messages,  # 使用共享列表对象
             }
@@ -513,6 +636,85 @@ async def get_namespace_data(namespace: str) -> Dict[str, Any]:
     return _shared_dicts[namespace]
 
 
+async def get_namespace_kv_data(namespace: str) -> Dict[str, Any]:
+    """get the shared key-value data reference for a JSON storage namespace
+
+    In multiprocess mode with the shared-memory engine enabled this returns a
+    SharedKVStore: reads are served from a process-local replica without IPC or
+    locking, writes must still be serialized by the storage lock. Otherwise it is
+    the same object as get_namespace_data returns.
+    """
+    if _shared_kv_dir is None:
+        return await get_namespace_data(namespace)
+
+    from .shared_kv import SharedKVStore
+
+    async with get_internal_lock():
+        if namespace not in _shared_kv_stores:
+            _shared_kv_stores[namespace] = SharedKVStore(_shared_kv_dir, namespace)
+
+    return _shared_kv_stores[namespace]
+
+
+def _read_data_versions(path: str) -> Dict[str, int]:
+    import json
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+async def initialize_data_version(workspace: str, persist_path: str | None = None):
+    """
+    Load the data version of a workspace into shared data, once for all workers.
+
+    The data version is a counter bumped after every change of the indexed data
+    (inserts, deletions, entity and relation edits). Query results are cached
+    under the data version they were computed at, so a bump makes all cached
+    query results of the workspace stale.
+    """
+    versions = await get_namespace_data("data_versions")
+    async with get_internal_lock():
+        if workspace not in versions:
+            stored = _read_data_versions(persist_path) if persist_path else {}
+            versions[workspace] = int(stored.get(workspace, 0))
+
+
+async def get_data_version(workspace: str) -> int:
+    """Get the current data version of a workspace"""
+    versions = await get_namespace_data("data_versions")
+    return versions.get(workspace, 0)
+
+
+async def bump_data_version(workspace: str, persist_path: str | None = None) -> int:
+    """
+    Increment the data version of a workspace and return the new version.
+
+    With persist_path the version is also written to that JSON file (one entry
+    per workspace), so query results cached before a restart are not served for
+    data changed since.
+    """
+    import json
+
+    versions = await get_namespace_data("data_versions")
+    async with get_internal_lock():
+        version = versions.get(workspace, 0)
+        if persist_path:
+            stored = _read_data_versions(persist_path)
+            version = max(version, int(stored.get(workspace, 0)))
+        version += 1
+        versions[workspace] = version
+        if persist_path:
+            stored[workspace] = version
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(persist_path) or ".")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(stored, f)
+            os.replace(tmp_path, persist_path)
+    return version
+
+
 def finalize_share_data():
     """
     Release shared resources and clean up.
@@ -535,7 +737,11 @@ def finalize_share_data():
         _init_flags, \
         _initialized, \
         _update_flags, \
-        _async_locks
+        _async_locks, \
+        _shared_kv_dir, \
+        _shared_kv_stores, \
+        _namespace_locks, \
+        _namespace_async_locks
 
     # Check if already initialized
     if not _initialized:
@@ -588,6 +794,17 @@ def finalize_share_data():
                 f"Process {os.getpid()} Error shutting down Manager: {e}", level="ERROR"
             )
 
+    # Close this process's shared KV stores; the master removes the segment directory
+    if _shared_kv_stores is not None:
+        for store in _shared_kv_stores.values():
+            try:
+                store.close()
+            except Exception:
+                pass  # Ignore any errors during shared KV cleanup
+    if _shared_kv_dir is not None and _shared_kv_owner == os.getpid():
+        shutil.rmtree(_shared_kv_dir, ignore_errors=True)
+        direct_log(f"Process {os.getpid()} Shared KV engine removed")
+
     # Reset global variables
     _manager = None
     _initialized = None
@@ -601,5 +818,9 @@ def finalize_share_data():
     _data_init_lock = None
     _update_flags = None
     _async_locks = None
+    _shared_kv_dir = None
+    _shared_kv_stores = None
+    _namespace_locks = None
+    _namespace_async_locks = None
 
     direct_log(f"Process {os.getpid()} storage data finalization complete")
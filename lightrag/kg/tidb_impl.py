@@ -716,6 +716,12 @@ class TiDBVectorDBStorage(BaseVectorStorage):
             return []
 
 
+def _bind_list(prefix: str, values: list) -> tuple[str, dict[str, Any]]:
+    """Named placeholders and parameters for an IN (...) list"""
+    params = {f"{prefix}_{i}": value for i, value in enumerate(values)}
+    return ", ".join(f":{name}" for name in params), params
+
+
 @final
 @dataclass
 class TiDBGraphStorage(BaseGraphStorage):
@@ -855,6 +861,82 @@ class TiDBGraphStorage(BaseGraphStorage):
         else:
             return []
 
+    async def get_nodes_batch(self, node_ids: list[str]) -> dict[str, dict]:
+        if not node_ids:
+            return {}
+        names, params = _bind_list("name", list(set(node_ids)))
+        rows = await self.db.query(
+            SQL_TEMPLATES["get_nodes_batch"].format(names=names),
+            params,
+            multirows=True,
+        )
+        nodes = {}
+        for row in rows:
+            nodes.setdefault(row["name"], row)
+        return {node_id: nodes[node_id] for node_id in node_ids if node_id in nodes}
+
+    async def node_degrees_batch(self, node_ids: list[str]) -> dict[str, int]:
+        if not node_ids:
+            return {}
+        names, params = _bind_list("name", list(set(node_ids)))
+        rows = await self.db.query(
+            SQL_TEMPLATES["node_degrees_batch"].format(names=names),
+            params,
+            multirows=True,
+        )
+        degrees = {row["name"]: int(row["cnt"]) for row in rows}
+        return {node_id: degrees.get(node_id, 0) for node_id in node_ids}
+
+    async def edge_degrees_batch(
+        self, edge_pairs: list[tuple[str, str]]
+    ) -> dict[tuple[str, str], int]:
+        if not edge_pairs:
+            return {}
+        degrees = await self.node_degrees_batch(
+            list({node_id for pair in edge_pairs for node_id in pair})
+        )
+        return {(src, tgt): degrees[src] + degrees[tgt] for src, tgt in edge_pairs}
+
+    async def get_edges_batch(
+        self, pairs: list[dict[str, str]]
+    ) -> dict[tuple[str, str], dict]:
+        if not pairs:
+            return {}
+        unique_pairs = list(dict.fromkeys((pair["src"], pair["tgt"]) for pair in pairs))
+        placeholders = []
+        params = {}
+        for i, (src, tgt) in enumerate(unique_pairs):
+            placeholders.append(f"(:source_{i}, :target_{i})")
+            params[f"source_{i}"] = src
+            params[f"target_{i}"] = tgt
+        rows = await self.db.query(
+            SQL_TEMPLATES["get_edges_batch"].format(pairs=", ".join(placeholders)),
+            params,
+            multirows=True,
+        )
+        edges = {}
+        for row in rows:
+            edges.setdefault((row["source_name"], row["target_name"]), row)
+        return {pair: edges[pair] for pair in unique_pairs if pair in edges}
+
+    async def get_nodes_edges_batch(
+        self, node_ids: list[str]
+    ) -> dict[str, list[tuple[str, str]]]:
+        if not node_ids:
+            return {}
+        names, params = _bind_list("source_name", list(set(node_ids)))
+        rows = await self.db.query(
+            SQL_TEMPLATES["get_nodes_edges_batch"].format(names=names),
+            params,
+            multirows=True,
+        )
+        edges: dict[str, list[tuple[str, str]]] = {}
+        for row in rows:
+            edges.setdefault(row["source_name"], []).append(
+                (row["source_name"], row["target_name"])
+            )
+        return {node_id: edges.get(node_id, []) for node_id in node_ids}
+
     async def index_done_callback(self) -> None:
         # Ti handles persistence automatically
         pass
@@ -1218,6 +1300,28 @@ SQL_TEMPLATES = {
     "node_degree": """
         SELECT COUNT(id) AS cnt FROM LIGHTRAG_GRAPH_EDGES WHERE workspace = :workspace AND :name IN (source_name, target_name)
     """,
+    "get_nodes_batch": """
+        SELECT entity_id AS id, workspace, name, entity_type, description, source_chunk_id AS source_id, content, content_vector
+        FROM LIGHTRAG_GRAPH_NODES WHERE name IN ({names}) AND workspace = :workspace
+    """,
+    "get_edges_batch": """
+        SELECT relation_id AS id, workspace, source_name, target_name, weight, keywords, description, source_chunk_id AS source_id, content, content_vector
+        FROM LIGHTRAG_GRAPH_EDGES WHERE (source_name, target_name) IN ({pairs}) AND workspace = :workspace
+    """,
+    "get_nodes_edges_batch": """
+        SELECT source_name, target_name
+        FROM LIGHTRAG_GRAPH_EDGES WHERE source_name IN ({names}) AND workspace = :workspace
+    """,
+    "node_degrees_batch": """
+        SELECT name, SUM(cnt) AS cnt FROM (
+            SELECT source_name AS name, COUNT(id) AS cnt FROM LIGHTRAG_GRAPH_EDGES
+            WHERE workspace = :workspace AND source_name IN ({names}) GROUP BY source_name
+            UNION ALL
+            SELECT target_name AS name, COUNT(id) AS cnt FROM LIGHTRAG_GRAPH_EDGES
+            WHERE workspace = :workspace AND target_name IN ({names}) AND target_name <> source_name
+            GROUP BY target_name
+        ) d GROUP BY name
+    """,
     "upsert_node": """
         INSERT INTO LIGHTRAG_GRAPH_NODES(name, content, content_vector, workspace, source_chunk_id, entity_type, description)
         VALUES(:name, :content, :content_vector, :workspace, :source_chunk_id, :entity_type, :description)
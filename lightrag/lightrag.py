@@ -12,6 +12,7 @@ from typing import (
     Any,
     AsyncIterator,
     Callable,
+    Iterable,
     Iterator,
     cast,
     final,
@@ -23,6 +24,18 @@ from typing import (
 from lightrag.constants import (
     DEFAULT_MAX_TOKEN_SUMMARY,
     DEFAULT_FORCE_LLM_SUMMARY_ON_MERGE,
+    DEFAULT_WRITE_BEHIND_INTERVAL,
+    DEFAULT_WRITE_BEHIND_MAX_PENDING,
+    DEFAULT_QUERY_CACHE_EVICTION_INTERVAL,
+    DEFAULT_QUERY_CACHE_EVICTION_MAX_VERSIONS,
+    DEFAULT_ENTITY_LINKING_REFRESH_INTERVAL,
+    DEFAULT_ENTITY_LINKING_MIN_COVERAGE,
+    DEFAULT_KEYWORD_EXTRACTOR_MIN_CONFIDENCE,
+    DEFAULT_ADAPTIVE_CONCURRENCY_LATENCY_TOLERANCE,
+    DEFAULT_EMBEDDING_BATCH_WINDOW,
+    DEFAULT_EMBEDDING_CACHE_MAX_MB,
+    DEFAULT_SUMMARY_BATCH_SIZE,
+    DEFAULT_SUMMARY_DELTA_MAX_TOKENS,
 )
 from lightrag.utils import get_env_value
 
@@ -32,8 +45,11 @@ from lightrag.kg import (
 )
 
 from lightrag.kg.shared_storage import (
+    bump_data_version,
     get_namespace_data,
+    get_namespace_storage_lock,
     get_pipeline_status_lock,
+    initialize_data_version,
 )
 
 from .base import (
@@ -50,8 +66,12 @@ from .base import (
 from .namespace import NameSpace, make_namespace
 from .operate import (
     chunking_by_token_size,
+    StaleQueryCacheEvictor,
     extract_entities,
     merge_nodes_and_edges,
+    chunk_results_to_extraction_records,
+    extraction_record_doc_ids,
+    extraction_records_to_chunk_results,
     kg_query,
     naive_query,
     query_with_keywords,
@@ -70,8 +90,16 @@ from .utils import (
     clean_text,
     check_storage_env_vars,
     logger,
+    WriteBehindScheduler,
+    AdaptiveConcurrency,
+    EmbeddingBatcher,
+    EmbeddingCache,
+    SingleFlight,
 )
+from .entity_linker import EntityLinker
+from .keyword_extractor import LocalKeywordExtractor
 from .types import KnowledgeGraph
+from . import metrics
 from dotenv import load_dotenv
 
 # use the .env that is inside the current folder
@@ -123,6 +151,11 @@ class LightRAG:
     entity_extract_max_gleaning: int = field(default=1)
     """Maximum number of entity extraction attempts for ambiguous content."""
 
+    enable_chunk_extraction_store: bool = field(
+        default=get_env_value("ENABLE_CHUNK_EXTRACTION_STORE", True, bool)
+    )
+    """Keep the parsed entities and relations of every chunk, so the graph can be rebuilt without extraction LLM calls."""
+
     summary_to_max_tokens: int = field(
         default=get_env_value("MAX_TOKEN_SUMMARY", DEFAULT_MAX_TOKEN_SUMMARY, int)
     )
@@ -131,6 +164,22 @@ class LightRAG:
     force_llm_summary_on_merge: int = field(default=80)
     """When merging nodes, if a node's degree (number of relationships) exceeds this threshold, force a regeneration of its summary using an LLM."""
 
+    summary_mode: str = field(default=get_env_value("SUMMARY_MODE", "full", str))
+    """How merged descriptions are summarized: "full" summarizes all fragments at once, "incremental" folds
+    the fragments added since the previous summary into it, batching requests of many entities per LLM call."""
+
+    summary_batch_size: int = field(
+        default=get_env_value("SUMMARY_BATCH_SIZE", DEFAULT_SUMMARY_BATCH_SIZE, int)
+    )
+    """Maximum number of entities / relations summarized per LLM call in incremental summary mode."""
+
+    summary_delta_max_tokens: int = field(
+        default=get_env_value(
+            "SUMMARY_DELTA_MAX_TOKENS", DEFAULT_SUMMARY_DELTA_MAX_TOKENS, int
+        )
+    )
+    """Incremental summary mode: maximum tokens of new fragments buffered and sent with the previous summary per request."""
+
     # Text chunking
     # ---
 
@@ -196,6 +245,36 @@ class LightRAG:
     )
     """Maximum number of concurrent embedding function calls."""
 
+    embedding_batch_window: float = field(
+        default=get_env_value(
+            "EMBEDDING_BATCH_WINDOW", DEFAULT_EMBEDDING_BATCH_WINDOW, float
+        )
+    )
+    """Seconds the embedding batcher gathers texts of concurrent upserts into shared batches. 0 disables the batcher."""
+
+    embedding_batch_max_tokens: int = field(
+        default=get_env_value("EMBEDDING_BATCH_MAX_TOKENS", 0, int)
+    )
+    """Token budget of one batched embedding request (0: only embedding_batch_num limits a batch)."""
+
+    embedding_cache_max_mb: int = field(
+        default=get_env_value(
+            "EMBEDDING_CACHE_MAX_MB", DEFAULT_EMBEDDING_CACHE_MAX_MB, int
+        )
+    )
+    """Size bound of the persistent embedding cache in the working directory (0 disables it).
+    Requires the model name of the embedding function: EmbeddingFunc.model_name or the EMBEDDING_MODEL env."""
+
+    enable_single_flight: bool = field(
+        default=get_env_value("ENABLE_SINGLE_FLIGHT", True, bool)
+    )
+    """Let concurrent identical LLM / embedding calls share one in-flight request."""
+
+    embedding_adaptive_concurrency: bool = field(
+        default=get_env_value("EMBEDDING_ADAPTIVE_CONCURRENCY", False, bool)
+    )
+    """If True, embedding concurrency adapts between adaptive_concurrency_min and embedding_func_max_async."""
+
     embedding_cache_config: dict[str, Any] = field(
         default_factory=lambda: {
             "enabled": False,
@@ -224,6 +303,25 @@ class LightRAG:
     llm_model_max_async: int = field(default=int(os.getenv("MAX_ASYNC", 4)))
     """Maximum number of concurrent LLM calls."""
 
+    llm_adaptive_concurrency: bool = field(
+        default=get_env_value("LLM_ADAPTIVE_CONCURRENCY", False, bool)
+    )
+    """If True, LLM concurrency adapts between adaptive_concurrency_min and llm_model_max_async from latency, errors and rate limiting."""
+
+    adaptive_concurrency_min: int = field(
+        default=get_env_value("ADAPTIVE_CONCURRENCY_MIN", 1, int)
+    )
+    """Lowest concurrency an adaptive limiter may fall back to."""
+
+    adaptive_concurrency_latency_tolerance: float = field(
+        default=get_env_value(
+            "ADAPTIVE_CONCURRENCY_LATENCY_TOLERANCE",
+            DEFAULT_ADAPTIVE_CONCURRENCY_LATENCY_TOLERANCE,
+            float,
+        )
+    )
+    """Calls slower than this multiple of the best observed latency reduce the limit (0 disables)."""
+
     llm_model_kwargs: dict[str, Any] = field(default_factory=dict)
     """Additional keyword arguments passed to the LLM model function."""
 
@@ -243,6 +341,83 @@ class LightRAG:
     enable_llm_cache_for_entity_extract: bool = field(default=True)
     """If True, enables caching for entity extraction steps to reduce LLM costs."""
 
+    write_behind_interval: float = field(
+        default=get_env_value(
+            "WRITE_BEHIND_INTERVAL", DEFAULT_WRITE_BEHIND_INTERVAL, float
+        )
+    )
+    """Seconds the LLM cache may stay dirty after queries before it is persisted in the background. 0 persists after every query."""
+
+    write_behind_max_pending: int = field(
+        default=get_env_value(
+            "WRITE_BEHIND_MAX_PENDING", DEFAULT_WRITE_BEHIND_MAX_PENDING, int
+        )
+    )
+    """Number of queries after which pending LLM cache writes are persisted without waiting for the interval."""
+
+    query_cache_eviction_interval: float = field(
+        default=get_env_value(
+            "QUERY_CACHE_EVICTION_INTERVAL",
+            DEFAULT_QUERY_CACHE_EVICTION_INTERVAL,
+            float,
+        )
+    )
+    """Minimum seconds between background deletions of cached query answers of older data versions. 0 never deletes them."""
+
+    query_cache_eviction_max_versions: int = field(
+        default=get_env_value(
+            "QUERY_CACHE_EVICTION_MAX_VERSIONS",
+            DEFAULT_QUERY_CACHE_EVICTION_MAX_VERSIONS,
+            int,
+        )
+    )
+    """Number of data changes after which stale cached query answers are deleted without waiting for the interval."""
+
+    enable_materialized_degree: bool = field(
+        default=get_env_value("ENABLE_MATERIALIZED_DEGREE", False, bool)
+    )
+    """Keep a degree property on each graph node, updated by the graph writes, so query ranking reads it with the nodes instead of counting relations (Neo4JStorage, PGGraphStorage). Run recompute_node_degrees() once after enabling it on an existing graph."""
+
+    enable_entity_linking: bool = field(
+        default=get_env_value("ENABLE_ENTITY_LINKING", False, bool)
+    )
+    """In local mode, link entities named literally in the query through an in-memory index of entity names, skipping the keyword extraction LLM call when they cover most of the query (see entity_linking_min_coverage)."""
+
+    entity_linking_vector_fill: bool = field(
+        default=get_env_value("ENTITY_LINKING_VECTOR_FILL", True, bool)
+    )
+    """Fill the top_k entities not covered by linked entities with an entity vector search. If False, queries that skip keyword extraction do no vector search."""
+
+    entity_linking_min_coverage: float = field(
+        default=get_env_value(
+            "ENTITY_LINKING_MIN_COVERAGE", DEFAULT_ENTITY_LINKING_MIN_COVERAGE, float
+        )
+    )
+    """Share of the query letters and digits the linked entity names must cover to skip keyword extraction. Below it, keywords are extracted as usual and the linked entities are ranked first."""
+
+    entity_linking_refresh_interval: float = field(
+        default=get_env_value(
+            "ENTITY_LINKING_REFRESH_INTERVAL",
+            DEFAULT_ENTITY_LINKING_REFRESH_INTERVAL,
+            float,
+        )
+    )
+    """Minimum seconds between rebuilds of the entity name index from the graph storage after data changes."""
+
+    enable_speculative_retrieval: bool = field(
+        default=get_env_value("ENABLE_SPECULATIVE_RETRIEVAL", True, bool)
+    )
+    """In mix mode, run the chunk vector search on the original query while the keywords are extracted instead of after."""
+
+    keyword_extractor_min_confidence: float = field(
+        default=get_env_value(
+            "KEYWORD_EXTRACTOR_MIN_CONFIDENCE",
+            DEFAULT_KEYWORD_EXTRACTOR_MIN_CONFIDENCE,
+            float,
+        )
+    )
+    """Share of query terms the corpus must know for the local keyword extractor to be used instead of the LLM (QueryParam.keyword_extractor="local")."""
+
     # Extensions
     # ---
 
@@ -348,8 +523,38 @@ class LightRAG:
 
         # Init Embedding
         self.embedding_func = priority_limit_async_func_call(
-            self.embedding_func_max_async
+            self.embedding_func_max_async,
+            name="embedding",
+            adaptive=self._adaptive_concurrency(
+                self.embedding_adaptive_concurrency, self.embedding_func_max_async
+            ),
         )(self.embedding_func)
+        if self.embedding_batch_window > 0:
+            # Coalesce the small batches of concurrent vector upserts
+            self.embedding_func = EmbeddingBatcher(
+                self.embedding_func,
+                max_batch_size=self.embedding_batch_num,
+                max_batch_tokens=self.embedding_batch_max_tokens,
+                window=self.embedding_batch_window,
+                count_tokens=lambda text: len(self.tokenizer.encode(text)),
+            )
+
+        # Reuse embeddings of texts embedded before, in front of the limiter and batcher
+        self._embedding_cache: EmbeddingCache | None = None
+        embedding_model_name = getattr(
+            self.embedding_func, "model_name", None
+        ) or os.getenv("EMBEDDING_MODEL")
+        if self.embedding_cache_max_mb > 0 and embedding_model_name:
+            self._embedding_cache = EmbeddingCache(
+                self.embedding_func,
+                working_dir=self.working_dir,
+                model_name=embedding_model_name,
+                embedding_dim=self.embedding_func.embedding_dim,
+                max_bytes=self.embedding_cache_max_mb * 1024 * 1024,
+            )
+            self.embedding_func = self._embedding_cache
+        if self.enable_single_flight:
+            self.embedding_func = SingleFlight(self.embedding_func, name="embedding")
 
         # Initialize all storages
         self.key_string_value_json_storage_cls: type[BaseKVStorage] = (
@@ -398,12 +603,26 @@ class LightRAG:
             ),
             embedding_func=self.embedding_func,
         )
+        self.chunk_extractions: BaseKVStorage = self.key_string_value_json_storage_cls(  # type: ignore
+            namespace=make_namespace(
+                self.namespace_prefix, NameSpace.KV_STORE_CHUNK_EXTRACTIONS
+            ),
+            embedding_func=self.embedding_func,
+        )
         self.chunk_entity_relation_graph: BaseGraphStorage = self.graph_storage_cls(  # type: ignore
             namespace=make_namespace(
                 self.namespace_prefix, NameSpace.GRAPH_STORE_CHUNK_ENTITY_RELATION
             ),
             embedding_func=self.embedding_func,
         )
+        if (
+            self.enable_materialized_degree
+            and not self.chunk_entity_relation_graph.materialized_degree
+        ):
+            logger.warning(
+                f"{self.graph_storage} does not support materialized node degrees, "
+                "degrees are counted at query time"
+            )
 
         self.entities_vdb: BaseVectorStorage = self.vector_db_storage_cls(  # type: ignore
             namespace=make_namespace(
@@ -437,19 +656,88 @@ class LightRAG:
         # Directly use llm_response_cache, don't create a new object
         hashing_kv = self.llm_response_cache
 
-        self.llm_model_func = priority_limit_async_func_call(self.llm_model_max_async)(
+        self.llm_model_func = priority_limit_async_func_call(
+            self.llm_model_max_async,
+            name="llm",
+            adaptive=self._adaptive_concurrency(
+                self.llm_adaptive_concurrency, self.llm_model_max_async
+            ),
+        )(
             partial(
                 self.llm_model_func,  # type: ignore
                 hashing_kv=hashing_kv,
                 **self.llm_model_kwargs,
             )
         )
+        if self.enable_single_flight:
+            self.llm_model_func = SingleFlight(self.llm_model_func, name="llm")
+
+        # Per-call latency metrics of every storage (no-op unless ENABLE_METRICS)
+        for storage in (
+            self.full_docs,
+            self.text_chunks,
+            self.chunk_extractions,
+            self.entities_vdb,
+            self.relationships_vdb,
+            self.chunks_vdb,
+            self.chunk_entity_relation_graph,
+            self.llm_response_cache,
+            self.doc_status,
+        ):
+            metrics.instrument_storage(storage)
+
+        # Coalesces LLM cache persistence after queries (see write_behind_interval)
+        self._write_behind = WriteBehindScheduler(
+            self.write_behind_interval, self.write_behind_max_pending
+        )
+
+        # Deletes unreachable cached answers after data changes, in the background
+        self._query_cache_evictor: StaleQueryCacheEvictor | None = None
+        if self.llm_response_cache is not None:
+            self._query_cache_evictor = StaleQueryCacheEvictor(
+                self.llm_response_cache,
+                self.llm_response_cache.global_config,
+                self.query_cache_eviction_interval,
+                self.query_cache_eviction_max_versions,
+            )
+
+        # Query-time entity linking over entity names (see enable_entity_linking)
+        self._entity_linker: EntityLinker | None = None
+        if self.enable_entity_linking:
+            self._entity_linker = EntityLinker(
+                self.namespace_prefix,
+                refresh_interval=self.entity_linking_refresh_interval,
+            )
+
+        # Statistical keyword extraction (QueryParam.keyword_extractor="local"),
+        # corpus statistics are computed on first use
+        self._keyword_extractor = LocalKeywordExtractor(
+            self.namespace_prefix, self.text_chunks
+        )
 
         self._storages_status = StoragesStatus.CREATED
 
         if self.auto_manage_storages_states:
             self._run_async_safely(self.initialize_storages, "Storage Initialization")
 
+    def _adaptive_concurrency(
+        self, enabled: bool, max_limit: int
+    ) -> AdaptiveConcurrency | None:
+        if not enabled:
+            return None
+        return AdaptiveConcurrency(
+            max_limit,
+            min_limit=self.adaptive_concurrency_min,
+            latency_tolerance=self.adaptive_concurrency_latency_tolerance,
+        )
+
+    def concurrency_limits(self) -> dict[str, int]:
+        """Current concurrency limits of the LLM and embedding limiters"""
+        return {
+            "llm": self.llm_model_func.concurrency_limit(),
+            "embedding": self.embedding_func.concurrency_limit(),
+        }
+
     def __del__(self):
         if self.auto_manage_storages_states:
             self._run_async_safely(self.finalize_storages, "Storage Finalization")
@@ -481,6 +769,7 @@ class LightRAG:
             for storage in (
                 self.full_docs,
                 self.text_chunks,
+                self.chunk_extractions,
                 self.entities_vdb,
                 self.relationships_vdb,
                 self.chunks_vdb,
@@ -492,6 +781,15 @@ class LightRAG:
                     tasks.append(storage.initialize())
 
             await asyncio.gather(*tasks)
+            await initialize_data_version(
+                self.namespace_prefix, self._data_version_file
+            )
+            if self._entity_linker is not None:
+                await self._entity_linker.maybe_refresh(
+                    self.chunk_entity_relation_graph
+                )
+            if QueryParam.keyword_extractor == "local":
+                await self._keyword_extractor.maybe_refresh()
 
             self._storages_status = StoragesStatus.INITIALIZED
             logger.debug("Initialized Storages")
@@ -499,11 +797,22 @@ class LightRAG:
     async def finalize_storages(self):
         """Asynchronously finalize the storages"""
         if self._storages_status == StoragesStatus.INITIALIZED:
+            # Final flush of write-behind persistence before storages are closed
+            await self._write_behind.close()
+            if self._query_cache_evictor is not None:
+                await self._query_cache_evictor.close()
+            if self._entity_linker is not None:
+                await self._entity_linker.close()
+            await self._keyword_extractor.close()
+            if self._embedding_cache is not None:
+                await self._embedding_cache.close()
+
             tasks = []
 
             for storage in (
                 self.full_docs,
                 self.text_chunks,
+                self.chunk_extractions,
                 self.entities_vdb,
                 self.relationships_vdb,
                 self.chunks_vdb,
@@ -856,6 +1165,9 @@ class LightRAG:
                     "batchs": 0,
                     "cur_batch": 0,
                     "request_pending": False,
+                    "unchanged_entities": 0,
+                    "unchanged_relations": 0,
+                    "deduplicated_chunks": 0,
                     "latest_message": "",
                 }
             )
@@ -942,6 +1254,9 @@ class LightRAG:
                                 total_processed_files += 1
                                 current_file_number_in_batch = batch_processed_count
                                 pipeline_status["cur_batch"] = total_processed_files
+                                pipeline_status["concurrency_limits"] = (
+                                    self.concurrency_limits()
+                                )
 
                                 log_message = f"Extracting stage {total_processed_files}: {file_path}"
                                 logger.info(log_message)
@@ -951,21 +1266,22 @@ class LightRAG:
                                 pipeline_status["latest_message"] = log_message
                                 pipeline_status["history_messages"].append(log_message)
 
-                            chunks: dict[str, Any] = {
-                                compute_mdhash_id(dp["content"], prefix="chunk-"): {
-                                    **dp,
-                                    "full_doc_id": doc_id,
-                                    "file_path": file_path,
+                            with metrics.PIPELINE_STAGE_SECONDS.time("chunking"):
+                                chunks: dict[str, Any] = {
+                                    compute_mdhash_id(dp["content"], prefix="chunk-"): {
+                                        **dp,
+                                        "full_doc_id": doc_id,
+                                        "file_path": file_path,
+                                    }
+                                    for dp in self.chunking_func(
+                                        self.tokenizer,
+                                        status_doc.content,
+                                        split_by_character,
+                                        split_by_character_only,
+                                        self.chunk_overlap_token_size,
+                                        self.chunk_token_size,
+                                    )
                                 }
-                                for dp in self.chunking_func(
-                                    self.tokenizer,
-                                    status_doc.content,
-                                    split_by_character,
-                                    split_by_character_only,
-                                    self.chunk_overlap_token_size,
-                                    self.chunk_token_size,
-                                )
-                            }
                             tasks = []
                             doc_status_task = asyncio.create_task(
                                 self.doc_status.upsert(
@@ -1042,20 +1358,30 @@ class LightRAG:
                     if file_extraction_stage_ok:
                         try:
                             chunk_results = await entity_relation_task
-                            await merge_nodes_and_edges(
-                                chunk_results=chunk_results,
-                                knowledge_graph_inst=self.chunk_entity_relation_graph,
-                                entity_vdb=self.entities_vdb,
-                                relationships_vdb=self.relationships_vdb,
-                                global_config=asdict(self),
-                                pipeline_status=pipeline_status,
-                                pipeline_status_lock=pipeline_status_lock,
-                                llm_response_cache=self.llm_response_cache,
-                                current_file_number=total_processed_files,
-                                total_files=pipeline_status["docs"],
-                                file_path=file_path,
-                                build_vector_index=build_vector_index,
+                            with metrics.PIPELINE_STAGE_SECONDS.time("merge"):
+                                await merge_nodes_and_edges(
+                                    chunk_results=chunk_results,
+                                    knowledge_graph_inst=self.chunk_entity_relation_graph,
+                                    entity_vdb=self.entities_vdb,
+                                    relationships_vdb=self.relationships_vdb,
+                                    global_config=asdict(self),
+                                    pipeline_status=pipeline_status,
+                                    pipeline_status_lock=pipeline_status_lock,
+                                    llm_response_cache=self.llm_response_cache,
+                                    current_file_number=total_processed_files,
+                                    total_files=pipeline_status["docs"],
+                                    file_path=file_path,
+                                    build_vector_index=build_vector_index,
+                                )
+                            self._link_entities(
+                                name
+                                for maybe_nodes, _ in chunk_results
+                                for name in maybe_nodes
                             )
+                            # Graph and vector writes of this document are visible
+                            # to queries already, invalidate cached query results
+                            # (stale answers are evicted once by _insert_done)
+                            await self._bump_data_version(evict_query_cache=False)
                             await self.doc_status.upsert(
                                 {
                                     doc_id: {
@@ -1075,6 +1401,9 @@ class LightRAG:
                             async with pipeline_status_lock:
                                 log_message = f"Completed processing file {total_processed_files}: {file_path}"
                                 logger.info(log_message)
+                                pipeline_status["concurrency_limits"] = (
+                                    self.concurrency_limits()
+                                )
                                 pipeline_status["latest_message"] = log_message
                                 pipeline_status["history_messages"].append(log_message)
                         except Exception as e:
@@ -1137,14 +1466,73 @@ class LightRAG:
         self, chunk: dict[str, Any], pipeline_status=None, pipeline_status_lock=None
     ) -> list:
         try:
-            chunk_results = await extract_entities(
-                chunk,
-                global_config=asdict(self),
-                pipeline_status=pipeline_status,
-                pipeline_status_lock=pipeline_status_lock,
-                llm_response_cache=self.llm_response_cache,
+            # Chunks already extracted for another document (same content, same id)
+            # reuse the stored results; only their provenance is new
+            reused_records = {}
+            if self.enable_chunk_extraction_store:
+                reused_records = await self._get_extraction_records(list(chunk))
+            new_chunks = {
+                chunk_key: chunk_dp
+                for chunk_key, chunk_dp in chunk.items()
+                if chunk_key not in reused_records
+            }
+
+            new_results = []
+            if new_chunks:
+                with metrics.PIPELINE_STAGE_SECONDS.time("extract"):
+                    new_results = await extract_entities(
+                        new_chunks,
+                        global_config=asdict(self),
+                        pipeline_status=pipeline_status,
+                        pipeline_status_lock=pipeline_status_lock,
+                        llm_response_cache=self.llm_response_cache,
+                    )
+                if self.enable_chunk_extraction_store:
+                    await self._add_extraction_records(
+                        chunk_results_to_extraction_records(new_chunks, new_results)
+                    )
+            if not reused_records:
+                return new_results
+
+            # Register the current document on the reused records, so that they
+            # survive the deletion of the other documents and are rebuilt for it
+            await self._add_extraction_records(
+                {
+                    chunk_key: {
+                        **record,
+                        "full_doc_ids": [chunk[chunk_key].get("full_doc_id", "")],
+                    }
+                    for chunk_key, record in reused_records.items()
+                    if chunk[chunk_key].get("full_doc_id")
+                    and chunk[chunk_key]["full_doc_id"]
+                    not in extraction_record_doc_ids(record)
+                }
             )
-            return chunk_results
+
+            results_by_chunk = dict(zip(new_chunks, new_results))
+            reused_records = {
+                chunk_key: {
+                    **record,
+                    "file_path": chunk[chunk_key].get("file_path", "unknown_source"),
+                }
+                for chunk_key, record in reused_records.items()
+            }
+            results_by_chunk.update(
+                zip(
+                    reused_records,
+                    extraction_records_to_chunk_results(reused_records),
+                )
+            )
+            log_message = f"Reused stored extraction of {len(reused_records)} of {len(chunk)} chunks"
+            logger.info(log_message)
+            if pipeline_status is not None:
+                async with pipeline_status_lock:
+                    pipeline_status["deduplicated_chunks"] = pipeline_status.get(
+                        "deduplicated_chunks", 0
+                    ) + len(reused_records)
+                    pipeline_status["latest_message"] = log_message
+                    pipeline_status["history_messages"].append(log_message)
+            return [results_by_chunk[chunk_key] for chunk_key in chunk]
         except Exception as e:
             error_msg = f"Failed to extract entities and relationships: {str(e)}"
             logger.error(error_msg)
@@ -1153,6 +1541,85 @@ class LightRAG:
                 pipeline_status["history_messages"].append(error_msg)
             raise e
 
+    async def _get_extraction_records(
+        self, chunk_ids: list[str]
+    ) -> dict[str, dict[str, Any]]:
+        """Stored extraction records of the given chunk ids that have one"""
+        if not chunk_ids:
+            return {}
+        missing_ids = await self.chunk_extractions.filter_keys(set(chunk_ids))
+        existing_ids = [chunk_id for chunk_id in chunk_ids if chunk_id not in missing_ids]
+        if not existing_ids:
+            return {}
+        records = await self.chunk_extractions.get_by_ids(existing_ids)
+        found = {}
+        for position, record in enumerate(records):
+            if not record:
+                continue
+            # Some backends return rows with their id instead of in request order
+            chunk_id = record.get("id") or record.get("_id") or existing_ids[position]
+            found[chunk_id] = record
+        return found
+
+    @staticmethod
+    def _extraction_record_fields(record: dict[str, Any]) -> dict[str, Any]:
+        return {k: v for k, v in record.items() if k not in ("id", "_id")}
+
+    async def _extraction_refs_lock(self):
+        """Lock serializing the document references of chunk extraction records
+
+        Shared by all workers of the server. It is not the namespace lock of the
+        storage itself, which JSON storages take inside get_by_ids and upsert.
+        """
+        return await get_namespace_storage_lock(
+            f"{self.chunk_extractions.namespace}:doc_refs"
+        )
+
+    async def _add_extraction_records(self, records: dict[str, dict[str, Any]]):
+        """Upsert extraction records, keeping the documents of stored ones"""
+        if not records:
+            return
+        async with await self._extraction_refs_lock():
+            stored = await self._get_extraction_records(list(records))
+            updates = {}
+            for chunk_id, record in records.items():
+                doc_ids = extraction_record_doc_ids(record)
+                if chunk_id in stored:
+                    doc_ids |= extraction_record_doc_ids(stored[chunk_id])
+                updates[chunk_id] = {
+                    **self._extraction_record_fields(record),
+                    "full_doc_ids": sorted(doc_ids),
+                }
+            await self.chunk_extractions.upsert(updates)
+
+    async def _release_extraction_records(self, chunk_ids: list[str], doc_id: str):
+        """Remove a document from extraction records, deleting unused records"""
+        async with await self._extraction_refs_lock():
+            records = await self._get_extraction_records(chunk_ids)
+            unused = []
+            updates = {}
+            for chunk_id, record in records.items():
+                doc_ids = extraction_record_doc_ids(record) - {doc_id}
+                if not doc_ids:
+                    unused.append(chunk_id)
+                    continue
+                full_doc_id = record.get("full_doc_id")
+                updates[chunk_id] = {
+                    **self._extraction_record_fields(record),
+                    "full_doc_id": full_doc_id
+                    if full_doc_id in doc_ids
+                    else min(doc_ids),
+                    "full_doc_ids": sorted(doc_ids),
+                }
+            if unused:
+                await self.chunk_extractions.delete(unused)
+            if updates:
+                await self.chunk_extractions.upsert(updates)
+            logger.debug(
+                f"Deleted {len(unused)} chunk extractions of document {doc_id}, "
+                f"kept {len(updates)} used by other documents"
+            )
+
     async def _insert_done(
         self, pipeline_status=None, pipeline_status_lock=None
     ) -> None:
@@ -1161,6 +1628,7 @@ class LightRAG:
             for storage_inst in [  # type: ignore
                 self.full_docs,
                 self.text_chunks,
+                self.chunk_extractions,
                 self.llm_response_cache,
                 self.entities_vdb,
                 self.relationships_vdb,
@@ -1169,7 +1637,10 @@ class LightRAG:
             ]
             if storage_inst is not None
         ]
-        await asyncio.gather(*tasks)
+        with metrics.PIPELINE_STAGE_SECONDS.time("persist"):
+            await asyncio.gather(*tasks)
+
+        await self._bump_data_version()
 
         log_message = "In memory DB persist to disk"
         logger.info(log_message)
@@ -1179,6 +1650,29 @@ class LightRAG:
                 pipeline_status["latest_message"] = log_message
                 pipeline_status["history_messages"].append(log_message)
 
+    @property
+    def _data_version_file(self) -> str:
+        return os.path.join(self.working_dir, "data_version.json")
+
+    async def _bump_data_version(self, evict_query_cache: bool = True) -> None:
+        """Invalidate cached query results after the indexed data has changed
+
+        Args:
+            evict_query_cache: Also schedule the background deletion of the cached
+                answers of older data versions (they can no longer be hit)
+        """
+        version = await bump_data_version(
+            self.namespace_prefix, self._data_version_file
+        )
+        logger.debug(f"Data version bumped to {version}")
+        if evict_query_cache and self._query_cache_evictor is not None:
+            self._query_cache_evictor.notify()
+
+    def _link_entities(self, names: Iterable[str]) -> None:
+        """Make new entity names linkable in queries right away"""
+        if self._entity_linker is not None:
+            self._entity_linker.add(names)
+
     def insert_custom_kg(
         self, custom_kg: dict[str, Any], full_doc_id: str = None
     ) -> None:
@@ -1345,6 +1839,8 @@ class LightRAG:
                 }
                 await self.relationships_vdb.upsert(data_for_vdb)
 
+            self._link_entities(dp["entity_name"] for dp in all_entities_data)
+
         except Exception as e:
             logger.error(f"Error in ainsert_custom_kg: {e}")
             raise
@@ -1390,7 +1886,7 @@ class LightRAG:
         Returns:
             str | AsyncIterator[str]: The result of the query execution, either as a full string or an async iterator for streaming.
         """
-        global_config = asdict(self)
+        global_config = self._query_global_config()
         param.original_query = query
 
         # 定义一个内部包装器来处理流和资源清理
@@ -1515,15 +2011,22 @@ class LightRAG:
             relationships_vdb=self.relationships_vdb,
             chunks_vdb=self.chunks_vdb,
             text_chunks_db=self.text_chunks,
-            global_config=asdict(self),
+            global_config=self._query_global_config(),
             hashing_kv=self.llm_response_cache,
         )
 
         await self._query_done()
         return response
 
+    def _query_global_config(self) -> dict[str, Any]:
+        """Global config of a query, with the query-time indexes of this instance"""
+        global_config = asdict(self)
+        global_config["entity_linker"] = self._entity_linker
+        global_config["keyword_extractor"] = self._keyword_extractor
+        return global_config
+
     async def _query_done(self):
-        await self.llm_response_cache.index_done_callback()
+        await self._write_behind.mark_dirty(self.llm_response_cache)
 
     async def aclear_cache(self, modes: list[str] | None = None) -> None:
         """Clear cache data from the LLM response cache storage.
@@ -1578,6 +2081,32 @@ class LightRAG:
         """Synchronous version of aclear_cache."""
         return always_get_an_event_loop().run_until_complete(self.aclear_cache(modes))
 
+    async def arecompute_node_degrees(self) -> int:
+        """Recompute the materialized degree of every graph node from its relations.
+
+        Needed once after enabling enable_materialized_degree on an existing graph
+        (until then the degree of older nodes is counted at query time), and to
+        repair degrees after the graph was edited outside LightRAG.
+
+        Returns:
+            int: The number of nodes updated, 0 if the graph storage does not
+                support materialized degrees.
+        """
+        graph = self.chunk_entity_relation_graph
+        if not graph.materialized_degree:
+            logger.warning(
+                f"Materialized node degrees are not enabled for {self.graph_storage}"
+            )
+            return 0
+        nodes = await graph.recompute_degrees()
+        await self._bump_data_version()
+        return nodes
+
+    def recompute_node_degrees(self) -> int:
+        """Synchronous version of arecompute_node_degrees."""
+        loop = always_get_an_event_loop()
+        return loop.run_until_complete(self.arecompute_node_degrees())
+
     async def get_docs_by_status(
         self, status: DocStatus
     ) -> dict[str, DocProcessingStatus]:
@@ -1687,6 +2216,7 @@ class LightRAG:
                 await self.chunks_vdb.delete(chunk_ids)
                 logger.debug(f"Deleting {len(chunk_ids)} chunks in in KV storage text_chunks")
                 await self.text_chunks.delete_by_doc_ids([doc_id])
+                await self._release_extraction_records(list(chunk_ids), doc_id)
 
             # 5. Find and process entities and relationships that have these chunks as source
             # Get all nodes and edges from the graph storage using storage-agnostic methods
@@ -1882,12 +2412,15 @@ class LightRAG:
         """
         from .utils_graph import adelete_by_entity
 
-        return await adelete_by_entity(
-            self.chunk_entity_relation_graph,
-            self.entities_vdb,
-            self.relationships_vdb,
-            entity_name,
-        )
+        try:
+            return await adelete_by_entity(
+                self.chunk_entity_relation_graph,
+                self.entities_vdb,
+                self.relationships_vdb,
+                entity_name,
+            )
+        finally:
+            await self._bump_data_version()
 
     def delete_by_entity(self, entity_name: str) -> None:
         loop = always_get_an_event_loop()
@@ -1902,12 +2435,15 @@ class LightRAG:
         """
         from .utils_graph import adelete_by_relation
 
-        return await adelete_by_relation(
-            self.chunk_entity_relation_graph,
-            self.relationships_vdb,
-            source_entity,
-            target_entity,
-        )
+        try:
+            return await adelete_by_relation(
+                self.chunk_entity_relation_graph,
+                self.relationships_vdb,
+                source_entity,
+                target_entity,
+            )
+        finally:
+            await self._bump_data_version()
 
     def delete_by_relation(self, source_entity: str, target_entity: str) -> None:
         loop = always_get_an_event_loop()
@@ -1980,6 +2516,121 @@ class LightRAG:
             include_vector_data,
         )
 
+    def rebuild_graph_from_extractions(
+        self, doc_ids: list[str] | None = None, clear_existing: bool = True
+    ) -> dict[str, int]:
+        """Sync version of arebuild_graph_from_extractions."""
+        loop = always_get_an_event_loop()
+        return loop.run_until_complete(
+            self.arebuild_graph_from_extractions(doc_ids, clear_existing)
+        )
+
+    async def arebuild_graph_from_extractions(
+        self, doc_ids: list[str] | None = None, clear_existing: bool = True
+    ) -> dict[str, int]:
+        """
+        Rebuild the knowledge graph and the entity / relation vectors from the stored
+        per-chunk extraction results, without extraction LLM calls. Summaries are still
+        generated when merged descriptions need one.
+
+        Args:
+            doc_ids: Only re-merge the chunks of these documents (requires clear_existing=False)
+            clear_existing: Drop the graph, entity and relation storages before rebuilding
+
+        Returns:
+            Number of chunks, entities and relations re-merged
+        """
+        if doc_ids is not None and clear_existing:
+            raise ValueError(
+                "Rebuilding a subset of documents requires clear_existing=False"
+            )
+
+        pipeline_status = await get_namespace_data("pipeline_status")
+        pipeline_status_lock = get_pipeline_status_lock()
+        async with pipeline_status_lock:
+            if pipeline_status.get("busy", False):
+                raise RuntimeError(
+                    "Document processing pipeline is busy, retry the rebuild later"
+                )
+            pipeline_status.update(
+                {
+                    "busy": True,
+                    "job_name": "Rebuild graph from extractions",
+                    "job_start": datetime.now(timezone.utc).isoformat(),
+                    "docs": 0,
+                    "batchs": 0,
+                    "cur_batch": 0,
+                    "request_pending": False,
+                    "unchanged_entities": 0,
+                    "unchanged_relations": 0,
+                    "deduplicated_chunks": 0,
+                    "latest_message": "",
+                }
+            )
+            del pipeline_status["history_messages"][:]
+
+        stats = {"chunks": 0, "entities": 0, "relations": 0}
+        try:
+            if clear_existing:
+                for storage in (
+                    self.chunk_entity_relation_graph,
+                    self.entities_vdb,
+                    self.relationships_vdb,
+                ):
+                    await storage.drop()
+
+            wanted_docs = set(doc_ids) if doc_ids is not None else None
+            batch_number = 0
+            async for records in self.chunk_extractions.get_all_iter(
+                batch_size=self.processing_batch_size
+            ):
+                if wanted_docs is not None:
+                    records = {
+                        chunk_key: record
+                        for chunk_key, record in records.items()
+                        if extraction_record_doc_ids(record) & wanted_docs
+                    }
+                if not records:
+                    continue
+                batch_number += 1
+                chunk_results = extraction_records_to_chunk_results(records)
+                stats["chunks"] += len(records)
+                stats["entities"] += sum(len(r["entities"]) for r in records.values())
+                stats["relations"] += sum(
+                    len(r["relations"]) for r in records.values()
+                )
+                with metrics.PIPELINE_STAGE_SECONDS.time("merge"):
+                    await merge_nodes_and_edges(
+                        chunk_results=chunk_results,
+                        knowledge_graph_inst=self.chunk_entity_relation_graph,
+                        entity_vdb=self.entities_vdb,
+                        relationships_vdb=self.relationships_vdb,
+                        global_config=asdict(self),
+                        pipeline_status=pipeline_status,
+                        pipeline_status_lock=pipeline_status_lock,
+                        llm_response_cache=self.llm_response_cache,
+                        current_file_number=batch_number,
+                        total_files=batch_number,
+                        file_path="stored extractions",
+                    )
+
+            await self._insert_done(
+                pipeline_status=pipeline_status,
+                pipeline_status_lock=pipeline_status_lock,
+            )
+            log_message = (
+                f"Rebuilt graph from {stats['chunks']} chunk extractions: "
+                f"{stats['entities']} entities, {stats['relations']} relations"
+            )
+            logger.info(log_message)
+            async with pipeline_status_lock:
+                pipeline_status["latest_message"] = log_message
+                pipeline_status["history_messages"].append(log_message)
+            return stats
+        finally:
+            async with pipeline_status_lock:
+                pipeline_status["busy"] = False
+
     def build_vector_index(self) -> None:
         """Sync version of abuild_vector_index."""
         loop = always_get_an_event_loop()
@@ -2087,14 +2738,20 @@ class LightRAG:
         """
         from .utils_graph import aedit_entity
 
-        return await aedit_entity(
-            self.chunk_entity_relation_graph,
-            self.entities_vdb,
-            self.relationships_vdb,
-            entity_name,
-            updated_data,
-            allow_rename,
-        )
+        try:
+            result = await aedit_entity(
+                self.chunk_entity_relation_graph,
+                self.entities_vdb,
+                self.relationships_vdb,
+                entity_name,
+                updated_data,
+                allow_rename,
+            )
+            if allow_rename and updated_data.get("entity_name"):
+                self._link_entities([updated_data["entity_name"]])
+            return result
+        finally:
+            await self._bump_data_version()
 
     def edit_entity(
         self, entity_name: str, updated_data: dict[str, str], allow_rename: bool = True
@@ -2121,14 +2778,17 @@ class LightRAG:
         """
         from .utils_graph import aedit_relation
 
-        return await aedit_relation(
-            self.chunk_entity_relation_graph,
-            self.entities_vdb,
-            self.relationships_vdb,
-            source_entity,
-            target_entity,
-            updated_data,
-        )
+        try:
+            return await aedit_relation(
+                self.chunk_entity_relation_graph,
+                self.entities_vdb,
+                self.relationships_vdb,
+                source_entity,
+                target_entity,
+                updated_data,
+            )
+        finally:
+            await self._bump_data_version()
 
     def edit_relation(
         self, source_entity: str, target_entity: str, updated_data: dict[str, Any]
@@ -2154,13 +2814,18 @@ class LightRAG:
         """
         from .utils_graph import acreate_entity
 
-        return await acreate_entity(
-            self.chunk_entity_relation_graph,
-            self.entities_vdb,
-            self.relationships_vdb,
-            entity_name,
-            entity_data,
-        )
+        try:
+            result = await acreate_entity(
+                self.chunk_entity_relation_graph,
+                self.entities_vdb,
+                self.relationships_vdb,
+                entity_name,
+                entity_data,
+            )
+            self._link_entities([entity_name])
+            return result
+        finally:
+            await self._bump_data_version()
 
     def create_entity(
         self, entity_name: str, entity_data: dict[str, Any]
@@ -2185,14 +2850,17 @@ class LightRAG:
         """
         from .utils_graph import acreate_relation
 
-        return await acreate_relation(
-            self.chunk_entity_relation_graph,
-            self.entities_vdb,
-            self.relationships_vdb,
-            source_entity,
-            target_entity,
-            relation_data,
-        )
+        try:
+            return await acreate_relation(
+                self.chunk_entity_relation_graph,
+                self.entities_vdb,
+                self.relationships_vdb,
+                source_entity,
+                target_entity,
+                relation_data,
+            )
+        finally:
+            await self._bump_data_version()
 
     def create_relation(
         self, source_entity: str, target_entity: str, relation_data: dict[str, Any]
@@ -2231,15 +2899,20 @@ class LightRAG:
         """
         from .utils_graph import amerge_entities
 
-        return await amerge_entities(
-            self.chunk_entity_relation_graph,
-            self.entities_vdb,
-            self.relationships_vdb,
-            source_entities,
-            target_entity,
-            merge_strategy,
-            target_entity_data,
-        )
+        try:
+            result = await amerge_entities(
+                self.chunk_entity_relation_graph,
+                self.entities_vdb,
+                self.relationships_vdb,
+                source_entities,
+                target_entity,
+                merge_strategy,
+                target_entity_data,
+            )
+            self._link_entities([target_entity])
+            return result
+        finally:
+            await self._bump_data_version()
 
     def merge_entities(
         self,
@@ -30,6 +30,8 @@ from lightrag.utils import (
     locate_json_string_body_from_string,
     safe_unicode_decode,
     logger,
+    get_retry_after,
+    notify_rate_limited,
 )
 from lightrag.types import GPTKeywordExtractionFormat, ModelResponse
 from lightrag.api import __api_version__
@@ -192,6 +194,8 @@ async def openai_complete_if_cache(
         raise
     except RateLimitError as e:
         logger.error(f"OpenAI API Rate Limit Error: {e}")
+        # Tell an adaptive limiter about every throttled attempt, not only the last one
+        notify_rate_limited(get_retry_after(e))
         await openai_async_client.close()  # Ensure client is closed
         raise
     except APITimeoutError as e:
@@ -452,7 +456,11 @@ async def openai_embed(
     )
 
     async with openai_async_client:
-        response = await openai_async_client.embeddings.create(
-            model=model, input=texts, encoding_format="float"
-        )
+        try:
+            response = await openai_async_client.embeddings.create(
+                model=model, input=texts, encoding_format="float"
+            )
+        except RateLimitError as e:
+            notify_rate_limited(get_retry_after(e))
+            raise
         return np.array([dp.embedding for dp in response.data])
@@ -0,0 +1,345 @@
+"""
+Lightweight in-process metrics registry with Prometheus text exposition.
+
+Collection is disabled unless ENABLE_METRICS=true: every recording call then
+returns after a single flag check, and storages are not instrumented. The flag
+is read from the environment on first use, after .env files were loaded, or set
+with registry.configure().
+Metrics are per process; with Gunicorn each worker serves its own values,
+labelled with its pid.
+"""
+
+from __future__ import annotations
+
+import inspect
+import os
+import time
+from functools import wraps
+from typing import Any
+
+DEFAULT_LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.005,
+    0.01,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+)
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames: tuple[str, ...], labelvalues: tuple, extra: str = ""):
+    pairs = [
+        f'{name}="{_escape(value)}"' for name, value in zip(labelnames, labelvalues)
+    ]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, registry: MetricsRegistry, name: str, documentation: str, labelnames=()):
+        self._registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple, Any] = {}
+
+    def _render_samples(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {value}"
+            for labels, value in self._values.items()
+        ]
+
+    def render(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+            *self._render_samples(),
+        ]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, *labelvalues):
+        if self._registry.enabled:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, *labelvalues):
+        if self._registry.enabled:
+            self._values[labelvalues] = value
+
+    def inc(self, amount: float = 1, *labelvalues):
+        if self._registry.enabled:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def dec(self, amount: float = 1, *labelvalues):
+        self.inc(-amount, *labelvalues)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, *args, buckets=DEFAULT_LATENCY_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labelvalues):
+        if not self._registry.enabled:
+            return
+        state = self._values.get(labelvalues)
+        if state is None:
+            # per-bucket (non cumulative) counts, +Inf last, then sum and count
+            state = self._values[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        index = 0
+        for bound in self.buckets:
+            if value <= bound:
+                break
+            index += 1
+        state[0][index] += 1
+        state[1] += value
+        state[2] += 1
+
+    def time(self, *labelvalues):
+        """Context manager observing the elapsed time of its block"""
+        if not self._registry.enabled:
+            return _NULL_TIMER
+        return _Timer(self, labelvalues)
+
+    def _render_samples(self) -> list[str]:
+        lines = []
+        for labels, (counts, total, count) in self._values.items():
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += bucket_count
+                le = f'le="{bound}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}"
+                )
+            label_str = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_str} {total}")
+            lines.append(f"{self.name}_count{label_str} {count}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("_histogram", "_labelvalues", "_start")
+
+    def __init__(self, histogram: Histogram, labelvalues: tuple):
+        self._histogram = histogram
+        self._labelvalues = labelvalues
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._histogram.observe(time.perf_counter() - self._start, *self._labelvalues)
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return None
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class MetricsRegistry:
+    """Registry of named metrics, rendered in Prometheus text format"""
+
+    def __init__(self, enabled: bool | None = None):
+        self._enabled = enabled
+        self._metrics: dict[str, _Metric] = {}
+
+    @property
+    def enabled(self) -> bool:
+        if self._enabled is None:
+            self._enabled = os.getenv("ENABLE_METRICS", "false").lower() in (
+                "true",
+                "1",
+                "yes",
+                "t",
+                "on",
+            )
+        return self._enabled
+
+    def configure(self, enabled: bool | None = None) -> None:
+        """Enable or disable collection; None reads ENABLE_METRICS again"""
+        self._enabled = enabled
+
+    def _get_or_create(self, cls, name: str, documentation: str, labelnames, **kwargs):
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = cls(
+                self, name, documentation, labelnames, **kwargs
+            )
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames=()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames=(),
+        buckets=DEFAULT_LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._get_or_create(
+            Histogram, name, documentation, labelnames, buckets=buckets
+        )
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format (0.0.4)"""
+        lines = [
+            "# HELP lightrag_process_info Process serving these metrics",
+            "# TYPE lightrag_process_info gauge",
+            f'lightrag_process_info{{pid="{os.getpid()}"}} 1',
+        ]
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        for metric in self._metrics.values():
+            metric._values.clear()
+
+
+# ENABLE_METRICS is read on first use: this module is imported before .env is loaded
+registry = MetricsRegistry()
+
+# Shared lock wait / hold times, recorded by UnifiedLock
+LOCK_WAIT_SECONDS = registry.histogram(
+    "lightrag_lock_wait_seconds", "Time spent waiting to acquire a lock", ("lock",)
+)
+LOCK_HOLD_SECONDS = registry.histogram(
+    "lightrag_lock_hold_seconds", "Time a lock was held", ("lock",)
+)
+
+# Priority limiter in front of the LLM and embedding functions
+LIMITER_QUEUE_DEPTH = registry.gauge(
+    "lightrag_limiter_queue_depth", "Calls waiting in the priority limiter", ("func",)
+)
+LIMITER_IN_FLIGHT = registry.gauge(
+    "lightrag_limiter_in_flight", "Calls being executed by the limiter", ("func",)
+)
+LIMITER_LIMIT = registry.gauge(
+    "lightrag_limiter_concurrency_limit",
+    "Current concurrency limit of an adaptive limiter",
+    ("func",),
+)
+LIMITER_QUEUE_WAIT_SECONDS = registry.histogram(
+    "lightrag_limiter_queue_wait_seconds",
+    "Time a call waited in the priority limiter before execution",
+    ("func",),
+)
+
+# Single-flight deduplication in front of the LLM and embedding functions
+SINGLE_FLIGHT_COALESCED = registry.counter(
+    "lightrag_single_flight_coalesced_total",
+    "Calls that joined an identical in-flight call instead of being sent",
+    ("func",),
+)
+
+# Embedding batcher
+EMBEDDING_BATCH_SIZE = registry.histogram(
+    "lightrag_embedding_batch_size",
+    "Texts per embedding request sent by the embedding batcher",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512),
+)
+
+# Embedding cache
+EMBEDDING_CACHE_REQUESTS = registry.counter(
+    "lightrag_embedding_cache_requests_total",
+    "Texts looked up in the embedding cache",
+    ("result",),
+)
+EMBEDDING_CACHE_ENTRIES = registry.gauge(
+    "lightrag_embedding_cache_entries", "Embeddings held by the embedding cache"
+)
+
+# Query context cache
+QUERY_CONTEXT_CACHE_REQUESTS = registry.counter(
+    "lightrag_query_context_cache_requests_total",
+    "Query contexts looked up in the query context cache",
+    ("result",),
+)
+
+# Document pipeline
+PIPELINE_STAGE_SECONDS = registry.histogram(
+    "lightrag_pipeline_stage_seconds",
+    "Duration of document pipeline stages",
+    ("stage",),
+)
+
+# Storage calls
+STORAGE_CALL_SECONDS = registry.histogram(
+    "lightrag_storage_call_seconds",
+    "Latency of storage method calls",
+    ("namespace", "method"),
+)
+STORAGE_CALL_ERRORS = registry.counter(
+    "lightrag_storage_call_errors_total",
+    "Storage method calls that raised",
+    ("namespace", "method"),
+)
+
+
+def instrument_storage(storage: Any) -> Any:
+    """Record latency and errors of every public async method of a storage instance
+
+    Methods are wrapped on the instance, so the storage class and other instances are
+    untouched. Does nothing while metrics are disabled.
+    """
+    if not registry.enabled:
+        return storage
+
+    namespace = getattr(storage, "namespace", type(storage).__name__)
+    for name, method in inspect.getmembers(type(storage), inspect.iscoroutinefunction):
+        if name.startswith("_") or name in ("initialize", "finalize"):
+            continue
+
+        def make_wrapper(bound, method_name):
+            @wraps(bound)
+            async def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await bound(*args, **kwargs)
+                except Exception:
+                    STORAGE_CALL_ERRORS.inc(1, namespace, method_name)
+                    raise
+                finally:
+                    STORAGE_CALL_SECONDS.observe(
+                        time.perf_counter() - start, namespace, method_name
+                    )
+
+            return wrapper
+
+        setattr(storage, name, make_wrapper(getattr(storage, name), name))
+    return storage
@@ -18,8 +18,10 @@ from .utils import (
     pack_user_ass_to_openai_messages,
     split_string_by_multi_markers,
     truncate_list_by_token_size,
-    process_combine_contexts,
+    combine_context_rows,
+    context_rows_to_json,
     compute_args_hash,
+    query_context_cache,
     handle_cache,
     save_to_cache,
     CacheData,
@@ -126,11 +128,26 @@ async def _handle_entity_relation_summary(
     pipeline_status: dict = None,
     pipeline_status_lock=None,
     llm_response_cache: BaseKVStorage | None = None,
+    previous_description: str | None = None,
+    summary_batcher: SummaryBatcher | None = None,
 ) -> str:
     """Handle entity relation summary
     For each entity or relation, input is the combined description of already existing description and new description.
     If too long, use LLM to summarize.
+
+    In incremental summary mode only the previous summary plus the new fragments are
+    sent, in token bounded steps, through summary_batcher when one is given.
     """
+    if global_config.get("summary_mode") == "incremental":
+        return await _handle_incremental_summary(
+            entity_or_relation_name,
+            description,
+            previous_description,
+            global_config,
+            llm_response_cache,
+            summary_batcher,
+        )
+
     use_llm_func: callable = global_config["llm_model_func"]
     # Apply higher priority (8) to entity/relation summary tasks
     use_llm_func = partial(use_llm_func, _priority=8)
@@ -170,6 +187,205 @@ async def _handle_entity_relation_summary(
     return summary
 
 
+def _needs_summary(description: str, num_fragment: int, global_config: dict) -> bool:
+    """Whether a merged description is due for an LLM summary"""
+    if num_fragment >= global_config["force_llm_summary_on_merge"]:
+        return True
+    # Incremental mode also bounds the buffer of fragments added since the last summary
+    return (
+        global_config.get("summary_mode") == "incremental"
+        and num_fragment > 1
+        and len(global_config["tokenizer"].encode(description))
+        > global_config["summary_to_max_tokens"]
+        + global_config["summary_delta_max_tokens"]
+    )
+
+
+def _group_fragments_by_tokens(
+    fragments: list[str], tokenizer: Tokenizer, max_tokens: int
+) -> list[list[str]]:
+    """Split description fragments into consecutive groups of at most max_tokens tokens"""
+    groups: list[list[str]] = []
+    group: list[str] = []
+    group_tokens = 0
+    for fragment in fragments:
+        tokens = len(tokenizer.encode(fragment))
+        if group and group_tokens + tokens > max_tokens:
+            groups.append(group)
+            group, group_tokens = [], 0
+        group.append(fragment)
+        group_tokens += tokens
+    if group:
+        groups.append(group)
+    return groups
+
+
+async def _handle_incremental_summary(
+    entity_or_relation_name: str,
+    description: str,
+    previous_description: str | None,
+    global_config: dict,
+    llm_response_cache: BaseKVStorage | None = None,
+    summary_batcher: SummaryBatcher | None = None,
+) -> str:
+    """Fold the new fragments of a description into its previous summary
+
+    A stored description without GRAPH_FIELD_SEP is a summary (or a single fragment)
+    and is kept as the base; every other fragment is new information, added in groups
+    of at most summary_delta_max_tokens tokens per LLM request.
+    """
+    summary = None
+    if previous_description and GRAPH_FIELD_SEP not in previous_description:
+        summary = previous_description
+    delta = [
+        fragment
+        for fragment in description.split(GRAPH_FIELD_SEP)
+        if fragment and fragment != summary
+    ]
+    if not delta:
+        return summary or description
+
+    if summary_batcher is None:
+        # Nothing to batch with: send the request right away
+        summary_batcher = SummaryBatcher(global_config, llm_response_cache, window=0)
+    logger.debug(f"Trigger incremental summary: {entity_or_relation_name}")
+    for group in _group_fragments_by_tokens(
+        delta,
+        global_config["tokenizer"],
+        global_config["summary_delta_max_tokens"],
+    ):
+        summary = await summary_batcher.summarize(
+            entity_or_relation_name, summary, group
+        )
+    return summary
+
+
+class SummaryBatcher:
+    """Pack incremental summary requests of many entities / relations into one LLM call
+
+    Requests made within `window` seconds are sent together, at most
+    summary_batch_size per call, using the summarize_entity_descriptions_incremental
+    prompt. Requests the LLM left out of its answer are retried one by one.
+    """
+
+    def __init__(
+        self,
+        global_config: dict,
+        llm_response_cache: BaseKVStorage | None = None,
+        window: float = 0.05,
+    ):
+        self.global_config = global_config
+        self.llm_response_cache = llm_response_cache
+        self.batch_size = max(1, global_config.get("summary_batch_size", 1))
+        self.window = window
+        self._pending: list[tuple[str, str | None, list[str], asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def summarize(
+        self, name: str, summary: str | None, fragments: list[str]
+    ) -> str:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((name, summary, fragments, future))
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._pending:
+            batch = self._pending[: self.batch_size]
+            self._pending = self._pending[self.batch_size :]
+            task = asyncio.get_running_loop().create_task(self._run_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def _build_prompt(self, batch: list) -> str:
+        entities = "\n\n".join(
+            f"实体编号: {index}\n实体: {name}\n已有摘要: {summary or '无'}\n"
+            f"新增描述: {fragments}"
+            for index, (name, summary, fragments, _) in enumerate(batch, start=1)
+        )
+        return PROMPTS["summarize_entity_descriptions_incremental"].format(
+            language=self.global_config["addon_params"].get(
+                "language", PROMPTS["DEFAULT_LANGUAGE"]
+            ),
+            tuple_delimiter=PROMPTS["DEFAULT_TUPLE_DELIMITER"],
+            record_delimiter=PROMPTS["DEFAULT_RECORD_DELIMITER"],
+            completion_delimiter=PROMPTS["DEFAULT_COMPLETION_DELIMITER"],
+            entities=entities,
+        )
+
+    @staticmethod
+    def _parse(response: str, count: int) -> dict[int, str]:
+        summaries = {}
+        response = response.replace(PROMPTS["DEFAULT_COMPLETION_DELIMITER"], "")
+        for record in split_string_by_multi_markers(
+            response, [PROMPTS["DEFAULT_RECORD_DELIMITER"]]
+        ):
+            match = re.search(r"\((.*)\)", record, re.DOTALL)
+            if match is None:
+                continue
+            attributes = split_string_by_multi_markers(
+                match.group(1), [PROMPTS["DEFAULT_TUPLE_DELIMITER"]]
+            )
+            if len(attributes) < 3 or '"summary"' not in attributes[0]:
+                continue
+            index = clean_str(attributes[1]).strip('"')
+            text = clean_str(PROMPTS["DEFAULT_TUPLE_DELIMITER"].join(attributes[2:]))
+            if index.isdigit() and 1 <= int(index) <= count and text:
+                summaries[int(index)] = text
+        if count == 1 and not summaries and response.strip():
+            # A single summary answered as plain text, like the full summary prompt
+            summaries[1] = response.strip()
+        return summaries
+
+    async def _call_llm(self, batch: list) -> str:
+        use_llm_func = partial(self.global_config["llm_model_func"], _priority=8)
+        return await use_llm_func_with_cache(
+            self._build_prompt(batch),
+            use_llm_func,
+            llm_response_cache=self.llm_response_cache,
+            max_tokens=self.global_config["summary_to_max_tokens"] * len(batch),
+            cache_type="extract",
+        )
+
+    async def _run_batch(self, batch: list):
+        try:
+            summaries = self._parse(await self._call_llm(batch), len(batch))
+            for index, (name, _, _, future) in enumerate(batch, start=1):
+                if index not in summaries and len(batch) > 1:
+                    logger.debug(f"Incremental summary missing for {name}, retrying")
+                    single = [batch[index - 1]]
+                    summaries[index] = self._parse(
+                        await self._call_llm(single), 1
+                    ).get(1)
+                text = summaries.get(index)
+                if text is None:
+                    # Unparseable answer: keep the previous summary and new fragments
+                    _, summary, fragments, _ = batch[index - 1]
+                    text = GRAPH_FIELD_SEP.join(
+                        ([summary] if summary else []) + fragments
+                    )
+                    logger.warning(f"Incremental summary failed for {name}")
+                if not future.done():
+                    future.set_result(text)
+        except BaseException as e:
+            for _, _, _, future in batch:
+                if not future.done():
+                    if isinstance(e, asyncio.CancelledError):
+                        future.cancel()
+                    else:
+                        future.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+
+
 async def _handle_single_entity_extraction(
     record_attributes: list[str],
     chunk_key: str,
@@ -289,6 +505,37 @@ async def _handle_single_relationship_extraction(
     )
 
 
+def _merge_unchanged(stored: dict, merged: dict, set_fields: tuple[str, ...]) -> bool:
+    """Whether a merged node / edge carries the same data as its stored version
+
+    Fields in set_fields hold GRAPH_FIELD_SEP separated values built from sets, so
+    their order is arbitrary: they are compared as sets and, when equal, the stored
+    string is kept in merged. Other fields are compared as is; created_at is ignored.
+    """
+    for field, value in merged.items():
+        if field == "created_at":
+            continue
+        old_value = stored.get(field)
+        if field in set_fields:
+            if set(
+                split_string_by_multi_markers(old_value or "", [GRAPH_FIELD_SEP])
+            ) != set(split_string_by_multi_markers(value or "", [GRAPH_FIELD_SEP])):
+                return False
+        elif field == "keywords":
+            if {k.strip() for k in (old_value or "").split(",") if k.strip()} != {
+                k.strip() for k in (value or "").split(",") if k.strip()
+            }:
+                return False
+        elif field == "weight":
+            if old_value is None or abs(float(old_value) - float(value)) > 1e-9:
+                return False
+        elif old_value != value:
+            return False
+    for field in set_fields:
+        merged[field] = stored[field]
+    return True
+
+
 async def _merge_nodes_then_upsert(
     entity_name: str,
     nodes_data: list[dict],
@@ -297,6 +544,7 @@ async def _merge_nodes_then_upsert(
     pipeline_status: dict = None,
     pipeline_status_lock=None,
     llm_response_cache: BaseKVStorage | None = None,
+    summary_batcher: SummaryBatcher | None = None,
 ):
     """
        去重函数，它识别并合并来自原始文本中不同片段的相同实体和关系。
@@ -309,6 +557,7 @@ async def _merge_nodes_then_upsert(
         pipeline_status:
         pipeline_status_lock:
         llm_response_cache:
+        summary_batcher:
 
     Returns:
 
@@ -349,13 +598,11 @@ async def _merge_nodes_then_upsert(
         set([dp["file_path"] for dp in nodes_data] + already_file_paths)
     )
 
-    force_llm_summary_on_merge = global_config["force_llm_summary_on_merge"]
-
     num_fragment = description.count(GRAPH_FIELD_SEP) + 1
     num_new_fragment = len(set([dp["description"] for dp in nodes_data]))
 
     if num_fragment > 1:
-        if num_fragment >= force_llm_summary_on_merge:
+        if _needs_summary(description, num_fragment, global_config):
             status_message = f"LLM merge N: {entity_name} | {num_new_fragment}+{num_fragment-num_new_fragment}"
             logger.info(status_message)
             if pipeline_status is not None and pipeline_status_lock is not None:
@@ -369,6 +616,8 @@ async def _merge_nodes_then_upsert(
                 pipeline_status,
                 pipeline_status_lock,
                 llm_response_cache,
+                previous_description=(already_node or {}).get("description"),
+                summary_batcher=summary_batcher,
             )
         else:
             status_message = f"Merge N: {entity_name} | {num_new_fragment}+{num_fragment-num_new_fragment}"
@@ -384,14 +633,19 @@ async def _merge_nodes_then_upsert(
         description=description,
         source_id=source_id,
         file_path=file_path,
-        created_at=int(time.time()),
+        created_at=(already_node or {}).get("created_at") or int(time.time()),
     )
-    await knowledge_graph_inst.upsert_node(
-        entity_name,
-        node_data=node_data,
+    # Skip the graph write (and the caller the vector write) when nothing changed
+    changed = already_node is None or not _merge_unchanged(
+        already_node, node_data, ("source_id", "file_path")
     )
+    if changed:
+        await knowledge_graph_inst.upsert_node(
+            entity_name,
+            node_data=node_data,
+        )
     node_data["entity_name"] = entity_name
-    return node_data
+    return node_data, changed
 
 
 async def _merge_edges_then_upsert(
@@ -403,9 +657,10 @@ async def _merge_edges_then_upsert(
     pipeline_status: dict = None,
     pipeline_status_lock=None,
     llm_response_cache: BaseKVStorage | None = None,
+    summary_batcher: SummaryBatcher | None = None,
 ):
     if src_id == tgt_id:
-        return None
+        return None, False
 
     already_weights = []
     already_source_ids = []
@@ -413,6 +668,7 @@ async def _merge_edges_then_upsert(
     already_keywords = []
     already_file_paths = []
 
+    already_edge = None
     if await knowledge_graph_inst.has_edge(src_id, tgt_id):
         already_edge = await knowledge_graph_inst.get_edge(src_id, tgt_id)
         # Handle the case where get_edge returns None or missing fields
@@ -449,7 +705,15 @@ async def _merge_edges_then_upsert(
                 )
 
     # Process edges_data with None checks
-    weight = sum([dp["weight"] for dp in edges_data] + already_weights)
+    # Weights of chunks already merged into the edge (re-processed documents) are not counted again
+    weight = sum(
+        [
+            dp["weight"]
+            for dp in edges_data
+            if dp.get("source_id") not in already_source_ids
+        ]
+        + already_weights
+    )
     description = GRAPH_FIELD_SEP.join(
         sorted(
             set(
@@ -501,15 +765,13 @@ async def _merge_edges_then_upsert(
                 },
             )
 
-    force_llm_summary_on_merge = global_config["force_llm_summary_on_merge"]
-
     num_fragment = description.count(GRAPH_FIELD_SEP) + 1
     num_new_fragment = len(
         set([dp["description"] for dp in edges_data if dp.get("description")])
     )
 
     if num_fragment > 1:
-        if num_fragment >= force_llm_summary_on_merge:
+        if _needs_summary(description, num_fragment, global_config):
             status_message = f"LLM merge E: {src_id} - {tgt_id} | {num_new_fragment}+{num_fragment-num_new_fragment}"
             logger.info(status_message)
             if pipeline_status is not None and pipeline_status_lock is not None:
@@ -523,6 +785,8 @@ async def _merge_edges_then_upsert(
                 pipeline_status,
                 pipeline_status_lock,
                 llm_response_cache,
+                previous_description=(already_edge or {}).get("description"),
+                summary_batcher=summary_batcher,
             )
         else:
             status_message = f"Merge E: {src_id} - {tgt_id} | {num_new_fragment}+{num_fragment-num_new_fragment}"
@@ -532,29 +796,118 @@ async def _merge_edges_then_upsert(
                     pipeline_status["latest_message"] = status_message
                     pipeline_status["history_messages"].append(status_message)
 
-    await knowledge_graph_inst.upsert_edge(
-        src_id,
-        tgt_id,
-        edge_data=dict(
-            weight=weight,
-            description=description,
-            keywords=keywords,
-            source_id=source_id,
-            file_path=file_path,
-            created_at=int(time.time()),
-        ),
+    merged_edge = dict(
+        weight=weight,
+        description=description,
+        keywords=keywords,
+        source_id=source_id,
+        file_path=file_path,
+        created_at=(already_edge or {}).get("created_at") or int(time.time()),
+    )
+    # Skip the graph write (and the caller the vector write) when nothing changed
+    changed = not already_edge or not _merge_unchanged(
+        already_edge, merged_edge, ("source_id", "file_path")
     )
+    if changed:
+        await knowledge_graph_inst.upsert_edge(
+            src_id,
+            tgt_id,
+            edge_data=merged_edge,
+        )
 
     edge_data = dict(
         src_id=src_id,
         tgt_id=tgt_id,
         description=description,
         keywords=keywords,
-        source_id=source_id,
-        file_path=file_path,
+        source_id=merged_edge["source_id"],
+        file_path=merged_edge["file_path"],
     )
 
-    return edge_data
+    return edge_data, changed
+
+
+def chunk_results_to_extraction_records(
+    chunks: dict[str, TextChunkSchema], chunk_results: list
+) -> dict[str, dict[str, Any]]:
+    """Compact per-chunk records of parsed extraction results, keyed by chunk id
+
+    Entities are stored as [name, type, description] and relations as
+    [src, tgt, weight, description, keywords]; source_id is the record key and
+    file_path is kept once per record. full_doc_ids lists the documents using the
+    chunk, a record is deleted with the last of them.
+    """
+    records = {}
+    for (chunk_key, chunk_dp), (maybe_nodes, maybe_edges) in zip(
+        chunks.items(), chunk_results
+    ):
+        full_doc_id = chunk_dp.get("full_doc_id", "")
+        records[chunk_key] = {
+            "full_doc_id": full_doc_id,
+            "full_doc_ids": [full_doc_id] if full_doc_id else [],
+            "file_path": chunk_dp.get("file_path", "unknown_source"),
+            "entities": [
+                [dp["entity_name"], dp["entity_type"], dp["description"]]
+                for entities in maybe_nodes.values()
+                for dp in entities
+            ],
+            "relations": [
+                [
+                    dp["src_id"],
+                    dp["tgt_id"],
+                    dp["weight"],
+                    dp["description"],
+                    dp["keywords"],
+                ]
+                for edges in maybe_edges.values()
+                for dp in edges
+            ],
+        }
+    return records
+
+
+def extraction_record_doc_ids(record: dict[str, Any]) -> set[str]:
+    """Ids of the documents using an extraction record"""
+    doc_ids = set(record.get("full_doc_ids") or ())
+    if record.get("full_doc_id"):
+        # records written before full_doc_ids only name their first document
+        doc_ids.add(record["full_doc_id"])
+    return doc_ids
+
+
+def extraction_records_to_chunk_results(records: dict[str, dict[str, Any]]) -> list:
+    """Turn stored extraction records back into extract_entities() chunk results"""
+    chunk_results = []
+    for chunk_key, record in records.items():
+        file_path = record.get("file_path", "unknown_source")
+        maybe_nodes = defaultdict(list)
+        maybe_edges = defaultdict(list)
+        for entity_name, entity_type, description in record.get("entities", []):
+            maybe_nodes[entity_name].append(
+                dict(
+                    entity_name=entity_name,
+                    entity_type=entity_type,
+                    description=description,
+                    source_id=chunk_key,
+                    file_path=file_path,
+                )
+            )
+        for src_id, tgt_id, weight, description, keywords in record.get(
+            "relations", []
+        ):
+            maybe_edges[(src_id, tgt_id)].append(
+                dict(
+                    src_id=src_id,
+                    tgt_id=tgt_id,
+                    weight=weight,
+                    description=description,
+                    keywords=keywords,
+                    source_id=chunk_key,
+                    file_path=file_path,
+                )
+            )
+        chunk_results.append((maybe_nodes, maybe_edges))
+    return chunk_results
 
 
 async def merge_nodes_and_edges(
@@ -631,38 +984,100 @@ async def merge_nodes_and_edges(
             pipeline_status["latest_message"] = log_message
             pipeline_status["history_messages"].append(log_message)
 
-        # Process and update all entities at once
-        for entity_name, entities in all_nodes.items():
-            entity_data = await _merge_nodes_then_upsert(
-                entity_name,
-                entities,
-                knowledge_graph_inst,
-                global_config,
-                pipeline_status,
-                pipeline_status_lock,
-                llm_response_cache,
+        # In incremental summary mode, entities and relations are merged concurrently
+        # so that their summary requests can share LLM calls. Enough merges run at
+        # once to fill a summary batch per LLM slot, no more, to bound the load on
+        # the graph storage
+        summary_batcher = None
+        if global_config.get("summary_mode") == "incremental":
+            summary_batcher = SummaryBatcher(global_config, llm_response_cache)
+            semaphore = asyncio.Semaphore(
+                max(1, global_config.get("llm_model_max_async", 1))
+                * summary_batcher.batch_size
             )
-            entities_data.append(entity_data)
+
+            async def bounded(merge):
+                async with semaphore:
+                    return await merge()
+
+            async def run_merges(merges):
+                return await asyncio.gather(*(bounded(merge) for merge in merges))
+        else:
+
+            async def run_merges(merges):
+                return [await merge() for merge in merges]
+
+        # Process and update all entities at once
+        unchanged_entities = 0
+        node_results = await run_merges(
+            [
+                partial(
+                    _merge_nodes_then_upsert,
+                    entity_name,
+                    entities,
+                    knowledge_graph_inst,
+                    global_config,
+                    pipeline_status,
+                    pipeline_status_lock,
+                    llm_response_cache,
+                    summary_batcher,
+                )
+                for entity_name, entities in all_nodes.items()
+            ]
+        )
+        for entity_data, changed in node_results:
+            if changed:
+                entities_data.append(entity_data)
+            else:
+                unchanged_entities += 1
 
         # Process and update all relationships at once
-        for edge_key, edges in all_edges.items():
-            edge_data = await _merge_edges_then_upsert(
-                edge_key[0],
-                edge_key[1],
-                edges,
-                knowledge_graph_inst,
-                global_config,
-                pipeline_status,
-                pipeline_status_lock,
-                llm_response_cache,
-            )
-            if edge_data is not None:
+        unchanged_relations = 0
+        edge_results = await run_merges(
+            [
+                partial(
+                    _merge_edges_then_upsert,
+                    edge_key[0],
+                    edge_key[1],
+                    edges,
+                    knowledge_graph_inst,
+                    global_config,
+                    pipeline_status,
+                    pipeline_status_lock,
+                    llm_response_cache,
+                    summary_batcher,
+                )
+                for edge_key, edges in all_edges.items()
+            ]
+        )
+        for edge_data, changed in edge_results:
+            if edge_data is None:
+                continue
+            if changed:
                 relationships_data.append(edge_data)
+            else:
+                unchanged_relations += 1
 
         # Update total counts
         total_entities_count = len(entities_data)
         total_relations_count = len(relationships_data)
 
+        if unchanged_entities or unchanged_relations:
+            log_message = f"Skipped {unchanged_entities} unchanged entities and {unchanged_relations} unchanged relations {current_file_number}/{total_files}: {file_path}"
+            logger.info(log_message)
+            if pipeline_status is not None:
+                async with pipeline_status_lock:
+                    pipeline_status["unchanged_entities"] = (
+                        pipeline_status.get("unchanged_entities", 0)
+                        + unchanged_entities
+                    )
+                    pipeline_status["unchanged_relations"] = (
+                        pipeline_status.get("unchanged_relations", 0)
+                        + unchanged_relations
+                    )
+                    pipeline_status["latest_message"] = log_message
+                    pipeline_status["history_messages"].append(log_message)
+
         log_message = f"Updating {total_entities_count} entities  {current_file_number}/{total_files}: {file_path}"
         logger.info(log_message)
         if pipeline_status is not None:
@@ -939,6 +1354,189 @@ async def extract_entities(
     return chunk_results
 
 
+# Modes whose LLM cache holds query answers (keyed by compute_query_cache_hash)
+QUERY_CACHE_MODES = ("naive", "local", "global", "hybrid", "mix")
+
+_QUERY_CACHE_VERSION = re.compile(r"^v(\d+)-")
+
+
+def _model_func_key(model_func, global_config: dict[str, str]) -> str:
+    """Stable identifier of the LLM answering a query
+
+    QueryParam.model_func is identified by the module and name of the function
+    and the model-selecting arguments bound with functools.partial (credentials
+    excluded); the default LLM by llm_model_name.
+    """
+    if model_func is None:
+        return f"default:{global_config.get('llm_model_name', '')}"
+    bound_args: list = []
+    bound_kwargs: dict[str, Any] = {}
+    target = model_func
+    while isinstance(target, partial):
+        bound_args = list(target.args) + bound_args
+        bound_kwargs = {**target.keywords, **bound_kwargs}
+        target = target.func
+    scalars = (str, int, float, bool)
+    return json.dumps(
+        [
+            getattr(target, "__module__", None) or type(target).__module__,
+            getattr(target, "__qualname__", None) or type(target).__qualname__,
+            getattr(model_func, "model_name", None),
+            [arg for arg in bound_args if isinstance(arg, scalars)],
+            {
+                name: value
+                for name, value in sorted(bound_kwargs.items())
+                if isinstance(value, scalars)
+                and not any(word in name for word in ("key", "secret", "token"))
+            },
+        ]
+    )
+
+
+async def compute_query_cache_hash(
+    query: str,
+    query_param: QueryParam,
+    global_config: dict[str, str],
+    system_prompt: str | None = None,
+    **extra: Any,
+) -> str:
+    """Cache key of a query result
+
+    Covers every QueryParam field that changes the answer, the LLM, the system
+    prompt and the data version of the workspace. The data version is bumped
+    whenever the indexed data changes, so answers cached before are never served
+    again; the key starts with "v<data version>-" so that evict_stale_query_cache
+    can find and delete them.
+    """
+    from .kg.shared_storage import get_data_version
+
+    data_version = await get_data_version(global_config.get("namespace_prefix", ""))
+    params = {
+        "only_need_context": query_param.only_need_context,
+        "only_need_prompt": query_param.only_need_prompt,
+        "response_type": query_param.response_type,
+        "top_k": query_param.top_k,
+        "max_token_for_text_unit": query_param.max_token_for_text_unit,
+        "max_token_for_global_context": query_param.max_token_for_global_context,
+        "max_token_for_local_context": query_param.max_token_for_local_context,
+        "hl_keywords": query_param.hl_keywords,
+        "ll_keywords": query_param.ll_keywords,
+        "conversation_history": query_param.conversation_history,
+        "history_turns": query_param.history_turns,
+        "ids": query_param.ids,
+        "user_prompt": query_param.user_prompt,
+        "cosine_better_than_threshold": query_param.cosine_better_than_threshold,
+        "keyword_extractor": query_param.keyword_extractor,
+        "model": _model_func_key(query_param.model_func, global_config),
+        "system_prompt": system_prompt,
+        **extra,
+    }
+    args_hash = compute_args_hash(
+        query_param.mode,
+        query,
+        json.dumps(params, sort_keys=True, ensure_ascii=False, default=str),
+        data_version,
+        cache_type="query",
+    )
+    return f"v{data_version}-{args_hash}"
+
+
+async def evict_stale_query_cache(
+    hashing_kv: BaseKVStorage, global_config: dict[str, str]
+) -> int:
+    """Delete the cached query answers of older data versions
+
+    Answers are recognized by their "v<data version>-" key; untagged entries of
+    cache_type "query" predate the tag and are deleted as well. Keyword and
+    extraction cache entries are kept.
+
+    Returns:
+        The number of deleted entries
+    """
+    from .kg.shared_storage import get_data_version
+
+    current = await get_data_version(global_config.get("namespace_prefix", ""))
+    stale: dict[str, list[str]] = {}
+    for mode in QUERY_CACHE_MODES:
+        async for batch in hashing_kv.get_all_iter(prefix=mode):
+            for cache_id, entry in (batch.get(mode) or {}).items():
+                match = _QUERY_CACHE_VERSION.match(cache_id)
+                if match:
+                    if int(match.group(1)) != current:
+                        stale.setdefault(mode, []).append(cache_id)
+                elif isinstance(entry, dict) and entry.get("cache_type") == "query":
+                    stale.setdefault(mode, []).append(cache_id)
+    if stale:
+        await hashing_kv.drop_cache_entries(stale)
+    return sum(len(ids) for ids in stale.values())
+
+
+class StaleQueryCacheEvictor:
+    """Run evict_stale_query_cache in the background after data changes
+
+    Answers of older data versions can no longer be hit, so their eviction only
+    reclaims space and never runs inline in the insert or graph edit paths. A data
+    change schedules a run that starts `interval` seconds after the previous one,
+    or right away once `max_stale_versions` data versions have accumulated since.
+    An interval <= 0 disables eviction.
+    """
+
+    def __init__(
+        self,
+        hashing_kv: BaseKVStorage,
+        global_config: dict[str, str],
+        interval: float,
+        max_stale_versions: int,
+    ):
+        self.hashing_kv = hashing_kv
+        self.global_config = global_config
+        self.interval = interval
+        self.max_stale_versions = max(1, max_stale_versions)
+        self._stale_versions = 0
+        self._last_run = time.monotonic()
+        self._wake: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+
+    def notify(self) -> None:
+        """Record a data version change and schedule an eviction"""
+        if self.interval <= 0:
+            return
+        self._stale_versions += 1
+        if self._wake is None:
+            self._wake = asyncio.Event()
+        if self._stale_versions >= self.max_stale_versions:
+            self._wake.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while self._stale_versions:
+            delay = self._last_run + self.interval - time.monotonic()
+            if delay > 0 and self._stale_versions < self.max_stale_versions:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+            self._stale_versions = 0
+            self._last_run = time.monotonic()
+            try:
+                evicted = await evict_stale_query_cache(
+                    self.hashing_kv, self.global_config
+                )
+            except Exception as e:
+                logger.warning(f"Failed to evict stale query cache entries: {e}")
+                continue
+            if evicted:
+                logger.info(f"Evicted {evicted} cached answers of older data versions")
+
+    async def close(self) -> None:
+        task, self._task = self._task, None
+        if task is not None and not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+
 async def kg_query(
     query: str,
     knowledge_graph_inst: BaseGraphStorage,
@@ -959,51 +1557,76 @@ async def kg_query(
         use_model_func = partial(use_model_func, _priority=5)
 
     # Handle cache
-    args_hash = compute_args_hash(query_param.mode, query, cache_type="query")
+    args_hash = await compute_query_cache_hash(
+        query, query_param, global_config, system_prompt
+    )
     cached_response, quantized, min_val, max_val = await handle_cache(
         hashing_kv, args_hash, query, query_param.mode, cache_type="query"
     )
     if cached_response is not None:
         return cached_response
 
-    hl_keywords, ll_keywords = await get_keywords_from_query(
-        query, query_param, global_config, hashing_kv
+    # Mix mode: the vector search on the original query does not depend on the
+    # keywords, run it while they are extracted
+    vector_context = _start_speculative_vector_context(
+        query_param, chunks_vdb, global_config
     )
+    try:
+        linked_nodes, linked_only = await _link_query_entities(
+            query, query_param, knowledge_graph_inst, global_config
+        )
+        if linked_only:
+            # The query is mostly entity names, no need to ask the LLM for keywords
+            hl_keywords, ll_keywords = [], list(linked_nodes)
+            logger.info(f"Linked query entities: {ll_keywords}")
+        else:
+            hl_keywords, ll_keywords = await get_keywords_from_query(
+                query, query_param, global_config, hashing_kv
+            )
+            if linked_nodes:
+                logger.info(f"Linked query entities ranked first: {list(linked_nodes)}")
 
-    logger.debug(f"High-level keywords: {hl_keywords}")
-    logger.debug(f"Low-level  keywords: {ll_keywords}")
+        logger.debug(f"High-level keywords: {hl_keywords}")
+        logger.debug(f"Low-level  keywords: {ll_keywords}")
 
-    # Handle empty keywords
-    if hl_keywords == [] and ll_keywords == []:
-        logger.warning("low_level_keywords and high_level_keywords is empty")
-        return PROMPTS["fail_response"]
-    if ll_keywords == [] and query_param.mode in ["local", "hybrid"]:
-        logger.warning(
-            "low_level_keywords is empty, switching from %s mode to global mode",
-            query_param.mode,
-        )
-        query_param.mode = "global"
-    if hl_keywords == [] and query_param.mode in ["global", "hybrid"]:
-        logger.warning(
-            "high_level_keywords is empty, switching from %s mode to local mode",
-            query_param.mode,
-        )
-        query_param.mode = "local"
+        # Handle empty keywords
+        if hl_keywords == [] and ll_keywords == []:
+            logger.warning("low_level_keywords and high_level_keywords is empty")
+            return PROMPTS["fail_response"]
+        if ll_keywords == [] and query_param.mode in ["local", "hybrid"]:
+            logger.warning(
+                "low_level_keywords is empty, switching from %s mode to global mode",
+                query_param.mode,
+            )
+            query_param.mode = "global"
+        if hl_keywords == [] and query_param.mode in ["global", "hybrid"]:
+            logger.warning(
+                "high_level_keywords is empty, switching from %s mode to local mode",
+                query_param.mode,
+            )
+            query_param.mode = "local"
 
-    ll_keywords_str = ", ".join(ll_keywords) if ll_keywords else ""
-    hl_keywords_str = ", ".join(hl_keywords) if hl_keywords else ""
+        ll_keywords_str = ", ".join(ll_keywords) if ll_keywords else ""
+        hl_keywords_str = ", ".join(hl_keywords) if hl_keywords else ""
 
-    # Build context
-    context = await _build_query_context(
-        ll_keywords_str,
-        hl_keywords_str,
-        knowledge_graph_inst,
-        entities_vdb,
-        relationships_vdb,
-        text_chunks_db,
-        query_param,
-        chunks_vdb,
-    )
+        # Build context
+        context = await _build_query_context(
+            ll_keywords_str,
+            hl_keywords_str,
+            knowledge_graph_inst,
+            entities_vdb,
+            relationships_vdb,
+            text_chunks_db,
+            query_param,
+            chunks_vdb,
+            linked_nodes=linked_nodes,
+            linked_only=linked_only,
+            vector_context=vector_context,
+        )
+    finally:
+        # Unused if the keywords changed the mode or the context was cached
+        if vector_context is not None:
+            vector_context.cancel()
 
     if query_param.only_need_context:
         return context
@@ -1084,6 +1707,73 @@ async def kg_query(
     return response
 
 
+def _start_speculative_vector_context(
+    query_param: QueryParam,
+    chunks_vdb: BaseVectorStorage | None,
+    global_config: dict[str, str],
+) -> asyncio.Task | None:
+    """Start the mix mode chunk vector search before the keywords are known"""
+    if (
+        query_param.mode != "mix"
+        or chunks_vdb is None
+        or not hasattr(query_param, "original_query")
+        or not global_config.get("enable_speculative_retrieval")
+    ):
+        return None
+    task = asyncio.create_task(
+        _get_vector_context(
+            query_param.original_query,
+            chunks_vdb,
+            query_param,
+            global_config["tokenizer"],
+        )
+    )
+    # A failed search that ends up unused must not be reported as never retrieved
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
+    return task
+
+
+async def _link_query_entities(
+    query: str,
+    query_param: QueryParam,
+    knowledge_graph_inst: BaseGraphStorage,
+    global_config: dict[str, str],
+) -> tuple[dict[str, dict], bool]:
+    """Nodes of the entities named literally in a local mode query
+
+    Returns the nodes, and whether their names cover enough of the query
+    (entity_linking_min_coverage) to skip keyword extraction. No nodes are returned
+    if entity linking is disabled, keywords were given by the caller, the query is
+    restricted to some ids (only the vector search applies that filter), or no
+    linked entity exists in the graph.
+    """
+    entity_linker = global_config.get("entity_linker")
+    if (
+        entity_linker is None
+        or query_param.mode != "local"
+        or query_param.hl_keywords
+        or query_param.ll_keywords
+        or query_param.ids
+    ):
+        return {}, False
+
+    await entity_linker.maybe_refresh(knowledge_graph_inst)
+    names, coverage = entity_linker.match_with_coverage(query)
+    names = names[: query_param.top_k]
+    if not names:
+        return {}, False
+    # The index may be stale, only keep entities that still exist
+    nodes = await knowledge_graph_inst.get_nodes_batch(names)
+    linked = {name: nodes[name] for name in names if nodes.get(name)}
+    # Entities missing from the graph leave part of the query unexplained
+    linked_only = (
+        bool(linked)
+        and len(linked) == len(names)
+        and coverage >= global_config["entity_linking_min_coverage"]
+    )
+    return linked, linked_only
+
+
 async def get_keywords_from_query(
     query: str,
     query_param: QueryParam,
@@ -1116,6 +1806,27 @@ async def get_keywords_from_query(
     return hl_keywords, ll_keywords
 
 
+async def _extract_keywords_locally(
+    text: str, global_config: dict[str, str]
+) -> tuple[list[str], list[str]] | None:
+    """Keywords from the local extractor, or None to fall back to the LLM"""
+    extractor = global_config.get("keyword_extractor")
+    if extractor is None:
+        return None
+    await extractor.maybe_refresh()
+    extraction = extractor.extract(text)
+    if extraction is None:
+        logger.info("Local keyword extractor not ready, using the LLM")
+        return None
+    min_confidence = global_config.get("keyword_extractor_min_confidence", 0)
+    if not extraction.ll_keywords or extraction.confidence < min_confidence:
+        logger.info(
+            f"Local keyword confidence {extraction.confidence:.2f} too low, using the LLM"
+        )
+        return None
+    return extraction.hl_keywords, extraction.ll_keywords
+
+
 async def extract_keywords_only(
     text: str,
     param: QueryParam,
@@ -1144,7 +1855,13 @@ async def extract_keywords_only(
                 "Invalid cache format for keywords, proceeding with extraction"
             )
 
-    # 2. Build the examples
+    # 2. Statistical extraction without an LLM round trip, if requested and confident
+    if param.keyword_extractor == "local":
+        keywords = await _extract_keywords_locally(text, global_config)
+        if keywords is not None:
+            return keywords
+
+    # 3. Build the examples
     example_number = global_config["addon_params"].get("example_number", None)
     if example_number and example_number < len(PROMPTS["keywords_extraction_examples"]):
         examples = "\n".join(
@@ -1156,14 +1873,14 @@ async def extract_keywords_only(
         "language", PROMPTS["DEFAULT_LANGUAGE"]
     )
 
-    # 3. Process conversation history
+    # 4. Process conversation history
     history_context = ""
     if param.conversation_history:
         history_context = get_conversation_turns(
             param.conversation_history, param.history_turns
         )
 
-    # 4. Build the keyword-extraction prompt
+    # 5. Build the keyword-extraction prompt
     kw_prompt = PROMPTS["keywords_extraction"].format(
         query=text, examples=examples, language=language, history=history_context
     )
@@ -1172,7 +1889,7 @@ async def extract_keywords_only(
     len_of_prompts = len(tokenizer.encode(kw_prompt))
     logger.debug(f"[kg_query]Prompt Tokens: {len_of_prompts}")
 
-    # 5. Call the LLM for keyword extraction
+    # 6. Call the LLM for keyword extraction
     if param.model_func:
         use_model_func = param.model_func
     else:
@@ -1182,7 +1899,7 @@ async def extract_keywords_only(
 
     result = await use_model_func(kw_prompt, keyword_extraction=True)
 
-    # 6. Parse out JSON from the LLM response
+    # 7. Parse out JSON from the LLM response
     match = re.search(r"\{.*\}", result, re.DOTALL)
     if not match:
         logger.error("No JSON-like structure found in the LLM respond.")
@@ -1196,7 +1913,7 @@ async def extract_keywords_only(
     hl_keywords = keywords_data.get("high_level_keywords", [])
     ll_keywords = keywords_data.get("low_level_keywords", [])
 
-    # 7. Cache only the processed keywords with cache type
+    # 8. Cache only the processed keywords with cache type
     if hl_keywords or ll_keywords:
         cache_data = {
             "high_level_keywords": hl_keywords,
@@ -1257,6 +1974,7 @@ async def _get_vector_context(
             if "content" in result:
                 # Directly use content from chunks_vdb.query result
                 chunk_with_time = {
+                    "id": result.get("id"),
                     "content": result["content"],
                     "created_at": result.get("created_at", None),
                     "file_path": result.get("file_path", "unknown_source"),
@@ -1287,16 +2005,14 @@ async def _get_vector_context(
         entities_context = []
         relations_context = []
 
-        # Create text_units_context directly as a list of dictionaries
-        text_units_context = []
-        for i, chunk in enumerate(maybe_trun_chunks):
-            text_units_context.append(
-                {
-                    "id": i + 1,
-                    "content": chunk["content"],
-                    "file_path": chunk["file_path"],
-                }
+        # Create text_units_context directly as (chunk id, row) pairs
+        text_units_context = [
+            (
+                chunk["id"] or chunk["content"],
+                {"content": chunk["content"], "file_path": chunk["file_path"]},
             )
+            for chunk in maybe_trun_chunks
+        ]
 
         return entities_context, relations_context, text_units_context
     except Exception as e:
@@ -1304,6 +2020,37 @@ async def _get_vector_context(
         return [], [], []
 
 
+async def _query_context_cache_key(
+    query_param: QueryParam, global_config: dict[str, str], **inputs: Any
+) -> str:
+    """Key of an assembled context in query_context_cache
+
+    Covers the retrieval parameters, the inputs of the retrieval (keywords or query
+    text), the workspace and its data version.
+    """
+    from .kg.shared_storage import get_data_version
+
+    workspace = global_config.get("namespace_prefix", "")
+    data_version = await get_data_version(workspace)
+    params = {
+        "mode": query_param.mode,
+        "top_k": query_param.top_k,
+        "max_token_for_text_unit": query_param.max_token_for_text_unit,
+        "max_token_for_global_context": query_param.max_token_for_global_context,
+        "max_token_for_local_context": query_param.max_token_for_local_context,
+        "ids": query_param.ids,
+        "cosine_better_than_threshold": query_param.cosine_better_than_threshold,
+        **inputs,
+    }
+    return compute_args_hash(
+        global_config.get("working_dir", ""),
+        workspace,
+        json.dumps(params, sort_keys=True, ensure_ascii=False, default=str),
+        data_version,
+        cache_type="context",
+    )
+
+
 async def _build_query_context(
     ll_keywords: str,
     hl_keywords: str,
@@ -1313,6 +2060,57 @@ async def _build_query_context(
     text_chunks_db: BaseKVStorage,
     query_param: QueryParam,
     chunks_vdb: BaseVectorStorage = None,  # Add chunks_vdb parameter for mix mode
+    linked_nodes: dict[str, dict] | None = None,
+    linked_only: bool = False,
+    vector_context: asyncio.Task | None = None,
+):
+    # The context does not depend on response_type, user_prompt or the LLM, queries
+    # differing only in those reuse it without any storage access
+    cache_key = await _query_context_cache_key(
+        query_param,
+        text_chunks_db.global_config,
+        ll_keywords=ll_keywords,
+        hl_keywords=hl_keywords,
+        query=getattr(query_param, "original_query", None)
+        if query_param.mode == "mix"
+        else None,
+        linked=sorted(linked_nodes or ()),
+        linked_only=linked_only,
+    )
+    hit, context = query_context_cache.get(cache_key)
+    if hit:
+        logger.info(f"Process {os.getpid()} reusing cached query context")
+        return context
+
+    context = await _assemble_query_context(
+        ll_keywords,
+        hl_keywords,
+        knowledge_graph_inst,
+        entities_vdb,
+        relationships_vdb,
+        text_chunks_db,
+        query_param,
+        chunks_vdb,
+        linked_nodes,
+        linked_only,
+        vector_context,
+    )
+    query_context_cache.put(cache_key, context)
+    return context
+
+
+async def _assemble_query_context(
+    ll_keywords: str,
+    hl_keywords: str,
+    knowledge_graph_inst: BaseGraphStorage,
+    entities_vdb: BaseVectorStorage,
+    relationships_vdb: BaseVectorStorage,
+    text_chunks_db: BaseKVStorage,
+    query_param: QueryParam,
+    chunks_vdb: BaseVectorStorage = None,
+    linked_nodes: dict[str, dict] | None = None,
+    linked_only: bool = False,
+    vector_context: asyncio.Task | None = None,
 ):
     logger.info(f"Process {os.getpid()} building query context...")
 
@@ -1324,6 +2122,8 @@ async def _build_query_context(
             entities_vdb,
             text_chunks_db,
             query_param,
+            linked_nodes,
+            linked_only,
         )
     elif query_param.mode == "global":
         entities_context, relations_context, text_units_context = await _get_edge_data(
@@ -1334,19 +2134,21 @@ async def _build_query_context(
             query_param,
         )
     else:  # hybrid or mix mode
-        ll_data = await _get_node_data(
-            ll_keywords,
-            knowledge_graph_inst,
-            entities_vdb,
-            text_chunks_db,
-            query_param,
-        )
-        hl_data = await _get_edge_data(
-            hl_keywords,
-            knowledge_graph_inst,
-            relationships_vdb,
-            text_chunks_db,
-            query_param,
+        ll_data, hl_data = await asyncio.gather(
+            _get_node_data(
+                ll_keywords,
+                knowledge_graph_inst,
+                entities_vdb,
+                text_chunks_db,
+                query_param,
+            ),
+            _get_edge_data(
+                hl_keywords,
+                knowledge_graph_inst,
+                relationships_vdb,
+                text_chunks_db,
+                query_param,
+            ),
         )
 
         (
@@ -1369,7 +2171,10 @@ async def _build_query_context(
         )
 
         # Only get vector data if in mix mode
-        if query_param.mode == "mix" and hasattr(query_param, "original_query"):
+        if query_param.mode == "mix" and vector_context is not None:
+            # Started by kg_query while the keywords were extracted
+            vector_data = await vector_context
+        elif query_param.mode == "mix" and hasattr(query_param, "original_query"):
             # Get tokenizer from text_chunks_db
             tokenizer = text_chunks_db.global_config.get("tokenizer")
 
@@ -1390,13 +2195,13 @@ async def _build_query_context(
                 ) = vector_data
 
         # Combine and deduplicate the entities, relationships, and sources
-        entities_context = process_combine_contexts(
+        entities_context = combine_context_rows(
             hl_entities_context, ll_entities_context, vector_entities_context
         )
-        relations_context = process_combine_contexts(
+        relations_context = combine_context_rows(
             hl_relations_context, ll_relations_context, vector_relations_context
         )
-        text_units_context = process_combine_contexts(
+        text_units_context = combine_context_rows(
             hl_text_units_context, ll_text_units_context, vector_text_units_context
         )
     # not necessary to use LLM to generate a response
@@ -1404,9 +2209,9 @@ async def _build_query_context(
         return None
 
     # 转换为 JSON 字符串
-    entities_str = json.dumps(entities_context, ensure_ascii=False)
-    relations_str = json.dumps(relations_context, ensure_ascii=False)
-    text_units_str = json.dumps(text_units_context, ensure_ascii=False)
+    entities_str = context_rows_to_json("entity", entities_context)
+    relations_str = context_rows_to_json("relation", relations_context)
+    text_units_str = context_rows_to_json("chunk", text_units_context)
 
     result = f"""-----Entities(KG)-----
 
@@ -1430,24 +2235,64 @@ async def _build_query_context(
     return result
 
 
+async def _stored_node_degrees(
+    knowledge_graph_inst: BaseGraphStorage,
+    nodes_dict: dict[str, dict],
+    node_ids: list[str],
+) -> dict[str, int]:
+    """Degrees of already fetched nodes from their materialized degree property
+
+    Only the nodes without a stored degree fall back to node_degrees_batch.
+    """
+    degrees = {}
+    unknown = []
+    for node_id in node_ids:
+        node = nodes_dict.get(node_id)
+        if node is None:
+            continue
+        if node.get("degree") is None:
+            unknown.append(node_id)
+        else:
+            degrees[node_id] = int(node["degree"])
+    if unknown:
+        degrees.update(await knowledge_graph_inst.node_degrees_batch(unknown))
+    return degrees
+
+
 async def _get_node_data(
     query: str,
     knowledge_graph_inst: BaseGraphStorage,
     entities_vdb: BaseVectorStorage,
     text_chunks_db: BaseKVStorage,
     query_param: QueryParam,
+    linked_nodes: dict[str, dict] | None = None,
+    linked_only: bool = False,
 ):
     # get similar entities
     logger.info(
         f"Query nodes: {query}, top_k: {query_param.top_k}, cosine: {entities_vdb.cosine_better_than_threshold}"
     )
 
-    results = await entities_vdb.query(
-        query,
-        top_k=query_param.top_k,
-        ids=query_param.ids,
-        better_than_threshold=query_param.cosine_better_than_threshold,
-    )
+    # Entities linked from the query text come first, the vector search only fills
+    # the remaining top_k slots. When the linked names replaced keyword extraction
+    # (linked_only), entity_linking_vector_fill may turn that search off.
+    linked_nodes = linked_nodes or {}
+    results = [{"entity_name": name} for name in linked_nodes]
+    vector_top_k = query_param.top_k - len(linked_nodes)
+    if vector_top_k > 0 and (
+        not linked_only
+        or text_chunks_db.global_config.get("entity_linking_vector_fill", True)
+    ):
+        results.extend(
+            r
+            for r in await entities_vdb.query(
+                query,
+                top_k=vector_top_k,
+                ids=query_param.ids,
+                better_than_threshold=query_param.cosine_better_than_threshold,
+            )
+            if r["entity_name"] not in linked_nodes
+        )
 
     if len(results) > 0:
         logger.info(f"Vector search results (Top {len(results)}):")
@@ -1463,10 +2308,22 @@ async def _get_node_data(
     node_ids = [r["entity_name"] for r in results]
 
     # Call the batch node retrieval and degree functions concurrently.
-    nodes_dict, degrees_dict = await asyncio.gather(
-        knowledge_graph_inst.get_nodes_batch(node_ids),
-        knowledge_graph_inst.node_degrees_batch(node_ids),
-    )
+    if knowledge_graph_inst.materialized_degree:
+        nodes_dict = await knowledge_graph_inst.get_nodes_batch(
+            [nid for nid in node_ids if nid not in linked_nodes]
+        )
+        nodes_dict.update(linked_nodes)
+        degrees_dict = await _stored_node_degrees(
+            knowledge_graph_inst, nodes_dict, node_ids
+        )
+    else:
+        nodes_dict, degrees_dict = await asyncio.gather(
+            knowledge_graph_inst.get_nodes_batch(
+                [nid for nid in node_ids if nid not in linked_nodes]
+            ),
+            knowledge_graph_inst.node_degrees_batch(node_ids),
+        )
+        nodes_dict.update(linked_nodes)
 
     logger.info(f"Neo4j Node Retrieval Results (Before Truncation) (Count: {len(nodes_dict)}):")
     for nid, n_data in nodes_dict.items():
@@ -1525,61 +2382,49 @@ async def _get_node_data(
         f"Local query uses {len(node_datas)} entites, {len(use_relations)} relations, {len(use_text_units)} chunks"
     )
 
-    # build prompt
-    entities_context = []
-    for i, n in enumerate(node_datas):
-        created_at = n.get("created_at", "UNKNOWN")
-        if isinstance(created_at, (int, float)):
-            created_at = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(created_at))
-
-        # Get file path from node data
-        file_path = n.get("file_path", "unknown_source")
-
-        entities_context.append(
+    # build prompt rows as (stable id, row) pairs, rendered by context_rows_to_json
+    entities_context = [
+        (
+            n["entity_name"],
             {
-                "id": i + 1,
                 "entity": n["entity_name"],
                 "type": n.get("entity_type", "UNKNOWN"),
                 "description": n.get("description", "UNKNOWN"),
                 "rank": n["rank"],
-                "created_at": created_at,
-                "file_path": file_path,
-            }
+                "created_at": n.get("created_at", "UNKNOWN"),
+                "file_path": n.get("file_path", "unknown_source"),
+            },
         )
+        for n in node_datas
+    ]
 
-    relations_context = []
-    for i, e in enumerate(use_relations):
-        created_at = e.get("created_at", "UNKNOWN")
-        # Convert timestamp to readable format
-        if isinstance(created_at, (int, float)):
-            created_at = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(created_at))
-
-        # Get file path from edge data
-        file_path = e.get("file_path", "unknown_source")
-
-        relations_context.append(
+    relations_context = [
+        (
+            tuple(sorted(e["src_tgt"])),
             {
-                "id": i + 1,
                 "entity1": e["src_tgt"][0],
                 "entity2": e["src_tgt"][1],
                 "description": e["description"],
                 "keywords": e["keywords"],
                 "weight": e["weight"],
                 "rank": e["rank"],
-                "created_at": created_at,
-                "file_path": file_path,
-            }
+                "created_at": e.get("created_at", "UNKNOWN"),
+                "file_path": e.get("file_path", "unknown_source"),
+            },
         )
+        for e in use_relations
+    ]
 
-    text_units_context = []
-    for i, t in enumerate(use_text_units):
-        text_units_context.append(
+    text_units_context = [
+        (
+            t.get("id") or t["content"],
             {
-                "id": i + 1,
                 "content": t["content"],
                 "file_path": t.get("file_path", "unknown_source"),
-            }
+            },
         )
+        for t in use_text_units
+    ]
     return entities_context, relations_context, text_units_context
 
 
@@ -1709,7 +2554,8 @@ async def _find_most_related_text_unit_from_entities(
         f"Truncate chunks from {len(all_text_units_lookup)} to {len(all_text_units)} (max tokens:{query_param.max_token_for_text_unit})"
     )
 
-    all_text_units = [t["data"] for t in all_text_units]
+    # Keep the chunk id so that the context can be deduplicated by it
+    all_text_units = [{**t["data"], "id": t["id"]} for t in all_text_units]
     return all_text_units
 
 
@@ -1872,61 +2718,49 @@ async def _get_edge_data(
         f"Global query uses {len(use_entities)} entites, {len(edge_datas)} relations, {len(use_text_units)} chunks"
     )
 
-    relations_context = []
-    for i, e in enumerate(edge_datas):
-        created_at = e.get("created_at", "UNKNOWN")
-        # Convert timestamp to readable format
-        if isinstance(created_at, (int, float)):
-            created_at = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(created_at))
-
-        # Get file path from edge data
-        file_path = e.get("file_path", "unknown_source")
-
-        relations_context.append(
+    # build prompt rows as (stable id, row) pairs, rendered by context_rows_to_json
+    relations_context = [
+        (
+            tuple(sorted((e["src_id"], e["tgt_id"]))),
             {
-                "id": i + 1,
                 "entity1": e["src_id"],
                 "entity2": e["tgt_id"],
                 "description": e["description"],
                 "keywords": e["keywords"],
                 "weight": e["weight"],
                 "rank": e["rank"],
-                "created_at": created_at,
-                "file_path": file_path,
-            }
+                "created_at": e.get("created_at", "UNKNOWN"),
+                "file_path": e.get("file_path", "unknown_source"),
+            },
         )
+        for e in edge_datas
+    ]
 
-    entities_context = []
-    for i, n in enumerate(use_entities):
-        created_at = n.get("created_at", "UNKNOWN")
-        # Convert timestamp to readable format
-        if isinstance(created_at, (int, float)):
-            created_at = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(created_at))
-
-        # Get file path from node data
-        file_path = n.get("file_path", "unknown_source")
-
-        entities_context.append(
+    entities_context = [
+        (
+            n["entity_name"],
             {
-                "id": i + 1,
                 "entity": n["entity_name"],
                 "type": n.get("entity_type", "UNKNOWN"),
                 "description": n.get("description", "UNKNOWN"),
                 "rank": n["rank"],
-                "created_at": created_at,
-                "file_path": file_path,
-            }
+                "created_at": n.get("created_at", "UNKNOWN"),
+                "file_path": n.get("file_path", "unknown_source"),
+            },
         )
+        for n in use_entities
+    ]
 
-    text_units_context = []
-    for i, t in enumerate(use_text_units):
-        text_units_context.append(
+    text_units_context = [
+        (
+            t.get("id") or t["content"],
             {
-                "id": i + 1,
                 "content": t["content"],
                 "file_path": t.get("file_path", "unknown"),
-            }
+            },
         )
+        for t in use_text_units
+    ]
     return entities_context, relations_context, text_units_context
 
 
@@ -1947,10 +2781,16 @@ async def _find_most_related_entities_from_relationships(
             seen.add(e["tgt_id"])
 
     # Batch approach: Retrieve nodes and their degrees concurrently with one query each.
-    nodes_dict, degrees_dict = await asyncio.gather(
-        knowledge_graph_inst.get_nodes_batch(entity_names),
-        knowledge_graph_inst.node_degrees_batch(entity_names),
-    )
+    if knowledge_graph_inst.materialized_degree:
+        nodes_dict = await knowledge_graph_inst.get_nodes_batch(entity_names)
+        degrees_dict = await _stored_node_degrees(
+            knowledge_graph_inst, nodes_dict, entity_names
+        )
+    else:
+        nodes_dict, degrees_dict = await asyncio.gather(
+            knowledge_graph_inst.get_nodes_batch(entity_names),
+            knowledge_graph_inst.node_degrees_batch(entity_names),
+        )
 
     # Rebuild the list in the same order as entity_names
     node_datas = []
@@ -2037,7 +2877,10 @@ async def _find_related_text_unit_from_relationships(
         f"Truncate chunks from {len(valid_text_units)} to {len(truncated_text_units)} (max tokens:{query_param.max_token_for_text_unit})"
     )
 
-    all_text_units: list[TextChunkSchema] = [t["data"] for t in truncated_text_units]
+    # Keep the chunk id so that the context can be deduplicated by it
+    all_text_units: list[TextChunkSchema] = [
+        {**t["data"], "id": t["id"]} for t in truncated_text_units
+    ]
 
     return all_text_units
 
@@ -2058,7 +2901,9 @@ async def naive_query(
         use_model_func = partial(use_model_func, _priority=5)
 
     # Handle cache
-    args_hash = compute_args_hash(query_param.mode, query, cache_type="query")
+    args_hash = await compute_query_cache_hash(
+        query, query_param, global_config, system_prompt
+    )
     cached_response, quantized, min_val, max_val = await handle_cache(
         hashing_kv, args_hash, query, query_param.mode, cache_type="query"
     )
@@ -2067,14 +2912,22 @@ async def naive_query(
 
     tokenizer: Tokenizer = global_config["tokenizer"]
 
-    _, _, text_units_context = await _get_vector_context(
-        query, chunks_vdb, query_param, tokenizer
-    )
+    cache_key = await _query_context_cache_key(query_param, global_config, query=query)
+    hit, text_units_str = query_context_cache.get(cache_key)
+    if not hit:
+        _, _, text_units_context = await _get_vector_context(
+            query, chunks_vdb, query_param, tokenizer
+        )
+        text_units_str = (
+            context_rows_to_json("chunk", text_units_context)
+            if text_units_context
+            else None
+        )
+        query_context_cache.put(cache_key, text_units_str)
 
-    if text_units_context is None or len(text_units_context) == 0:
+    if text_units_str is None:
         return PROMPTS["fail_response"]
 
-    text_units_str = json.dumps(text_units_context, ensure_ascii=False)
     if query_param.only_need_context:
         return f"""
 ---Document Chunks---
@@ -2178,7 +3031,12 @@ async def kg_query_with_keywords(
         # Apply higher priority (5) to query relation LLM function
         use_model_func = partial(use_model_func, _priority=5)
 
-    args_hash = compute_args_hash(query_param.mode, query, cache_type="query")
+    args_hash = await compute_query_cache_hash(
+        query,
+        query_param,
+        global_config,
+        keywords={"hl": hl_keywords, "ll": ll_keywords},
+    )
     cached_response, quantized, min_val, max_val = await handle_cache(
         hashing_kv, args_hash, query, query_param.mode, cache_type="query"
     )
@@ -152,6 +152,19 @@ PROMPTS[
 输出:
 """
 
+PROMPTS["summarize_entity_descriptions_incremental"] = """你是一个负责维护实体摘要的智能助手。下面给出一个或多个实体（或实体对），每个实体包含已有摘要（可能为空）和新增描述列表。请将新增描述中的信息整合进已有摘要，为每个实体生成一份更新后的综合描述，不得遗漏已有摘要中的信息。
+如果描述存在矛盾，请协调矛盾并生成连贯的摘要。请使用第三人称撰写，并包含实体名称以保持完整上下文。输出语言使用{language}。
+
+每个实体输出一条记录，格式为：("summary"{tuple_delimiter}<实体编号>{tuple_delimiter}<更新后的描述>)
+记录之间使用 {record_delimiter} 分隔，全部输出完成后输出 {completion_delimiter}
+
+#######
+---输入数据---
+{entities}
+#######
+输出:
+"""
+
 PROMPTS["entity_continue_extraction"] = """
 注意：上次提取遗漏了大量实体和关系。
 
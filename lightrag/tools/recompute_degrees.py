@@ -0,0 +1,83 @@
+"""
+Recompute the materialized degree of every node of a graph storage.
+
+Initializes the degree property after ENABLE_MATERIALIZED_DEGREE was turned on
+for an existing graph, and repairs it after the graph was edited outside
+LightRAG. The storage connection settings are read from the environment (.env)
+as for the LightRAG server.
+
+Usage:
+    python -m lightrag.tools.recompute_degrees
+    python -m lightrag.tools.recompute_degrees --graph-storage PGGraphStorage
+"""
+
+import argparse
+import asyncio
+import importlib
+import os
+
+from dotenv import load_dotenv
+
+from lightrag.kg import STORAGES, verify_storage_implementation
+from lightrag.kg.shared_storage import initialize_share_data
+from lightrag.namespace import NameSpace, make_namespace
+from lightrag.utils import logger
+
+
+async def recompute(graph_storage: str, namespace_prefix: str, working_dir: str):
+    verify_storage_implementation("GRAPH_STORAGE", graph_storage)
+    module = importlib.import_module(STORAGES[graph_storage], package="lightrag")
+    initialize_share_data()
+    storage = getattr(module, graph_storage)(
+        namespace=make_namespace(
+            namespace_prefix, NameSpace.GRAPH_STORE_CHUNK_ENTITY_RELATION
+        ),
+        global_config={
+            "enable_materialized_degree": True,
+            "working_dir": working_dir,
+            "embedding_batch_num": 10,
+            "vector_db_storage_cls_kwargs": {},
+        },
+        embedding_func=None,
+    )
+    await storage.initialize()
+    try:
+        return await storage.recompute_degrees()
+    finally:
+        await storage.finalize()
+
+
+def main():
+    load_dotenv(dotenv_path=".env", override=False)
+    parser = argparse.ArgumentParser(
+        description="Recompute the materialized degree of every graph node"
+    )
+    parser.add_argument(
+        "--graph-storage",
+        default=os.getenv("LIGHTRAG_GRAPH_STORAGE", "Neo4JStorage"),
+        help="graph storage implementation (default: LIGHTRAG_GRAPH_STORAGE)",
+    )
+    parser.add_argument(
+        "--namespace-prefix",
+        default="",
+        help="namespace_prefix of the LightRAG instance (default: none)",
+    )
+    parser.add_argument(
+        "--working-dir",
+        default=os.getenv("WORKING_DIR", "./rag_storage"),
+        help="working directory of the LightRAG instance (default: WORKING_DIR)",
+    )
+    args = parser.parse_args()
+
+    try:
+        nodes = asyncio.run(
+            recompute(args.graph_storage, args.namespace_prefix, args.working_dir)
+        )
+    except NotImplementedError as e:
+        logger.error(str(e))
+        raise SystemExit(1)
+    print(f"Recomputed the degree of {nodes} nodes")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,42 @@
 from __future__ import annotations
 
 import logging
-import weakref
 
 import asyncio
+import heapq
 import html
 import csv
+import itertools
 import json
 import os
 import re
+import statistics
+import time
+from collections import OrderedDict, deque
+from contextvars import ContextVar
 from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
 from functools import wraps
 from hashlib import md5
 from typing import Any, Protocol, Callable, TYPE_CHECKING, List
 import xml.etree.ElementTree as ET
 import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: cache file appends are not locked
+    fcntl = None
 from lightrag.prompt import PROMPTS
+from lightrag import metrics
 from dotenv import load_dotenv
 from lightrag.constants import (
     DEFAULT_LOG_MAX_BYTES,
     DEFAULT_LOG_BACKUP_COUNT,
     DEFAULT_LOG_FILENAME,
+    DEFAULT_CONTEXT_ROW_CACHE_SIZE,
+    DEFAULT_QUERY_CONTEXT_CACHE_MAX_MB,
+    DEFAULT_QUERY_CONTEXT_CACHE_TTL,
+    DEFAULT_QUERY_CONTEXT_CACHE_MAX_ENTRIES,
 )
 
 from lightrag.log.logwrapper import init_loguru,logger_instance as logger
@@ -179,6 +195,7 @@ class EmbeddingFunc:
     embedding_dim: int
     max_token_size: int
     func: callable
+    model_name: str | None = None
     # concurrent_limit: int = 16
 
     async def __call__(self, *args, **kwargs) -> np.ndarray:
@@ -257,13 +274,144 @@ class QueueFullError(Exception):
     pass
 
 
-def priority_limit_async_func_call(max_size: int, max_queue_size: int = 1000):
+class AdaptiveConcurrency:
+    """AIMD concurrency limit for a priority limiter, driven by observed calls
+
+    The limit grows by about one slot per window of successful calls and shrinks
+    multiplicatively when a call is rate limited, fails, or takes more than
+    `latency_tolerance` times the median of the last `latency_window` calls of the
+    same priority (0 disables the latency signal). Latency is tracked per priority
+    so that short query calls and long extraction calls sharing a limiter are not
+    compared with each other. Decreases are applied at most once per cooldown so
+    that a burst of failures of calls started together counts as a single
+    congestion signal. A retry-after hint pauses dispatching of new calls until it
+    expires.
+    """
+
+    def __init__(
+        self,
+        max_limit: int,
+        min_limit: int = 1,
+        latency_tolerance: float = 3.0,
+        backoff: float = 0.5,
+        latency_backoff: float = 0.9,
+        cooldown: float = 1.0,
+        latency_window: int = 64,
+    ):
+        self.max_limit = max(1, max_limit)
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        self.latency_tolerance = latency_tolerance
+        self.backoff = backoff
+        self.latency_backoff = latency_backoff
+        self.cooldown = cooldown
+        self.latency_window = max(1, latency_window)
+        self._limit = float(self.max_limit)
+        # recent latencies of successful calls, per priority
+        self._latencies: dict[int, deque[float]] = {}
+        self._last_decrease = 0.0
+        self.paused_until = 0.0
+
+    @property
+    def limit(self) -> int:
+        return max(self.min_limit, int(self._limit))
+
+    def on_success(self, latency: float, priority: int = 10) -> None:
+        latencies = self._latencies.get(priority)
+        if latencies is None:
+            latencies = self._latencies[priority] = deque(maxlen=self.latency_window)
+        # wait for a few samples before judging latency
+        slow = (
+            self.latency_tolerance > 0
+            and len(latencies) >= min(8, self.latency_window)
+            and latency > self.latency_tolerance * statistics.median(latencies)
+        )
+        latencies.append(latency)
+        if slow:
+            self._decrease(self.latency_backoff)
+        else:
+            self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+
+    def on_error(self) -> None:
+        self._decrease(self.backoff)
+
+    def on_rate_limited(self, retry_after: float | None = None) -> None:
+        self._decrease(self.backoff)
+        if retry_after:
+            self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+
+    def _decrease(self, factor: float) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        self._limit = max(float(self.min_limit), self._limit * factor)
+
+
+_current_adaptive_concurrency: ContextVar[AdaptiveConcurrency | None] = ContextVar(
+    "current_adaptive_concurrency", default=None
+)
+
+
+def get_retry_after(error: BaseException) -> float | None:
+    """Seconds to wait according to the retry-after(-ms) headers of an API error, if any"""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            retry_at = parsedate_to_datetime(value)
+            return max(0.0, retry_at.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """Whether an API error reports HTTP 429 Too Many Requests"""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status == 429
+
+
+def notify_rate_limited(retry_after: float | None = None) -> None:
+    """Report a rate-limited attempt to the adaptive limiter running the current call
+
+    Model functions that retry internally (tenacity) call this for every throttled
+    attempt, which the limiter would otherwise never see. No-op outside an adaptive
+    limiter.
+    """
+    adaptive = _current_adaptive_concurrency.get()
+    if adaptive is not None:
+        adaptive.on_rate_limited(retry_after)
+
+
+def priority_limit_async_func_call(
+    max_size: int,
+    max_queue_size: int = 1000,
+    name: str | None = None,
+    adaptive: AdaptiveConcurrency | None = None,
+):
     """
     Enhanced priority-limited asynchronous function call decorator
 
+    Event driven: a call runs directly in the caller's task when a slot is free,
+    otherwise it waits in a heap ordered by (priority, arrival). A finishing call hands
+    its slot straight to the first waiter, so there are no worker tasks, no polling and
+    no periodic wakeups.
+
     Args:
         max_size: Maximum number of concurrent calls
-        max_queue_size: Maximum queue capacity to prevent memory overflow
+        max_queue_size: Maximum number of calls waiting for a slot
+        name: Label of the limiter in metrics (defaults to the function name)
+        adaptive: Optional AdaptiveConcurrency adjusting the limit (up to max_size) from
+            call latency, errors and rate limiting
     Returns:
         Decorator function
     """
@@ -272,189 +420,140 @@ def priority_limit_async_func_call(max_size: int, max_queue_size: int = 1000):
         # Ensure func is callable
         if not callable(func):
             raise TypeError(f"Expected a callable object, got {type(func)}")
-        queue = asyncio.PriorityQueue(maxsize=max_queue_size)
-        tasks = set()
-        initialization_lock = asyncio.Lock()
-        counter = 0
-        shutdown_event = asyncio.Event()
-        initialized = False  # Global initialization flag
-        worker_health_check_task = None
-
-        # Track active future objects for cleanup
-        active_futures = weakref.WeakSet()
-        reinit_count = 0  # Reinitialization counter to track system health
-
-        # Worker function to process tasks in the queue
-        async def worker():
-            """Worker that processes tasks in the priority queue"""
-            try:
-                while not shutdown_event.is_set():
-                    try:
-                        # Use timeout to get tasks, allowing periodic checking of shutdown signal
-                        try:
-                            (
-                                priority,
-                                count,
-                                future,
-                                args,
-                                kwargs,
-                            ) = await asyncio.wait_for(queue.get(), timeout=1.0)
-                        except asyncio.TimeoutError:
-                            # Timeout is just to check shutdown signal, continue to next iteration
-                            continue
-
-                        # If future is cancelled, skip execution
-                        if future.cancelled():
-                            queue.task_done()
-                            continue
-
-                        try:
-                            # Execute function
-                            result = await func(*args, **kwargs)
-                            # If future is not done, set the result
-                            if not future.done():
-                                future.set_result(result)
-                        except asyncio.CancelledError:
-                            if not future.done():
-                                future.cancel()
-                            logger.debug("limit_async: Task cancelled during execution")
-                        except Exception as e:
-                            logger.error(
-                                f"limit_async: Error in decorated function: {str(e)}"
-                            )
-                            if not future.done():
-                                future.set_exception(e)
-                        finally:
-                            queue.task_done()
-                    except Exception as e:
-                        # Catch all exceptions in worker loop to prevent worker termination
-                        logger.error(f"limit_async: Critical error in worker: {str(e)}")
-                        await asyncio.sleep(0.1)  # Prevent high CPU usage
-            finally:
-                logger.debug("limit_async: Worker exiting")
-
-        async def health_check():
-            """Periodically check worker health status and recover"""
-            nonlocal initialized
-            try:
-                while not shutdown_event.is_set():
-                    await asyncio.sleep(5)  # Check every 5 seconds
-
-                    # No longer acquire lock, directly operate on task set
-                    # Use a copy of the task set to avoid concurrent modification
-                    current_tasks = set(tasks)
-                    done_tasks = {t for t in current_tasks if t.done()}
-                    tasks.difference_update(done_tasks)
-
-                    # Calculate active tasks count
-                    active_tasks_count = len(tasks)
-                    workers_needed = max_size - active_tasks_count
-
-                    if workers_needed > 0:
-                        logger.info(
-                            f"limit_async: Creating {workers_needed} new workers"
-                        )
-                        new_tasks = set()
-                        for _ in range(workers_needed):
-                            task = asyncio.create_task(worker())
-                            new_tasks.add(task)
-                            task.add_done_callback(tasks.discard)
-                        # Update task set in one operation
-                        tasks.update(new_tasks)
-            except Exception as e:
-                logger.error(f"limit_async: Error in health check: {str(e)}")
-            finally:
-                logger.debug("limit_async: Health check task exiting")
-                initialized = False
+        metric_name = name or getattr(
+            func, "__name__", getattr(getattr(func, "func", None), "__name__", "func")
+        )
 
-        async def ensure_workers():
-            """Ensure worker threads and health check system are available
+        # (priority, arrival, waiter future); cancelled waiters are skipped lazily
+        heap: list[tuple[int, int, asyncio.Future]] = []
+        arrivals = itertools.count()
+        # futures of callers waiting for room in a full queue
+        space_waiters: deque[asyncio.Future] = deque()
+        in_flight = 0
+        queued = 0
+        resume_handle: asyncio.TimerHandle | None = None
+
+        def current_limit() -> int:
+            return adaptive.limit if adaptive is not None else max_size
+
+        def paused() -> bool:
+            """Hold dispatching while a retry-after hint is pending"""
+            nonlocal resume_handle
+            if adaptive is None:
+                return False
+            delay = adaptive.paused_until - time.monotonic()
+            if delay <= 0:
+                return False
+            if resume_handle is None:
 
-            This function checks if the worker system is already initialized.
-            If not, it performs a one-time initialization of all worker threads
-            and starts the health check system.
-            """
-            nonlocal initialized, worker_health_check_task, tasks, reinit_count
+                def resume():
+                    nonlocal resume_handle
+                    resume_handle = None
+                    dispatch()
 
-            if initialized:
-                return
+                resume_handle = asyncio.get_running_loop().call_later(delay, resume)
+            return True
 
-            async with initialization_lock:
-                if initialized:
+        def wake_space_waiter():
+            while space_waiters:
+                waiter = space_waiters.popleft()
+                if not waiter.done():
+                    waiter.set_result(None)
                     return
 
-                # Increment reinitialization counter if this is not the first initialization
-                if reinit_count > 0:
-                    reinit_count += 1
-                    logger.warning(
-                        f"limit_async: Reinitializing needed (count: {reinit_count})"
-                    )
-                else:
-                    reinit_count = 1  # First initialization
-
-                # Check for completed tasks and remove them from the task set
-                current_tasks = set(tasks)
-                done_tasks = {t for t in current_tasks if t.done()}
-                tasks.difference_update(done_tasks)
-
-                # Log active tasks count during reinitialization
-                active_tasks_count = len(tasks)
-                if active_tasks_count > 0 and reinit_count > 1:
-                    logger.warning(
-                        f"limit_async: {active_tasks_count} tasks still running during reinitialization"
-                    )
-
-                # Create initial worker tasks, only adding the number needed
-                workers_needed = max_size - active_tasks_count
-                for _ in range(workers_needed):
-                    task = asyncio.create_task(worker())
-                    tasks.add(task)
-                    task.add_done_callback(tasks.discard)
-
-                # Start health check
-                worker_health_check_task = asyncio.create_task(health_check())
-
-                initialized = True
-                logger.info(f"limit_async: {workers_needed} new workers initialized")
-
-        async def shutdown():
-            """Gracefully shut down all workers and the queue"""
-            logger.info("limit_async: Shutting down priority queue workers")
-
-            # Set the shutdown event
-            shutdown_event.set()
+        def dispatch():
+            """Grant free slots to the first waiters"""
+            nonlocal in_flight, queued
+            if paused():
+                return
+            while heap and in_flight < current_limit():
+                waiter = heapq.heappop(heap)[2]
+                if waiter.cancelled():
+                    continue
+                queued -= 1
+                in_flight += 1
+                wake_space_waiter()
+                waiter.set_result(None)
+            metrics.LIMITER_QUEUE_DEPTH.set(queued, metric_name)
+            metrics.LIMITER_IN_FLIGHT.set(in_flight, metric_name)
+
+        def release():
+            nonlocal in_flight
+            in_flight -= 1
+            dispatch()
+
+        async def acquire(priority: int, queue_timeout: float | None):
+            nonlocal in_flight, queued
+            if in_flight < current_limit() and queued == 0 and not paused():
+                in_flight += 1
+                metrics.LIMITER_IN_FLIGHT.set(in_flight, metric_name)
+                return
 
-            # Cancel all active futures
-            for future in list(active_futures):
-                if not future.done():
-                    future.cancel()
+            loop = asyncio.get_running_loop()
+            while queued >= max_queue_size:
+                space = loop.create_future()
+                space_waiters.append(space)
+                try:
+                    await asyncio.wait_for(space, queue_timeout)
+                except asyncio.TimeoutError:
+                    raise QueueFullError(
+                        f"Queue full, timeout after {queue_timeout} seconds"
+                    )
 
-            # Wait for the queue to empty
+            waiter = loop.create_future()
+            heapq.heappush(heap, (priority, next(arrivals), waiter))
+            queued += 1
+            metrics.LIMITER_QUEUE_DEPTH.set(queued, metric_name)
+            enqueued_at = time.perf_counter()
             try:
-                await asyncio.wait_for(queue.join(), timeout=5.0)
-            except asyncio.TimeoutError:
-                logger.warning(
-                    "limit_async: Timeout waiting for queue to empty during shutdown"
-                )
-
-            # Cancel all worker tasks
-            for task in list(tasks):
-                if not task.done():
-                    task.cancel()
-
-            # Wait for all tasks to complete
-            if tasks:
-                await asyncio.gather(*tasks, return_exceptions=True)
+                await waiter
+            except asyncio.CancelledError:
+                if not waiter.cancelled():
+                    # The slot was granted just before the cancellation
+                    release()
+                else:
+                    queued -= 1
+                    wake_space_waiter()
+                    # Calls queued meanwhile may be granted now
+                    dispatch()
+                raise
+            metrics.LIMITER_QUEUE_WAIT_SECONDS.observe(
+                time.perf_counter() - enqueued_at, metric_name
+            )
 
-            # Cancel the health check task
-            if worker_health_check_task and not worker_health_check_task.done():
-                worker_health_check_task.cancel()
+        async def run(args, kwargs, priority, queue_timeout):
+            await acquire(priority, queue_timeout)
+            if adaptive is None:
                 try:
-                    await worker_health_check_task
-                except asyncio.CancelledError:
-                    pass
+                    return await func(*args, **kwargs)
+                finally:
+                    release()
 
-            logger.info("limit_async: Priority queue workers shutdown complete")
+            token = _current_adaptive_concurrency.set(adaptive)
+            start = time.perf_counter()
+            try:
+                result = await func(*args, **kwargs)
+                adaptive.on_success(time.perf_counter() - start, priority)
+                return result
+            except Exception as e:
+                if is_rate_limit_error(e):
+                    adaptive.on_rate_limited(get_retry_after(e))
+                else:
+                    adaptive.on_error()
+                raise
+            finally:
+                _current_adaptive_concurrency.reset(token)
+                metrics.LIMITER_LIMIT.set(adaptive.limit, metric_name)
+                release()
+
+        async def shutdown():
+            """Cancel every call still waiting for a slot"""
+            logger.info("limit_async: Cancelling queued calls")
+            # Each cancelled call takes itself off `queued` when it wakes up
+            while heap:
+                heapq.heappop(heap)[2].cancel()
+            while space_waiters:
+                space_waiters.popleft().cancel()
 
         @wraps(func)
         async def wait_func(
@@ -465,8 +564,8 @@ def priority_limit_async_func_call(max_size: int, max_queue_size: int = 1000):
             Args:
                 *args: Positional arguments passed to the function
                 _priority: Call priority (lower values have higher priority)
-                _timeout: Maximum time to wait for function completion (in seconds)
-                _queue_timeout: Maximum time to wait for entering the queue (in seconds)
+                _timeout: Maximum time to wait for function completion, queueing included (in seconds)
+                _queue_timeout: Maximum time to wait for room in a full queue (in seconds)
                 **kwargs: Keyword arguments passed to the function
             Returns:
                 The result of the function call
@@ -475,64 +574,20 @@ def priority_limit_async_func_call(max_size: int, max_queue_size: int = 1000):
                 QueueFullError: If the queue is full and waiting times out
                 Any exception raised by the decorated function
             """
-            # Ensure worker system is initialized
-            await ensure_workers()
-
-            # Create a future for the result
-            future = asyncio.Future()
-            active_futures.add(future)
-
-            nonlocal counter
-            async with initialization_lock:
-                current_count = counter  # Use local variable to avoid race conditions
-                counter += 1
-
-            # Try to put the task into the queue, supporting timeout
+            if _timeout is None:
+                return await run(args, kwargs, _priority, _queue_timeout)
             try:
-                if _queue_timeout is not None:
-                    # Use timeout to wait for queue space
-                    try:
-                        await asyncio.wait_for(
-                            # current_count is used to ensure FIFO order
-                            queue.put((_priority, current_count, future, args, kwargs)),
-                            timeout=_queue_timeout,
-                        )
-                    except asyncio.TimeoutError:
-                        raise QueueFullError(
-                            f"Queue full, timeout after {_queue_timeout} seconds"
-                        )
-                else:
-                    # No timeout, may wait indefinitely
-                    # current_count is used to ensure FIFO order
-                    await queue.put((_priority, current_count, future, args, kwargs))
-            except Exception as e:
-                # Clean up the future
-                if not future.done():
-                    future.set_exception(e)
-                active_futures.discard(future)
-                raise
-
-            try:
-                # Wait for the result, optional timeout
-                if _timeout is not None:
-                    try:
-                        return await asyncio.wait_for(future, _timeout)
-                    except asyncio.TimeoutError:
-                        # Cancel the future
-                        if not future.done():
-                            future.cancel()
-                        raise TimeoutError(
-                            f"limit_async: Task timed out after {_timeout} seconds"
-                        )
-                else:
-                    # Wait for the result without timeout
-                    return await future
-            finally:
-                # Clean up the future reference
-                active_futures.discard(future)
+                return await asyncio.wait_for(
+                    run(args, kwargs, _priority, _queue_timeout), _timeout
+                )
+            except asyncio.TimeoutError:
+                raise TimeoutError(
+                    f"limit_async: Task timed out after {_timeout} seconds"
+                )
 
-        # Add the shutdown method to the decorated function
+        # Add the shutdown method and the live limit to the decorated function
         wait_func.shutdown = shutdown
+        wait_func.concurrency_limit = current_limit
 
         return wait_func
 
@@ -557,8 +612,550 @@ def load_json(file_name):
 
 
 def write_json(json_obj, file_name):
-    with open(file_name, "w", encoding="utf-8") as f:
-        json.dump(json_obj, f, indent=2, ensure_ascii=False)
+    """Write json_obj to file_name atomically (temp file in the same directory + rename)
+
+    Readers and crashes never observe a partially written file.
+    """
+    tmp_file_name = f"{file_name}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_file_name, "w", encoding="utf-8") as f:
+            json.dump(json_obj, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_file_name, file_name)
+    finally:
+        if os.path.exists(tmp_file_name):
+            os.remove(tmp_file_name)
+
+
+class WriteBehindScheduler:
+    """Coalesce index_done_callback calls of storages into background flushes
+
+    Storages marked dirty are persisted together by a background task at most
+    `interval` seconds later, or immediately once `max_pending` marks have been
+    collected since the last flush. Marking the same storage several times before a
+    flush costs a single index_done_callback. An interval <= 0 disables write-behind:
+    every mark persists synchronously, as before.
+
+    Call flush() (or close()) before shutdown: marks still pending in memory are lost
+    if the process is killed, which is the durability traded for throughput.
+    """
+
+    def __init__(self, interval: float, max_pending: int):
+        self.interval = interval
+        self.max_pending = max_pending
+        self._dirty: dict[int, Any] = {}
+        self._pending = 0
+        self._task: asyncio.Task | None = None
+
+    async def mark_dirty(self, storage: Any) -> None:
+        if self.interval <= 0:
+            await storage.index_done_callback()
+            return
+
+        self._dirty[id(storage)] = storage
+        self._pending += 1
+        if self._pending >= self.max_pending:
+            await self.flush()
+            if not self._dirty:
+                return
+
+        # Also retries storages whose flush failed
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._task = loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        while self._dirty:
+            await asyncio.sleep(self.interval)
+            # A flush already started completes even if the task gets cancelled
+            await asyncio.shield(self.flush())
+
+    async def flush(self) -> None:
+        """Persist every dirty storage now
+
+        Storages whose index_done_callback fails stay dirty, so the next flush
+        retries them.
+        """
+        dirty, self._dirty, self._pending = self._dirty, {}, 0
+        if not dirty:
+            return
+        results = await asyncio.gather(
+            *(storage.index_done_callback() for storage in dirty.values()),
+            return_exceptions=True,
+        )
+        for key, storage, result in zip(dirty.keys(), dirty.values(), results):
+            if isinstance(result, Exception):
+                logger.error(
+                    f"Write-behind flush of {storage.namespace} failed: {result}"
+                )
+                self._dirty.setdefault(key, storage)
+
+    async def close(self) -> None:
+        """Stop the background task and make a final flush"""
+        task, self._task = self._task, None
+        if task is not None and task.get_loop() is asyncio.get_running_loop():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        await self.flush()
+
+
+class EmbeddingBatcher:
+    """Coalesce embedding requests of concurrent callers into full batches
+
+    Texts submitted within `window` seconds are deduplicated and packed into batches
+    of at most `max_batch_size` texts and, when `max_batch_tokens` > 0, at most that
+    many tokens (a single longer text still gets a batch of its own). A full batch is
+    dispatched immediately. Each caller gets back the rows of its own texts, in order.
+    Calls with a higher priority than the default (queries) or extra keyword arguments
+    bypass the batcher.
+
+    Attributes of the wrapped function (embedding_dim, max_token_size, ...) are
+    forwarded, so the batcher can stand in for an EmbeddingFunc.
+    """
+
+    def __init__(
+        self,
+        func: Callable,
+        max_batch_size: int,
+        max_batch_tokens: int = 0,
+        window: float = 0.005,
+        count_tokens: Callable[[str], int] | None = None,
+    ):
+        self.func = func
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_batch_tokens = max_batch_tokens
+        self.window = window
+        self.count_tokens = count_tokens or (lambda text: len(text) // 4)
+        self._pending: dict[str, asyncio.Future] = {}
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    def __getattr__(self, name: str):
+        if name == "func" or name.startswith("__"):
+            raise AttributeError(name)
+        return getattr(self.func, name)
+
+    def __deepcopy__(self, memo):
+        # Shared runtime object: keep it out of the deep copies made by asdict()
+        return self
+
+    async def __call__(self, texts: list[str], _priority: int = 10, **kwargs):
+        if _priority < 10 or kwargs or not texts:
+            return await self.func(texts, _priority=_priority, **kwargs)
+
+        loop = asyncio.get_running_loop()
+        futures = []
+        for text in texts:
+            future = self._pending.get(text)
+            if future is None:
+                future = self._pending[text] = loop.create_future()
+            futures.append(future)
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+
+        # Futures are shared with the callers that submitted the same text: a
+        # cancelled caller must not cancel them for the others
+        rows = await asyncio.gather(*(asyncio.shield(f) for f in futures))
+        return np.array(rows)
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, {}
+
+        batch: list[str] = []
+        batch_tokens = 0
+        for text in pending:
+            tokens = self.count_tokens(text) if self.max_batch_tokens > 0 else 0
+            if batch and (
+                len(batch) >= self.max_batch_size
+                or batch_tokens + tokens > self.max_batch_tokens > 0
+            ):
+                self._dispatch(batch, pending)
+                batch, batch_tokens = [], 0
+            batch.append(text)
+            batch_tokens += tokens
+        if batch:
+            self._dispatch(batch, pending)
+
+    def _dispatch(self, batch: list[str], futures: dict[str, asyncio.Future]):
+        metrics.EMBEDDING_BATCH_SIZE.observe(len(batch))
+        task = asyncio.get_running_loop().create_task(
+            self._run_batch(batch, [futures[text] for text in batch])
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: list[str], futures: list[asyncio.Future]):
+        try:
+            embeddings = await self.func(batch)
+        except BaseException as e:
+            for future in futures:
+                if not future.done():
+                    if isinstance(e, asyncio.CancelledError):
+                        future.cancel()
+                    else:
+                        future.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+            return
+        if len(embeddings) != len(batch):
+            error = ValueError(
+                f"Embedding function returned {len(embeddings)} rows "
+                f"for {len(batch)} texts"
+            )
+            for future in futures:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        for future, embedding in zip(futures, embeddings):
+            if not future.done():
+                future.set_result(embedding)
+
+
+class EmbeddingCache:
+    """Persistent content-addressed cache in front of an embedding function
+
+    Embeddings are keyed by the md5 digest of the text; one cache file exists per
+    (model name, embedding_dim), so vectors of different models never mix. Entries are
+    kept in an LRU bounded by `max_bytes` and appended to a binary file in the working
+    directory as they are computed: a header (magic, dim) followed by fixed size
+    records of a 16 byte digest and `dim` float32 values.
+
+    The file is shared by the workers of a server: appends and compaction take an
+    exclusive flock on it, and compaction rewrites the file with the records of
+    every worker, not only the entries of this process, dropping evicted and
+    duplicate records. All file I/O runs in a thread; the file is loaded on the
+    first call.
+
+    Only plain `func(texts)` calls are cached; calls with extra keyword arguments are
+    passed through. Attributes of the wrapped function are forwarded.
+    """
+
+    MAGIC = b"LRAGEMB1"
+
+    def __init__(
+        self,
+        func: Callable,
+        working_dir: str,
+        model_name: str,
+        embedding_dim: int,
+        max_bytes: int,
+    ):
+        self.func = func
+        self.model_name = model_name
+        self.embedding_dim = embedding_dim
+        self.max_bytes = max_bytes
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", model_name)
+        self.file_name = os.path.join(
+            working_dir, f"embedding_cache_{safe_name}_{embedding_dim}.bin"
+        )
+        self._record_size = 16 + 4 * embedding_dim
+        self._entries: OrderedDict[bytes, np.ndarray] = OrderedDict()
+        # records in the cache file, appended by any worker
+        self._file_records = 0
+        self._loaded = False
+        # serializes the file I/O of this process
+        self._io_lock = asyncio.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __getattr__(self, name: str):
+        if name == "func" or name.startswith("__"):
+            raise AttributeError(name)
+        return getattr(self.func, name)
+
+    def __deepcopy__(self, memo):
+        # Shared runtime object: keep it out of the deep copies made by asdict()
+        return self
+
+    @property
+    def max_entries(self) -> int:
+        return max(1, self.max_bytes // self._record_size)
+
+    def _header(self) -> bytes:
+        return self.MAGIC + np.uint32(self.embedding_dim).tobytes()
+
+    def _read_records(self, f) -> np.ndarray | None:
+        """Records of an open cache file, None if it has another format"""
+        f.seek(0)
+        if f.read(len(self._header())) != self._header():
+            return None
+        data = f.read()
+        # Drop a partially written trailing record
+        return np.frombuffer(
+            data,
+            dtype=[("key", "V16"), ("vector", "<f4", (self.embedding_dim,))],
+            count=len(data) // self._record_size,
+        ).copy()
+
+    def _lru(self, records: np.ndarray) -> OrderedDict[bytes, np.ndarray]:
+        """Live entries of file records, most recently appended last"""
+        entries: OrderedDict[bytes, np.ndarray] = OrderedDict()
+        for key, vector in zip(records["key"], records["vector"]):
+            key = bytes(key)
+            entries.pop(key, None)
+            entries[key] = vector
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+        return entries
+
+    def _open_locked(self, mode: str):
+        """Open the cache file under an exclusive flock
+
+        Returns None if the file does not exist. A file replaced by another worker's
+        compaction while waiting for the lock is reopened, so nothing is written to
+        an unlinked inode.
+        """
+        while True:
+            try:
+                f = open(self.file_name, mode)
+            except FileNotFoundError:
+                return None
+            if fcntl is None:
+                return f
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                if os.fstat(f.fileno()).st_ino == os.stat(self.file_name).st_ino:
+                    return f
+            except FileNotFoundError:
+                pass
+            f.close()
+
+    def _load_file(self) -> tuple[OrderedDict[bytes, np.ndarray], int]:
+        try:
+            f = self._open_locked("rb")
+            if f is None:
+                return OrderedDict(), 0
+            with f:
+                records = self._read_records(f)
+        except OSError as e:
+            logger.warning(f"Failed to load embedding cache {self.file_name}: {e}")
+            return OrderedDict(), 0
+        if records is None:
+            logger.warning(f"Ignoring embedding cache {self.file_name}: unknown format")
+            return OrderedDict(), 0
+        entries = self._lru(records)
+        logger.info(f"Loaded {len(entries)} cached embeddings from {self.file_name}")
+        return entries, len(records)
+
+    def _append_file(self, buffer: bytes) -> int:
+        """Append records, returns the number of records in the file"""
+        while True:
+            f = self._open_locked("ab")
+            if f is not None:
+                with f:
+                    f.write(buffer)
+                    return (f.tell() - len(self._header())) // self._record_size
+            # Create the file complete with its header, unless a worker just did
+            tmp_file = f"{self.file_name}.{os.getpid()}.tmp"
+            with open(tmp_file, "wb") as f:
+                f.write(self._header() + buffer)
+            try:
+                os.link(tmp_file, self.file_name)
+                return len(buffer) // self._record_size
+            except FileExistsError:
+                continue
+            finally:
+                os.remove(tmp_file)
+
+    def _compact_file(self, recent: list[tuple[bytes, np.ndarray]]) -> int:
+        """Rewrite the file with the live records of every worker
+
+        The records appended by other workers are read back under the lock and
+        merged with `recent`, the entries of this process in LRU order, which count
+        as the most recently used. Returns the number of records written.
+        """
+        tmp_file = f"{self.file_name}.{os.getpid()}.tmp"
+        f = self._open_locked("rb")
+        try:
+            records = self._read_records(f) if f is not None else None
+            entries = self._lru(records) if records is not None else OrderedDict()
+            for key, vector in recent:
+                entries.pop(key, None)
+                entries[key] = vector
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+            with open(tmp_file, "wb") as out:
+                out.write(self._header())
+                for key, vector in entries.items():
+                    out.write(key + vector.tobytes())
+            # Replaced while still holding the lock of the old file
+            os.replace(tmp_file, self.file_name)
+        finally:
+            if f is not None:
+                f.close()
+        return len(entries)
+
+    async def _ensure_loaded(self):
+        if self._loaded:
+            return
+        async with self._io_lock:
+            if self._loaded:
+                return
+            self._entries, self._file_records = await asyncio.to_thread(
+                self._load_file
+            )
+            self._loaded = True
+
+    async def _append(self, items: list[tuple[bytes, np.ndarray]]):
+        buffer = b"".join(key + vector.tobytes() for key, vector in items)
+        async with self._io_lock:
+            try:
+                self._file_records = await asyncio.to_thread(self._append_file, buffer)
+            except OSError as e:
+                logger.warning(f"Failed to write embedding cache {self.file_name}: {e}")
+                return
+            # Keep the file from growing far beyond the live entries
+            if self._file_records > 2 * self.max_entries:
+                await self._compact()
+
+    async def _compact(self):
+        try:
+            self._file_records = await asyncio.to_thread(
+                self._compact_file, list(self._entries.items())
+            )
+        except OSError as e:
+            logger.warning(f"Failed to write embedding cache {self.file_name}: {e}")
+
+    def _record_metrics(self, hits: int, misses: int):
+        self.hits += hits
+        self.misses += misses
+        metrics.EMBEDDING_CACHE_REQUESTS.inc(hits, "hit")
+        metrics.EMBEDDING_CACHE_REQUESTS.inc(misses, "miss")
+        metrics.EMBEDDING_CACHE_ENTRIES.set(len(self._entries))
+
+    async def __call__(self, texts: list[str], _priority: int = 10, **kwargs):
+        if kwargs or not texts:
+            return await self.func(texts, _priority=_priority, **kwargs)
+
+        await self._ensure_loaded()
+        keys = [md5(text.encode("utf-8")).digest() for text in texts]
+        found: dict[bytes, np.ndarray] = {}
+        missing: dict[bytes, str] = {}
+        for key, text in zip(keys, texts):
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                found[key] = vector
+            else:
+                missing[key] = text
+
+        if missing:
+            embeddings = await self.func(list(missing.values()), _priority=_priority)
+            embeddings = np.asarray(embeddings)
+            if embeddings.shape == (len(missing), self.embedding_dim):
+                new_items = []
+                for key, vector in zip(missing, embeddings.astype("<f4")):
+                    found[key] = self._entries[key] = vector
+                    new_items.append((key, vector))
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                await self._append(new_items)
+            else:
+                logger.warning(
+                    f"Not caching embeddings of shape {embeddings.shape}, "
+                    f"expected (*, {self.embedding_dim})"
+                )
+                found.update(zip(missing, embeddings))
+
+        self._record_metrics(len(texts) - len(missing), len(missing))
+        return np.array([found[key] for key in keys])
+
+    def stats(self) -> dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    async def close(self):
+        """Compact the cache file to the live entries"""
+        if self._loaded and self._file_records != len(self._entries):
+            async with self._io_lock:
+                await self._compact()
+        if self.hits or self.misses:
+            logger.info(f"Embedding cache {self.model_name}: {self.stats()}")
+
+
+class SingleFlight:
+    """Share one in-flight call between concurrent callers with identical arguments
+
+    Calls are keyed by a hash of the JSON encoding of their positional and keyword
+    arguments, leaving out the non-semantic ones in `IGNORED_KWARGS`. While a call is
+    running, identical calls wait for its result (or exception) instead of reaching
+    the provider again. The call runs in its own task, so it is only cancelled when
+    every waiting caller has been cancelled. Streaming calls (`stream=True`) and calls
+    whose arguments are not JSON serializable are never shared.
+
+    Attributes of the wrapped function are forwarded.
+    """
+
+    # limiter controls and the cache storage, which do not change the result
+    IGNORED_KWARGS = frozenset(
+        {"_priority", "_timeout", "_queue_timeout", "hashing_kv"}
+    )
+
+    def __init__(self, func: Callable, name: str = "func"):
+        self.func = func
+        self.name = name
+        self._in_flight: dict[str, tuple[asyncio.Task, list[int]]] = {}
+
+    def __getattr__(self, name: str):
+        if name == "func" or name.startswith("__"):
+            raise AttributeError(name)
+        return getattr(self.func, name)
+
+    def __deepcopy__(self, memo):
+        # Shared runtime object: keep it out of the deep copies made by asdict()
+        return self
+
+    @classmethod
+    def _key(cls, args: tuple, kwargs: dict) -> str | None:
+        """Hash of the call arguments, or None if they cannot be encoded"""
+        try:
+            payload = json.dumps(
+                [
+                    args,
+                    {k: v for k, v in kwargs.items() if k not in cls.IGNORED_KWARGS},
+                ],
+                sort_keys=True,
+                ensure_ascii=False,
+            )
+        except (TypeError, ValueError):
+            return None
+        return md5(payload.encode("utf-8")).hexdigest()
+
+    async def __call__(self, *args, **kwargs):
+        if kwargs.get("stream"):
+            return await self.func(*args, **kwargs)
+
+        key = self._key(args, kwargs)
+        if key is None:
+            return await self.func(*args, **kwargs)
+        entry = self._in_flight.get(key)
+        if entry is None:
+            task = asyncio.ensure_future(self.func(*args, **kwargs))
+            entry = self._in_flight[key] = (task, [0])
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            metrics.SINGLE_FLIGHT_COALESCED.inc(1, self.name)
+
+        task, waiters = entry
+        waiters[0] += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.done() and waiters[0] == 1:
+                task.cancel()
+            raise
+        finally:
+            waiters[0] -= 1
 
 
 class TokenizerInterface(Protocol):
@@ -761,35 +1358,164 @@ def xml_to_json(xml_file):
         return None
 
 
-def process_combine_contexts(*context_lists):
+class ContextRowCache:
+    """LRU cache of rendered query context rows
+
+    Rows are keyed by a stable id (entity name, relation pair or chunk id) and stored
+    with the source values they were rendered from. An entry is only reused while those
+    values are unchanged, so a graph update (new description, degree, file_path...)
+    invalidates it on the next lookup, in every worker process.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._rows: OrderedDict[tuple, tuple[tuple, str]] = OrderedDict()
+
+    def render(self, kind: str, key: Any, row: dict[str, Any]) -> str:
+        """Return row as JSON without its opening brace, so that an id can be prepended"""
+        cache_key = (kind, key)
+        signature = tuple(row.values())
+        cached = self._rows.get(cache_key)
+        if cached is not None and cached[0] == signature:
+            self._rows.move_to_end(cache_key)
+            return cached[1]
+
+        created_at = row.get("created_at")
+        if isinstance(created_at, (int, float)):
+            row = {
+                **row,
+                "created_at": time.strftime(
+                    "%Y-%m-%d %H:%M:%S", time.localtime(created_at)
+                ),
+            }
+        fragment = json.dumps(row, ensure_ascii=False)[1:]
+
+        if self.max_size > 0:
+            self._rows[cache_key] = (signature, fragment)
+            self._rows.move_to_end(cache_key)
+            if len(self._rows) > self.max_size:
+                self._rows.popitem(last=False)
+        return fragment
+
+    def clear(self) -> None:
+        self._rows.clear()
+
+
+context_row_cache = ContextRowCache(
+    get_env_value("CONTEXT_ROW_CACHE_SIZE", DEFAULT_CONTEXT_ROW_CACHE_SIZE, int)
+)
+
+
+class QueryContextCache:
+    """LRU cache of assembled query contexts with a TTL and a size cap in bytes
+
+    Keys are built by the caller from everything the context depends on: keywords,
+    mode, top_k, token limits, ids filter and the workspace data version. A data
+    change bumps the version, so entries never need to be invalidated explicitly;
+    the TTL and size caps only bound how long unreachable entries are kept.
+    """
+
+    # Charged to every entry on top of its context, so that entries without a
+    # context (None) or with a tiny one are bounded by max_bytes too
+    ENTRY_OVERHEAD = 256
+
+    def __init__(self, max_bytes: int, ttl: float, max_entries: int):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # key -> (expires_at, size, context)
+        self._entries: OrderedDict[str, tuple[float, int, Any]] = OrderedDict()
+        self._bytes = 0
+
+    def get(self, key: str) -> tuple[bool, Any]:
+        """Return (hit, context); context may be None for queries without any context"""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] < time.monotonic():
+            self._pop(key)
+            entry = None
+        if entry is None:
+            metrics.QUERY_CONTEXT_CACHE_REQUESTS.inc(1, "miss")
+            return False, None
+        self._entries.move_to_end(key)
+        metrics.QUERY_CONTEXT_CACHE_REQUESTS.inc(1, "hit")
+        return True, entry[2]
+
+    def put(self, key: str, context: Any) -> None:
+        if self.max_bytes <= 0 or self.max_entries <= 0:
+            return
+        size = self.ENTRY_OVERHEAD + len(key)
+        if isinstance(context, str):
+            size += len(context.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        self._pop(key)
+        self._entries[key] = (time.monotonic() + self.ttl, size, context)
+        self._bytes += size
+        while self._bytes > self.max_bytes or len(self._entries) > self.max_entries:
+            self._pop(next(iter(self._entries)))
+
+    def _pop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+
+query_context_cache = QueryContextCache(
+    int(
+        get_env_value(
+            "QUERY_CONTEXT_CACHE_MAX_MB", DEFAULT_QUERY_CONTEXT_CACHE_MAX_MB, float
+        )
+        * 1024
+        * 1024
+    ),
+    get_env_value("QUERY_CONTEXT_CACHE_TTL", DEFAULT_QUERY_CONTEXT_CACHE_TTL, float),
+    get_env_value(
+        "QUERY_CONTEXT_CACHE_MAX_ENTRIES", DEFAULT_QUERY_CONTEXT_CACHE_MAX_ENTRIES, int
+    ),
+)
+
+
+def combine_context_rows(*row_lists):
     """
-    Combine multiple context lists and remove duplicate content
+    Combine multiple lists of (key, row) context rows, keeping the first row of every key
 
     Args:
-        *context_lists: Any number of context lists
+        *row_lists: Any number of (key, row) lists, keys are stable ids
 
     Returns:
-        Combined context list with duplicates removed
+        Combined list of (key, row) with duplicates removed
     """
-    seen_content = {}
-    combined_data = []
-
-    # Iterate through all input context lists
-    for context_list in context_lists:
-        if not context_list:  # Skip empty lists
+    seen_keys = set()
+    combined_rows = []
+    for row_list in row_lists:
+        if not row_list:  # Skip empty lists
             continue
-        for item in context_list:
-            content_dict = {k: v for k, v in item.items() if k != "id"}
-            content_key = tuple(sorted(content_dict.items()))
-            if content_key not in seen_content:
-                seen_content[content_key] = item
-                combined_data.append(item)
-
-    # Reassign IDs
-    for i, item in enumerate(combined_data):
-        item["id"] = str(i + 1)
-
-    return combined_data
+        for key, row in row_list:
+            if key not in seen_keys:
+                seen_keys.add(key)
+                combined_rows.append((key, row))
+    return combined_rows
+
+
+def context_rows_to_json(kind: str, rows) -> str:
+    """
+    Serialize (key, row) context rows into the JSON list used in prompts in a single pass
+
+    Rows are numbered with an "id" starting from 1, created_at timestamps are formatted,
+    and rendered rows are reused from context_row_cache.
+    """
+    return (
+        "["
+        + ", ".join(
+            f'{{"id": {i}, {context_row_cache.render(kind, key, row)}'
+            for i, (key, row) in enumerate(rows or [], 1)
+        )
+        + "]"
+    )
 
 
 async def get_best_cached_response(
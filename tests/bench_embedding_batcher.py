@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+"""
+Embedding batcher benchmark
+
+Simulates a TEI-like embedding server with a fixed cost per request plus a cost
+per token, and many concurrent vector upserts each embedding only a few texts
+(entity and relation upserts of the merge stage). Compares calling the embedding
+function directly with calling it through EmbeddingBatcher, which coalesces the
+texts of concurrent upserts into full, deduplicated batches.
+
+Usage:
+    python tests/bench_embedding_batcher.py --upserts 400 --texts 3 --max-async 8
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+import numpy as np
+from ascii_colors import ASCIIColors
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lightrag.utils import EmbeddingBatcher, priority_limit_async_func_call
+
+
+class FakeEmbeddingServer:
+    def __init__(self, request_overhead: float, token_cost: float, dim: int = 64):
+        self.request_overhead = request_overhead
+        self.token_cost = token_cost
+        self.dim = dim
+        self.requests = 0
+        self.texts = 0
+
+    async def embed(self, texts: list[str]) -> np.ndarray:
+        self.requests += 1
+        self.texts += len(texts)
+        tokens = sum(len(text.split()) for text in texts)
+        await asyncio.sleep(self.request_overhead + tokens * self.token_cost)
+        return np.random.rand(len(texts), self.dim).astype(np.float32)
+
+
+def make_upserts(args) -> list[list[str]]:
+    # A small vocabulary so that entities shared between chunks repeat
+    vocabulary = [f"entity-{i}" for i in range(args.upserts * args.texts // 2)]
+    return [
+        [f"{random.choice(vocabulary)} description " * 8 for _ in range(args.texts)]
+        for _ in range(args.upserts)
+    ]
+
+
+async def run(label: str, batched: bool, upserts, args):
+    server = FakeEmbeddingServer(args.overhead / 1000, args.token_cost / 1000)
+    func = priority_limit_async_func_call(args.max_async, name=label)(server.embed)
+    if batched:
+        func = EmbeddingBatcher(
+            func,
+            max_batch_size=args.batch_size,
+            max_batch_tokens=args.batch_tokens,
+            window=args.window / 1000,
+            count_tokens=lambda text: len(text.split()),
+        )
+
+    start = time.perf_counter()
+    await asyncio.gather(*(func(texts) for texts in upserts))
+    elapsed = time.perf_counter() - start
+    ASCIIColors.cyan(
+        f"  {label:<8} {elapsed:7.2f}s   requests {server.requests:6,}   "
+        f"texts embedded {server.texts:7,}   avg batch {server.texts / server.requests:6.1f}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Embedding batcher benchmark")
+    parser.add_argument("--upserts", type=int, default=400)
+    parser.add_argument("--texts", type=int, default=3, help="texts per upsert")
+    parser.add_argument("--max-async", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--batch-tokens", type=int, default=0)
+    parser.add_argument("--window", type=float, default=5.0, help="milliseconds")
+    parser.add_argument(
+        "--overhead", type=float, default=20.0, help="milliseconds per request"
+    )
+    parser.add_argument(
+        "--token-cost", type=float, default=0.05, help="milliseconds per token"
+    )
+    args = parser.parse_args()
+
+    random.seed(0)
+    upserts = make_upserts(args)
+    ASCIIColors.green(
+        f"{args.upserts} concurrent upserts x {args.texts} texts, "
+        f"max_async={args.max_async}, batch_size={args.batch_size}"
+    )
+    await run("direct", False, upserts, args)
+    await run("batched", True, upserts, args)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+"""
+FaissVectorDBStorage benchmark
+
+Measures upsert, re-upsert, delete, query and persistence times for every
+supported Faiss index type (flat / ivf / hnsw). Embeddings are random vectors
+so only the storage itself is measured.
+
+Usage:
+    python tests/bench_faiss_storage.py --num 1000000 --dim 128 --types flat,ivf,hnsw
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+from ascii_colors import ASCIIColors
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lightrag.utils import EmbeddingFunc
+from lightrag.kg.shared_storage import initialize_share_data
+from lightrag.kg.faiss_impl import FaissVectorDBStorage
+
+
+def make_embedding_func(dim: int) -> EmbeddingFunc:
+    async def random_embedding(texts, **kwargs):
+        return np.random.rand(len(texts), dim).astype(np.float32)
+
+    return EmbeddingFunc(embedding_dim=dim, max_token_size=8192, func=random_embedding)
+
+
+def timed(label: str, start: float, count: int | None = None):
+    elapsed = time.perf_counter() - start
+    rate = f" ({count / elapsed:,.0f} ops/s)" if count else ""
+    ASCIIColors.cyan(f"  {label:<24}{elapsed:10.3f}s{rate}")
+
+
+async def bench_index_type(index_type: str, args, working_dir: str):
+    ASCIIColors.green(f"== {index_type}: {args.num:,} vectors, dim={args.dim}")
+    storage = FaissVectorDBStorage(
+        namespace=f"bench_{index_type}",
+        global_config={
+            "working_dir": working_dir,
+            "embedding_batch_num": args.batch,
+            "vector_db_storage_cls_kwargs": {
+                "cosine_better_than_threshold": -1.0,
+                "faiss_index_type": index_type,
+                "faiss_ivf_nlist": args.nlist,
+            },
+        },
+        embedding_func=make_embedding_func(args.dim),
+        meta_fields={"content"},
+    )
+    await storage.initialize()
+
+    start = time.perf_counter()
+    for offset in range(0, args.num, args.chunk):
+        end = min(offset + args.chunk, args.num)
+        await storage.upsert(
+            {f"id-{i}": {"content": f"c{i}"} for i in range(offset, end)}
+        )
+    timed("upsert", start, args.num)
+
+    update_ids = np.random.choice(args.num, args.ops, replace=False)
+    start = time.perf_counter()
+    await storage.upsert({f"id-{i}": {"content": f"u{i}"} for i in update_ids})
+    timed("re-upsert", start, args.ops)
+
+    delete_ids = np.random.choice(args.num, args.ops, replace=False)
+    start = time.perf_counter()
+    await storage.delete([f"id-{i}" for i in delete_ids])
+    timed("delete", start, args.ops)
+
+    # Persisting also promotes ivf and compacts tombstones when needed
+    start = time.perf_counter()
+    await storage.index_done_callback()
+    timed("index_done_callback", start)
+
+    start = time.perf_counter()
+    for i in range(args.queries):
+        await storage.query(f"q{i}", top_k=args.top_k)
+    timed("query", start, args.queries)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="FaissVectorDBStorage benchmark")
+    parser.add_argument("--num", type=int, default=1_000_000)
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--types", default="flat,ivf,hnsw")
+    parser.add_argument("--chunk", type=int, default=50_000)
+    parser.add_argument("--batch", type=int, default=10_000)
+    parser.add_argument("--ops", type=int, default=1_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=20)
+    parser.add_argument("--nlist", type=int, default=1024)
+    args = parser.parse_args()
+
+    initialize_share_data()
+    working_dir = tempfile.mkdtemp(prefix="faiss_bench_")
+    try:
+        for index_type in args.types.split(","):
+            await bench_index_type(index_type.strip(), args, working_dir)
+    finally:
+        shutil.rmtree(working_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
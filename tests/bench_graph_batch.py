@@ -0,0 +1,249 @@
+#!/usr/bin/env python
+"""
+Graph storage batch operation conformance and benchmark
+
+Loads a random graph into the graph storage selected by LIGHTRAG_GRAPH_STORAGE
+(under a dedicated namespace that is dropped afterwards), then checks that
+every batch method of the storage (get_nodes_batch, node_degrees_batch,
+edge_degrees_batch, get_edges_batch, get_nodes_edges_batch) returns the same
+result as the per-id loop of BaseGraphStorage over the storage's own single-id
+methods, for ids that exist, ids that do not, duplicates, reversed edges and
+names with quotes and non-ASCII characters. Both paths are then timed.
+
+Exits with status 1 if any batch method disagrees with its per-id loop.
+
+Usage:
+    LIGHTRAG_GRAPH_STORAGE=MongoGraphStorage python tests/bench_graph_batch.py
+    python tests/bench_graph_batch.py --nodes 2000 --edges 6000 --batch 200
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+from ascii_colors import ASCIIColors
+from dotenv import load_dotenv
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lightrag.base import BaseGraphStorage
+from lightrag.kg import (
+    STORAGE_ENV_REQUIREMENTS,
+    STORAGES,
+    verify_storage_implementation,
+)
+from lightrag.kg.shared_storage import initialize_share_data
+
+BATCH_METHODS = (
+    "get_nodes_batch",
+    "node_degrees_batch",
+    "edge_degrees_batch",
+    "get_edges_batch",
+    "get_nodes_edges_batch",
+)
+
+NAME_PATTERNS = (
+    "Entity {i}",
+    "O'Brien {i}",
+    'The "Quoted" {i}',
+    "实体 {i}",
+    "back\\slash {i}",
+)
+
+
+def node_name(i: int) -> str:
+    return NAME_PATTERNS[i % len(NAME_PATTERNS)].format(i=i)
+
+
+async def create_storage(storage_type: str, namespace: str, embedding_dim: int):
+    verify_storage_implementation("GRAPH_STORAGE", storage_type)
+    required = STORAGE_ENV_REQUIREMENTS.get(storage_type, [])
+    missing = [var for var in required if not os.getenv(var)]
+    if missing:
+        raise RuntimeError(f"{storage_type} needs {', '.join(missing)}")
+    module = importlib.import_module(STORAGES[storage_type], package="lightrag")
+
+    async def embedding_func(texts):
+        return np.random.rand(len(texts), embedding_dim)
+
+    global_config = {
+        "embedding_batch_num": 10,
+        "vector_db_storage_cls_kwargs": {"cosine_better_than_threshold": 0.2},
+        "working_dir": os.environ.get("WORKING_DIR") or tempfile.mkdtemp(),
+    }
+    initialize_share_data()
+    storage = getattr(module, storage_type)(
+        namespace=namespace, global_config=global_config, embedding_func=embedding_func
+    )
+    await storage.initialize()
+    return storage
+
+
+async def load_graph(storage, num_nodes: int, num_edges: int, rng: random.Random):
+    edges = set()
+    while len(edges) < min(num_edges, num_nodes * (num_nodes - 1)):
+        src, tgt = rng.randrange(num_nodes), rng.randrange(num_nodes)
+        if src != tgt:
+            edges.add((src, tgt))
+
+    for i in range(num_nodes):
+        await storage.upsert_node(
+            node_name(i),
+            {
+                "entity_id": node_name(i),
+                "entity_type": "bench",
+                "description": f"description of {node_name(i)}",
+                "source_id": f"chunk-{i % 17}",
+            },
+        )
+    for src, tgt in edges:
+        await storage.upsert_edge(
+            node_name(src),
+            node_name(tgt),
+            {
+                "weight": 1.0,
+                "keywords": "bench",
+                "description": f"{node_name(src)} -> {node_name(tgt)}",
+                "source_id": f"chunk-{src % 17}",
+            },
+        )
+    return sorted(edges)
+
+
+def batch_args(method: str, node_ids: list[str], pairs: list[tuple[str, str]]):
+    if method == "edge_degrees_batch":
+        return pairs
+    if method == "get_edges_batch":
+        return [{"src": src, "tgt": tgt} for src, tgt in pairs]
+    return node_ids
+
+
+def normalize(value):
+    """Order-insensitive, JSON-comparable form of a batch result"""
+    if isinstance(value, dict):
+        return {
+            json.dumps(normalize(k), default=str): normalize(v)
+            for k, v in value.items()
+        }
+    if isinstance(value, tuple):
+        return [normalize(v) for v in value]
+    if isinstance(value, (list, set)):
+        items = [normalize(v) for v in value]
+        return sorted(items, key=lambda v: json.dumps(v, sort_keys=True, default=str))
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return value
+
+
+def describe_mismatch(expected: dict, actual: dict) -> str:
+    missing = sorted(set(expected) - set(actual))
+    extra = sorted(set(actual) - set(expected))
+    differing = [
+        key
+        for key in set(expected) & set(actual)
+        if normalize(expected[key]) != normalize(actual[key])
+    ]
+    return (
+        f"{len(missing)} keys missing, {len(extra)} unexpected, "
+        f"{len(differing)} differing, e.g. {(missing or extra or differing)[:3]}"
+    )
+
+
+def sample(rng: random.Random, num_nodes: int, edges: list, batch: int):
+    node_ids = [node_name(rng.randrange(num_nodes)) for _ in range(batch)]
+    node_ids += [f"missing {i}" for i in range(3)] + node_ids[:2]
+    sampled = rng.sample(edges, min(batch, len(edges)))
+    pairs = [(node_name(src), node_name(tgt)) for src, tgt in sampled]
+    pairs += [(tgt, src) for src, tgt in pairs[:5]]
+    pairs += [(node_name(0), "missing 0"), ("missing 1", "missing 2")] + pairs[:2]
+    return node_ids, pairs
+
+
+async def main():
+    parser = argparse.ArgumentParser(
+        description="Graph storage batch operation conformance and benchmark"
+    )
+    parser.add_argument(
+        "--storage", default=None, help="default: LIGHTRAG_GRAPH_STORAGE"
+    )
+    parser.add_argument("--namespace", default="bench_graph_batch")
+    parser.add_argument("--nodes", type=int, default=500)
+    parser.add_argument("--edges", type=int, default=1500)
+    parser.add_argument("--batch", type=int, default=100, help="ids per batch call")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--embedding-dim", type=int, default=int(os.getenv("EMBEDDING_DIM", 1024))
+    )
+    args = parser.parse_args()
+
+    load_dotenv(dotenv_path=".env", override=False)
+    storage_type = args.storage or os.getenv(
+        "LIGHTRAG_GRAPH_STORAGE", "NetworkXStorage"
+    )
+    storage = await create_storage(storage_type, args.namespace, args.embedding_dim)
+    rng = random.Random(args.seed)
+
+    failures = 0
+    try:
+        await storage.drop()
+        start = time.perf_counter()
+        edges = await load_graph(storage, args.nodes, args.edges, rng)
+        ASCIIColors.green(
+            f"{storage_type}: loaded {args.nodes} nodes, {len(edges)} edges "
+            f"in {time.perf_counter() - start:.1f}s"
+        )
+
+        timings = {method: [0.0, 0.0] for method in BATCH_METHODS}
+        for _ in range(args.rounds):
+            node_ids, pairs = sample(rng, args.nodes, edges, args.batch)
+            for method in BATCH_METHODS:
+                call_args = batch_args(method, node_ids, pairs)
+
+                start = time.perf_counter()
+                expected = await getattr(BaseGraphStorage, method)(storage, call_args)
+                timings[method][0] += time.perf_counter() - start
+
+                start = time.perf_counter()
+                actual = await getattr(storage, method)(call_args)
+                timings[method][1] += time.perf_counter() - start
+
+                if normalize(actual) != normalize(expected):
+                    failures += 1
+                    ASCIIColors.red(
+                        f"  {method}: {describe_mismatch(expected, actual)}"
+                    )
+
+        ASCIIColors.cyan(
+            f"  {'method':<24}{'per-id loop':>14}{'batch':>12}{'speedup':>10}  "
+            f"({args.rounds} rounds of {args.batch} ids)"
+        )
+        for method, (loop_time, batch_time) in timings.items():
+            native = getattr(type(storage), method) is not getattr(
+                BaseGraphStorage, method
+            )
+            ASCIIColors.cyan(
+                f"  {method:<24}{loop_time * 1000:11.1f} ms{batch_time * 1000:9.1f} ms"
+                f"{loop_time / max(batch_time, 1e-9):9.1f}x"
+                f"{'' if native else '  (inherited per-id loop)'}"
+            )
+    finally:
+        await storage.drop()
+        await storage.finalize()
+
+    if failures:
+        ASCIIColors.red(f"{failures} batch results differ from the per-id methods")
+        sys.exit(1)
+    ASCIIColors.green("All batch methods agree with the per-id methods")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,216 @@
+#!/usr/bin/env python
+"""
+Local keyword extractor benchmark
+
+Runs offline against the working directory of an index built with the JSON KV
+storage. Corpus statistics come from kv_store_text_chunks.json, the LLM keywords
+of past queries from the keyword entries of kv_store_llm_response_cache.json
+(or from a live OpenAI-compatible endpoint with --llm-model, which also times
+the LLM round trips). For every query, both keyword sets retrieve the top-k
+chunks with the same BM25 scorer; the benchmark reports the overlap of those
+chunk sets, the keyword overlap, the share of queries the local extractor is
+confident enough for, and the extraction latencies.
+
+Usage:
+    python tests/bench_keyword_extractor.py --working-dir ./rag_storage
+    python tests/bench_keyword_extractor.py --working-dir ./rag_storage \\
+        --queries queries.txt --llm-model gpt-4o-mini
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import math
+import os
+import re
+import statistics
+import sys
+import time
+from collections import Counter, defaultdict
+
+from ascii_colors import ASCIIColors
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lightrag.constants import DEFAULT_KEYWORD_EXTRACTOR_MIN_CONFIDENCE
+from lightrag.keyword_extractor import LocalKeywordExtractor, _corpus_terms
+from lightrag.kg.shared_storage import initialize_share_data
+from lightrag.prompt import PROMPTS
+
+
+class InMemoryChunks:
+    def __init__(self, chunks: dict):
+        self._chunks = chunks
+
+    async def get_all_iter(self, prefix: str = "", batch_size: int = 1000):
+        items = list(self._chunks.items())
+        for start in range(0, len(items), batch_size):
+            yield dict(items[start : start + batch_size])
+
+
+class BM25:
+    def __init__(self, chunks: dict, k1: float = 1.5, b: float = 0.75):
+        self.k1, self.b = k1, b
+        self.postings = defaultdict(dict)
+        self.lengths = {}
+        for chunk_id, chunk in chunks.items():
+            terms = Counter()
+            for token in re.findall(r"\S+", chunk.get("content", "")):
+                terms.update(_corpus_terms(token))
+            self.lengths[chunk_id] = sum(terms.values()) or 1
+            for term, count in terms.items():
+                self.postings[term][chunk_id] = count
+        self.average_length = sum(self.lengths.values()) / max(len(self.lengths), 1)
+
+    def search(self, keywords: list[str], top_k: int) -> list[str]:
+        scores = Counter()
+        documents = len(self.lengths)
+        for term in set().union(*(_corpus_terms(k) for k in keywords)) if keywords else ():
+            postings = self.postings.get(term, {})
+            idf = math.log(1 + (documents - len(postings) + 0.5) / (len(postings) + 0.5))
+            for chunk_id, count in postings.items():
+                norm = 1 - self.b + self.b * self.lengths[chunk_id] / self.average_length
+                scores[chunk_id] += idf * count * (self.k1 + 1) / (count + self.k1 * norm)
+        return [chunk_id for chunk_id, _ in scores.most_common(top_k)]
+
+
+def load_json_store(working_dir: str, namespace: str) -> dict:
+    paths = glob.glob(os.path.join(working_dir, f"kv_store_*{namespace}.json"))
+    if not paths:
+        return {}
+    with open(paths[0], encoding="utf-8") as f:
+        return json.load(f)
+
+
+def cached_llm_keywords(working_dir: str) -> dict[str, tuple[list, list]]:
+    keywords = {}
+    for mode_cache in load_json_store(working_dir, "llm_response_cache").values():
+        for entry in mode_cache.values():
+            if not isinstance(entry, dict) or entry.get("cache_type") != "keywords":
+                continue
+            try:
+                data = json.loads(entry["return"])
+            except (TypeError, ValueError):
+                continue
+            keywords[entry["original_prompt"]] = (
+                data.get("high_level_keywords", []),
+                data.get("low_level_keywords", []),
+            )
+    return keywords
+
+
+async def live_llm_keywords(query: str, args) -> tuple[list, list, float]:
+    from lightrag.llm.openai import openai_complete_if_cache
+
+    prompt = PROMPTS["keywords_extraction"].format(
+        query=query,
+        examples="\n".join(PROMPTS["keywords_extraction_examples"]),
+        language=PROMPTS["DEFAULT_LANGUAGE"],
+        history="",
+    )
+    start = time.perf_counter()
+    result = await openai_complete_if_cache(
+        args.llm_model, prompt, base_url=args.base_url, api_key=args.api_key
+    )
+    elapsed = time.perf_counter() - start
+    match = re.search(r"\{.*\}", result, re.DOTALL)
+    data = json.loads(match.group(0)) if match else {}
+    return (
+        data.get("high_level_keywords", []),
+        data.get("low_level_keywords", []),
+        elapsed,
+    )
+
+
+def jaccard(a: list[str], b: list[str]) -> float:
+    a, b = {k.lower() for k in a}, {k.lower() for k in b}
+    return len(a & b) / len(a | b) if a | b else 1.0
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Local keyword extractor benchmark")
+    parser.add_argument("--working-dir", required=True)
+    parser.add_argument("--queries", help="file with one query per line")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument(
+        "--min-confidence", type=float, default=DEFAULT_KEYWORD_EXTRACTOR_MIN_CONFIDENCE
+    )
+    parser.add_argument("--llm-model", help="query a live OpenAI-compatible LLM")
+    parser.add_argument("--base-url", default=os.getenv("LLM_BINDING_HOST"))
+    parser.add_argument("--api-key", default=os.getenv("LLM_BINDING_API_KEY"))
+    args = parser.parse_args()
+
+    initialize_share_data()
+    chunks = load_json_store(args.working_dir, "text_chunks")
+    if not chunks:
+        ASCIIColors.red(f"No kv_store_text_chunks.json in {args.working_dir}")
+        return
+    extractor = LocalKeywordExtractor("", InMemoryChunks(chunks))
+    await extractor.refresh()
+    bm25 = BM25(chunks)
+
+    cached = cached_llm_keywords(args.working_dir)
+    if args.queries:
+        with open(args.queries, encoding="utf-8") as f:
+            queries = [line.strip() for line in f if line.strip()]
+    else:
+        queries = list(cached)
+    if not args.llm_model:
+        queries = [q for q in queries if q in cached]
+    if not queries:
+        ASCIIColors.red("No queries with LLM keywords (cached or live)")
+        return
+
+    local_latencies, llm_latencies = [], []
+    overlaps, confident_overlaps, keyword_overlaps = [], [], []
+    for query in queries:
+        start = time.perf_counter()
+        extraction = extractor.extract(query)
+        local_latencies.append(time.perf_counter() - start)
+
+        if args.llm_model:
+            hl, ll, elapsed = await live_llm_keywords(query, args)
+            llm_latencies.append(elapsed)
+        else:
+            hl, ll = cached[query]
+
+        llm_chunks = set(bm25.search(hl + ll, args.top_k))
+        local_chunks = set(
+            bm25.search(extraction.hl_keywords + extraction.ll_keywords, args.top_k)
+        )
+        overlap = len(llm_chunks & local_chunks) / max(len(llm_chunks), 1)
+        overlaps.append(overlap)
+        keyword_overlaps.append(
+            jaccard(hl + ll, extraction.hl_keywords + extraction.ll_keywords)
+        )
+        if extraction.ll_keywords and extraction.confidence >= args.min_confidence:
+            confident_overlaps.append(overlap)
+
+    ASCIIColors.green(
+        f"{len(queries)} queries, {len(chunks):,} chunks, "
+        f"{len(extractor._document_frequencies):,} terms, top_k={args.top_k}"
+    )
+    ASCIIColors.cyan(
+        f"  local latency   mean {statistics.mean(local_latencies) * 1000:8.3f} ms   "
+        f"max {max(local_latencies) * 1000:8.3f} ms"
+    )
+    if llm_latencies:
+        ASCIIColors.cyan(
+            f"  LLM latency     mean {statistics.mean(llm_latencies) * 1000:8.1f} ms   "
+            f"max {max(llm_latencies) * 1000:8.1f} ms"
+        )
+    else:
+        ASCIIColors.cyan("  LLM latency     n/a (cached keywords, use --llm-model)")
+    ASCIIColors.cyan(
+        f"  chunk overlap   {statistics.mean(overlaps):6.1%} all queries, "
+        f"{statistics.mean(confident_overlaps) if confident_overlaps else 0:6.1%} on the "
+        f"{len(confident_overlaps) / len(queries):.0%} answered locally "
+        f"(confidence >= {args.min_confidence})"
+    )
+    ASCIIColors.cyan(f"  keyword overlap {statistics.mean(keyword_overlaps):6.1%} (Jaccard)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
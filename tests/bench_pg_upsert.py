@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+"""
+PostgreSQL upsert throughput benchmark
+
+Compares the former one-statement-per-row upsert loop with the executemany
+bulk path used by PGVectorStorage / PGKVStorage, for chunk rows with vectors
+and for full_docs rows. Rows are written under a dedicated workspace that is
+removed afterwards. Connection settings are read from .env / config.ini.
+
+No results of this benchmark have been recorded yet: the bulk path has not
+been measured against a real PostgreSQL server.
+
+Usage:
+    python tests/bench_pg_upsert.py --num 2000 --dim 1024
+"""
+
+import argparse
+import asyncio
+import datetime
+import os
+import sys
+import time
+
+import numpy as np
+from ascii_colors import ASCIIColors
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lightrag.kg.postgres_impl import PostgreSQLDB, ClientManager, SQL_TEMPLATES
+
+
+def chunk_rows(db: PostgreSQLDB, num: int, dim: int, tag: str) -> list[dict]:
+    now = datetime.datetime.now(datetime.timezone.utc)
+    vectors = np.random.rand(num, dim).astype(np.float32)
+    return [
+        {
+            "workspace": db.workspace,
+            "id": f"bench-{tag}-{i}",
+            "tokens": 1200,
+            "chunk_order_index": i,
+            "full_doc_id": f"bench-doc-{tag}",
+            "content": "lorem ipsum " * 200,
+            "content_vector": vectors[i],
+            "file_path": "bench.txt",
+            "create_time": now,
+            "update_time": now,
+        }
+        for i in range(num)
+    ]
+
+
+def doc_rows(db: PostgreSQLDB, num: int, tag: str) -> list[dict]:
+    return [
+        {"id": f"bench-{tag}-{i}", "content": "lorem ipsum " * 200, "workspace": db.workspace}
+        for i in range(num)
+    ]
+
+
+async def bench(label: str, db: PostgreSQLDB, sql: str, rows: list[dict], bulk: bool):
+    start = time.perf_counter()
+    if bulk:
+        await db.executemany(sql, rows)
+    else:
+        for row in rows:
+            await db.execute(sql, row)
+    elapsed = time.perf_counter() - start
+    ASCIIColors.cyan(f"  {label:<28}{elapsed:8.2f}s  {len(rows) / elapsed:10,.0f} rows/s")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="PostgreSQL upsert throughput benchmark")
+    parser.add_argument("--num", type=int, default=2000)
+    parser.add_argument("--dim", type=int, default=1024)
+    args = parser.parse_args()
+
+    config = ClientManager.get_config()
+    config["workspace"] = "bench_upsert"
+    db = PostgreSQLDB(config)
+    await db.initdb()
+    await db.check_tables()
+
+    try:
+        ASCIIColors.green(f"LIGHTRAG_DOC_CHUNKS: {args.num:,} rows, dim={args.dim}")
+        sql = SQL_TEMPLATES["upsert_chunk"]
+        await bench("per-row execute", db, sql, chunk_rows(db, args.num, args.dim, "row"), False)
+        await bench("executemany", db, sql, chunk_rows(db, args.num, args.dim, "bulk"), True)
+
+        ASCIIColors.green(f"LIGHTRAG_DOC_FULL: {args.num:,} rows")
+        sql = SQL_TEMPLATES["upsert_doc_full"]
+        await bench("per-row execute", db, sql, doc_rows(db, args.num, "row"), False)
+        await bench("executemany", db, sql, doc_rows(db, args.num, "bulk"), True)
+    finally:
+        for table_name in ("LIGHTRAG_DOC_CHUNKS", "LIGHTRAG_DOC_FULL"):
+            await db.execute(
+                f"DELETE FROM {table_name} WHERE workspace=$1",
+                {"workspace": db.workspace},
+            )
+        await db.pool.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
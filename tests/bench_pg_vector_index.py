@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+"""
+PGVectorStorage ANN index benchmark
+
+Loads random vectors into LIGHTRAG_DOC_CHUNKS under a dedicated workspace and
+compares the configured pgvector index (POSTGRES_VECTOR_INDEX_TYPE=hnsw/ivfflat)
+against the exact scan: recall@k and mean / p95 latency for each ef_search
+(hnsw) or probes (ivfflat) value. Connection settings are read from .env /
+config.ini the same way as the storage itself.
+
+Usage:
+    POSTGRES_VECTOR_INDEX_TYPE=hnsw python tests/bench_pg_vector_index.py --num 100000 --dim 768
+"""
+
+import argparse
+import asyncio
+import datetime
+import os
+import sys
+import time
+
+import numpy as np
+from ascii_colors import ASCIIColors
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lightrag.kg.postgres_impl import (
+    PostgreSQLDB,
+    ClientManager,
+    SQL_TEMPLATES,
+    VECTOR_INDEX_OPS,
+)
+
+TABLE_NAME = "LIGHTRAG_DOC_CHUNKS"
+
+
+def random_vectors(n: int, dim: int) -> np.ndarray:
+    vectors = np.random.randn(n, dim).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+async def load_vectors(db: PostgreSQLDB, vectors: np.ndarray, batch: int):
+    now = datetime.datetime.now(datetime.timezone.utc)
+    sql = f"""INSERT INTO {TABLE_NAME} (workspace, id, tokens, chunk_order_index,
+              full_doc_id, content, content_vector, file_path, create_time, update_time)
+              VALUES ($1, $2, 0, $3, 'bench-doc', '', $4, '', $5, $5)
+              ON CONFLICT (workspace, id) DO NOTHING"""
+    async with db.pool.acquire() as connection:
+        for offset in range(0, len(vectors), batch):
+            rows = [
+                (db.workspace, f"bench-{i}", i, vectors[i], now)
+                for i in range(offset, min(offset + batch, len(vectors)))
+            ]
+            await connection.executemany(sql, rows)
+
+
+async def search(db: PostgreSQLDB, query: np.ndarray, top_k: int, dim: int, settings):
+    operator, similarity = VECTOR_INDEX_OPS[db.vector_index_ops]
+    distance = f"{db.vector_column(dim)} {operator} $2"
+    sql = SQL_TEMPLATES["chunks_ann"].format(
+        distance=distance, similarity=similarity.format(distance=distance)
+    )
+    params = {
+        "workspace": db.workspace,
+        "embedding": query,
+        "better_than_threshold": -1.0,
+        "top_k": top_k,
+    }
+    start = time.perf_counter()
+    rows = await db.query(sql, params=params, multirows=True, settings=settings)
+    return [row["id"] for row in rows], time.perf_counter() - start
+
+
+def report(label: str, latencies: list[float], recall: float | None = None):
+    latencies_ms = np.array(latencies) * 1000
+    recall_str = f"  recall={recall:.4f}" if recall is not None else ""
+    ASCIIColors.cyan(
+        f"  {label:<22} mean={latencies_ms.mean():8.2f}ms  "
+        f"p95={np.percentile(latencies_ms, 95):8.2f}ms{recall_str}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="pgvector ANN index benchmark")
+    parser.add_argument("--num", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=20)
+    parser.add_argument("--batch", type=int, default=1_000)
+    parser.add_argument(
+        "--search-values",
+        default="10,40,100,200",
+        help="hnsw.ef_search (hnsw) or ivfflat.probes (ivfflat) values to compare",
+    )
+    parser.add_argument("--keep", action="store_true", help="keep benchmark rows")
+    args = parser.parse_args()
+
+    config = ClientManager.get_config()
+    config["workspace"] = "bench_vector_index"
+    db = PostgreSQLDB(config)
+    if db.vector_index_type == "none":
+        ASCIIColors.red("Set POSTGRES_VECTOR_INDEX_TYPE to hnsw or ivfflat first")
+        return
+    await db.initdb()
+    await db.check_tables()
+
+    try:
+        ASCIIColors.green(f"Loading {args.num:,} vectors (dim={args.dim})")
+        start = time.perf_counter()
+        await load_vectors(db, random_vectors(args.num, args.dim), args.batch)
+        ASCIIColors.cyan(f"  loaded in {time.perf_counter() - start:.1f}s")
+
+        start = time.perf_counter()
+        await db.check_vector_index(TABLE_NAME, args.dim)
+        await db.execute(f"ANALYZE {TABLE_NAME}")
+        ASCIIColors.cyan(
+            f"  {db.vector_index_type} index built in {time.perf_counter() - start:.1f}s"
+        )
+
+        queries = random_vectors(args.queries, args.dim)
+
+        # Exact scan: disable index scans so the planner sorts every row
+        exact_settings = {"enable_indexscan": 0}
+        exact_results, latencies = [], []
+        for query in queries:
+            ids, elapsed = await search(db, query, args.top_k, args.dim, exact_settings)
+            exact_results.append(set(ids))
+            latencies.append(elapsed)
+        ASCIIColors.green(f"top_k={args.top_k}, {args.queries} queries")
+        report("exact scan", latencies)
+
+        setting_name = (
+            "hnsw.ef_search" if db.vector_index_type == "hnsw" else "ivfflat.probes"
+        )
+        for value in [int(v) for v in args.search_values.split(",")]:
+            hits, latencies = 0, []
+            for query, exact in zip(queries, exact_results):
+                ids, elapsed = await search(
+                    db, query, args.top_k, args.dim, {setting_name: value}
+                )
+                hits += len(exact.intersection(ids))
+                latencies.append(elapsed)
+            recall = hits / max(sum(len(exact) for exact in exact_results), 1)
+            report(f"{setting_name}={value}", latencies, recall)
+    finally:
+        if not args.keep:
+            await db.execute(
+                f"DELETE FROM {TABLE_NAME} WHERE workspace=$1",
+                {"workspace": db.workspace},
+            )
+        await db.pool.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+"""
+priority_limit_async_func_call micro-benchmark
+
+Measures the per-call overhead of the event-driven priority limiter against the
+former worker/polling implementation, which is loaded from a git revision of
+lightrag/utils.py (--baseline-ref). The wrapped function is a no-op coroutine,
+so the numbers are pure limiter cost: sequential calls, bursts of concurrent
+calls larger than max_size, and timer wakeups while idle.
+
+Usage:
+    python tests/bench_priority_limiter.py --calls 20000 --max-size 64
+"""
+
+import argparse
+import ast
+import asyncio
+import os
+import subprocess
+import sys
+import time
+import weakref
+from functools import wraps
+
+from ascii_colors import ASCIIColors
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lightrag import metrics
+from lightrag.utils import logger, QueueFullError, priority_limit_async_func_call
+
+# Last revision with the polling worker implementation
+DEFAULT_BASELINE_REF = "0d59ab7"
+
+
+def load_baseline(ref: str):
+    """Extract priority_limit_async_func_call from lightrag/utils.py at a git revision"""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    source = subprocess.check_output(
+        ["git", "show", f"{ref}:lightrag/utils.py"], cwd=root, text=True
+    )
+    for node in ast.parse(source).body:
+        if (
+            isinstance(node, ast.FunctionDef)
+            and node.name == "priority_limit_async_func_call"
+        ):
+            namespace = {
+                "asyncio": asyncio,
+                "weakref": weakref,
+                "wraps": wraps,
+                "time": time,
+                "logger": logger,
+                "metrics": metrics,
+                "QueueFullError": QueueFullError,
+            }
+            exec(ast.get_source_segment(source, node), namespace)
+            return namespace["priority_limit_async_func_call"]
+    raise RuntimeError(f"priority_limit_async_func_call not found at {ref}")
+
+
+async def noop(x):
+    return x
+
+
+async def count_idle_wakeups(seconds: float) -> int:
+    """Number of event loop callbacks run while nothing is being called"""
+    loop = asyncio.get_running_loop()
+    original = loop._run_once
+    count = 0
+
+    def counting_run_once():
+        nonlocal count
+        count += 1
+        original()
+
+    loop._run_once = counting_run_once
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        loop._run_once = original
+    return count
+
+
+async def bench(label: str, decorator, args):
+    limited = decorator(args.max_size)(noop)
+
+    start = time.perf_counter()
+    for i in range(args.calls):
+        await limited(i)
+    sequential = (time.perf_counter() - start) / args.calls
+
+    start = time.perf_counter()
+    for offset in range(0, args.calls, args.burst):
+        await asyncio.gather(
+            *(limited(i) for i in range(offset, min(offset + args.burst, args.calls)))
+        )
+    burst = (time.perf_counter() - start) / args.calls
+
+    wakeups = await count_idle_wakeups(args.idle)
+
+    ASCIIColors.cyan(
+        f"  {label:<10} sequential {sequential * 1e6:8.2f} us/call   "
+        f"burst {burst * 1e6:8.2f} us/call   idle loop iterations/s {wakeups / args.idle:8.1f}"
+    )
+    if hasattr(limited, "shutdown"):
+        await limited.shutdown()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Priority limiter micro-benchmark")
+    parser.add_argument("--calls", type=int, default=20_000)
+    parser.add_argument("--max-size", type=int, default=64)
+    parser.add_argument("--burst", type=int, default=512)
+    parser.add_argument("--idle", type=float, default=3.0)
+    parser.add_argument("--baseline-ref", default=DEFAULT_BASELINE_REF)
+    args = parser.parse_args()
+
+    ASCIIColors.green(
+        f"{args.calls:,} calls, max_size={args.max_size}, burst={args.burst}"
+    )
+    await bench("polling", load_baseline(args.baseline_ref), args)
+    await bench("event", priority_limit_async_func_call, args)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
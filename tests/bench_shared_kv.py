@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+"""
+Shared KV engine benchmark
+
+Compares the multiprocessing.Manager dict proxy with the shared-memory
+SharedKVStore used by JsonKVStorage / JsonDocStatusStorage when WORKERS > 1.
+Several forked worker processes run random get / get_by_ids style reads
+(reads on the Manager proxy hold a Manager lock, as the storages did) while
+one process keeps writing, then every worker reports its read rate.
+
+Usage:
+    python tests/bench_shared_kv.py --workers 8 --records 20000 --seconds 5
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from ascii_colors import ASCIIColors
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lightrag.kg.shared_kv import SharedKVStore
+
+
+def make_record(i: int) -> dict:
+    return {
+        "status": "processed",
+        "content_summary": f"document {i} " * 20,
+        "chunks_count": i % 17,
+        "file_path": f"doc-{i}.txt",
+    }
+
+
+def reader(open_store, lock, records, batch, seconds, results):
+    store = open_store()
+    keys = [f"doc-{i}" for i in range(records)]
+    ops = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        ids = random.sample(keys, batch)
+        if lock is not None:
+            with lock:
+                [store.get(id) for id in ids]
+        else:
+            [store.get(id) for id in ids]
+        ops += 1
+    results.put(ops * batch / seconds)
+
+
+def writer(open_store, lock, records, batch, seconds, results):
+    store = open_store()
+    ops = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        start = random.randrange(records)
+        data = {f"doc-{(start + i) % records}": make_record(i) for i in range(batch)}
+        with lock:
+            store.update(data)
+        ops += 1
+    results.put(ops * batch / seconds)
+
+
+def run(label, open_store, lock, read_lock, args):
+    results, write_results = mp.Queue(), mp.Queue()
+    procs = [
+        mp.Process(
+            target=reader,
+            args=(open_store, read_lock, args.records, args.batch, args.seconds, results),
+        )
+        for _ in range(args.workers)
+    ]
+    procs.append(
+        mp.Process(
+            target=writer,
+            args=(open_store, lock, args.records, args.batch, args.seconds, write_results),
+        )
+    )
+    for proc in procs:
+        proc.start()
+    rates = [results.get() for _ in range(args.workers)]
+    write_rate = write_results.get()
+    for proc in procs:
+        proc.join()
+    ASCIIColors.cyan(
+        f"  {label:<10} reads {sum(rates):12,.0f} keys/s total "
+        f"({sum(rates) / len(rates):10,.0f} per worker)  writes {write_rate:10,.0f} keys/s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared KV engine benchmark")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--records", type=int, default=20_000)
+    parser.add_argument("--batch", type=int, default=20)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    mp.set_start_method("fork")
+    initial = {f"doc-{i}": make_record(i) for i in range(args.records)}
+    ASCIIColors.green(
+        f"{args.workers} readers + 1 writer, {args.records:,} records, "
+        f"batch={args.batch}, {args.seconds}s"
+    )
+
+    manager = mp.Manager()
+    shared_dict = manager.dict()
+    shared_dict.update(initial)
+    lock = manager.Lock()
+    run("manager", lambda: shared_dict, lock, lock, args)
+    manager.shutdown()
+
+    directory = tempfile.mkdtemp(
+        prefix="lightrag_kv_bench_",
+        dir="/dev/shm" if os.path.isdir("/dev/shm") else None,
+    )
+    try:
+        SharedKVStore(directory, "bench").update(initial)
+        run("shm", lambda: SharedKVStore(directory, "bench"), mp.Lock(), None, args)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
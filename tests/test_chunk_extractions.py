@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+"""
+Chunk extraction store tests
+
+Runs the insert pipeline on the default local storages with a mock LLM and
+checks that:
+- a chunk shared by two documents is extracted once, and its extraction record
+  is kept until the last document using it is deleted
+- arebuild_graph_from_extractions reproduces the graph without extraction calls
+
+Usage:
+    python tests/test_chunk_extractions.py
+"""
+
+import asyncio
+import hashlib
+import os
+import sys
+import tempfile
+
+import numpy as np
+from ascii_colors import ASCIIColors
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lightrag import LightRAG
+from lightrag.kg.shared_storage import finalize_share_data, initialize_pipeline_status
+from lightrag.utils import EmbeddingFunc, Tokenizer
+
+# Entity names that never occur in the prompt templates
+NAMES = ["Zorblax", "Quintor", "Vellumar", "Drennik"]
+
+SHARED = "Zorblax met Quintor at the harbour."
+DOC_A = f"{SHARED}\n\nVellumar stays at home with Quintor."
+DOC_B = f"{SHARED}\n\nDrennik travels far from Zorblax."
+
+
+class ByteTokenizer:
+    def encode(self, content):
+        return list(content.encode())
+
+    def decode(self, tokens):
+        return bytes(tokens).decode(errors="ignore")
+
+
+class MockLLM:
+    """Extracts the known names found in the prompt, related in order"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def __call__(self, prompt, system_prompt=None, history_messages=[], **kwargs):
+        self.calls += 1
+        text = prompt.rsplit("Text:", 1)[-1]
+        found = [name for name in NAMES if name in text]
+        records = [
+            f'("entity"<|>"{name}"<|>"person"<|>"{name} appears in the story")'
+            for name in found
+        ]
+        records += [
+            f'("relationship"<|>"{src}"<|>"{tgt}"<|>"{src} knows {tgt}"'
+            f'<|>"acquaintance"<|>1.0)'
+            for src, tgt in zip(found, found[1:])
+        ]
+        return "##".join(records) + "<|COMPLETE|>"
+
+
+async def mock_embedding(texts):
+    return np.array(
+        [
+            np.frombuffer(hashlib.sha256(t.encode()).digest(), dtype=np.uint8)[:16]
+            for t in texts
+        ],
+        dtype=np.float32,
+    )
+
+
+async def make_rag(working_dir: str, llm: MockLLM) -> LightRAG:
+    rag = LightRAG(
+        working_dir=working_dir,
+        llm_model_func=llm,
+        tokenizer=Tokenizer("bytes", ByteTokenizer()),
+        embedding_func=EmbeddingFunc(
+            embedding_dim=16, max_token_size=8192, func=mock_embedding
+        ),
+        enable_chunk_extraction_store=True,
+        enable_llm_cache=False,
+        enable_llm_cache_for_entity_extract=False,
+        embedding_cache_max_mb=0,
+        entity_extract_max_gleaning=0,
+    )
+    await rag.initialize_storages()
+    await initialize_pipeline_status()
+    return rag
+
+
+async def close_rag(rag: LightRAG):
+    await rag.finalize_storages()
+    # Each test starts from empty shared namespaces
+    finalize_share_data()
+
+
+async def insert(rag: LightRAG, content: str, doc_id: str):
+    await rag.ainsert(
+        content, split_by_character="\n\n", split_by_character_only=True, ids=doc_id
+    )
+
+
+async def all_records(rag: LightRAG) -> dict:
+    records = {}
+    async for batch in rag.chunk_extractions.get_all_iter():
+        records.update(batch)
+    return records
+
+
+async def graph_snapshot(rag: LightRAG) -> tuple[dict, dict]:
+    graph = rag.chunk_entity_relation_graph
+    nodes, edges = {}, {}
+    for label in await graph.get_all_labels():
+        node = await graph.get_node(label)
+        nodes[label] = (node["description"], set(node["source_id"].split("<SEP>")))
+        for src, tgt in await graph.get_node_edges(label) or []:
+            edge = await graph.get_edge(src, tgt)
+            edges[tuple(sorted((src, tgt)))] = (
+                edge["description"],
+                set(edge["source_id"].split("<SEP>")),
+            )
+    return nodes, edges
+
+
+async def test_shared_chunk_references():
+    """Shared chunk records live until their last document is released"""
+    llm = MockLLM()
+    with tempfile.TemporaryDirectory() as working_dir:
+        rag = await make_rag(working_dir, llm)
+        try:
+            await insert(rag, DOC_A, "doc-A")
+            calls = llm.calls
+            await insert(rag, DOC_B, "doc-B")
+            assert llm.calls - calls == 1, "shared chunk extracted again"
+
+            records = await all_records(rag)
+            refs = {chunk_id: r["full_doc_ids"] for chunk_id, r in records.items()}
+            assert sorted(refs.values()) == [
+                ["doc-A"],
+                ["doc-A", "doc-B"],
+                ["doc-B"],
+            ], refs
+            shared = next(c for c, docs in refs.items() if len(docs) == 2)
+
+            # The deletion step of adelete_by_doc_id
+            await rag._release_extraction_records(list(records), "doc-A")
+            records = await all_records(rag)
+            assert shared in records, "shared record deleted with one document"
+            assert records[shared]["full_doc_ids"] == ["doc-B"]
+            assert records[shared]["full_doc_id"] == "doc-B"
+            assert all(r["full_doc_ids"] == ["doc-B"] for r in records.values())
+
+            await rag._release_extraction_records(list(records), "doc-B")
+            assert await all_records(rag) == {}
+        finally:
+            await close_rag(rag)
+
+
+async def test_rebuild_reproduces_graph():
+    """A rebuild from the stored extractions reproduces the graph"""
+    llm = MockLLM()
+    with tempfile.TemporaryDirectory() as working_dir:
+        rag = await make_rag(working_dir, llm)
+        try:
+            await insert(rag, DOC_A, "doc-A")
+            await insert(rag, DOC_B, "doc-B")
+            before = await graph_snapshot(rag)
+            assert set(before[0]) == set(NAMES), before
+
+            calls = llm.calls
+            stats = await rag.arebuild_graph_from_extractions()
+            assert llm.calls == calls, "rebuild called the extraction LLM"
+            assert stats["chunks"] == 3, stats
+            assert await graph_snapshot(rag) == before
+        finally:
+            await close_rag(rag)
+
+
+async def main():
+    failures = 0
+    for test in (test_shared_chunk_references, test_rebuild_reproduces_graph):
+        try:
+            await test()
+            ASCIIColors.green(f"PASS {test.__name__}")
+        except AssertionError as e:
+            failures += 1
+            ASCIIColors.red(f"FAIL {test.__name__}: {e!r}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+"""
+EmbeddingBatcher tests
+
+Runs the batcher on a fake embedding function recording its batches, and
+checks that:
+- concurrent callers are coalesced and deduplicated, each getting its own rows
+- batches are split by max_batch_size and max_batch_tokens, and a full batch
+  does not wait for the window
+- query priority calls bypass the batcher
+- a cancelled caller does not cancel the texts it shares with other callers
+- errors and short results of the embedding function reach every caller
+
+Usage:
+    python tests/test_embedding_batcher.py
+"""
+
+import asyncio
+import os
+import sys
+
+import numpy as np
+from ascii_colors import ASCIIColors
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lightrag.utils import EmbeddingBatcher
+
+TIMEOUT = 2.0
+
+
+def vector_of(text: str) -> np.ndarray:
+    return np.array([float(sum(text.encode())), float(len(text))])
+
+
+def make_batcher(window: float = 0.01, **kwargs):
+    batches = []
+    release = asyncio.Event()
+    release.set()
+
+    async def embed(texts, _priority=10):
+        batches.append(list(texts))
+        await release.wait()
+        return np.array([vector_of(text) for text in texts])
+
+    embed.embedding_dim = 2
+    return EmbeddingBatcher(embed, window=window, **kwargs), batches, release
+
+
+async def test_coalesce_and_dedup():
+    """Concurrent callers share one deduplicated batch"""
+    batcher, batches, _ = make_batcher(max_batch_size=100)
+    results = await asyncio.wait_for(
+        asyncio.gather(batcher(["a", "b"]), batcher(["b", "c"]), batcher(["a"])),
+        TIMEOUT,
+    )
+    assert batches == [["a", "b", "c"]], batches
+    for texts, rows in zip((["a", "b"], ["b", "c"], ["a"]), results):
+        assert np.array_equal(rows, [vector_of(text) for text in texts]), rows
+    # Attributes of the embedding function are forwarded
+    assert batcher.embedding_dim == 2
+
+
+async def test_split_batches():
+    """Batches respect max_batch_size and max_batch_tokens"""
+    # A full batch is sent right away, the window is never reached
+    batcher, batches, _ = make_batcher(window=60, max_batch_size=2)
+    rows = await asyncio.wait_for(batcher(["a", "b"]), TIMEOUT)
+    assert batches == [["a", "b"]] and len(rows) == 2, batches
+
+    batcher, batches, _ = make_batcher(max_batch_size=3)
+    texts = [f"text {i}" for i in range(7)]
+    await asyncio.wait_for(batcher(texts), TIMEOUT)
+    assert [len(batch) for batch in batches] == [3, 3, 1], batches
+
+    # One token per character: 4 + 4 fit in 10 tokens, a 12 token text is alone
+    batcher, batches, _ = make_batcher(
+        max_batch_size=100, max_batch_tokens=10, count_tokens=len
+    )
+    await asyncio.wait_for(batcher(["aaaa", "bbbb", "c" * 12, "dddd"]), TIMEOUT)
+    assert batches == [["aaaa", "bbbb"], ["c" * 12], ["dddd"]], batches
+
+
+async def test_query_priority_bypass():
+    """Calls with a higher priority than the default skip the window"""
+    batcher, batches, _ = make_batcher(window=60, max_batch_size=100)
+    rows = await asyncio.wait_for(batcher(["query"], _priority=5), TIMEOUT)
+    assert batches == [["query"]] and len(rows) == 1, batches
+    assert not batcher._pending
+
+
+async def test_cancelled_caller():
+    """Cancelling one caller leaves the shared texts to the others"""
+    batcher, batches, release = make_batcher(max_batch_size=100)
+    release.clear()
+    cancelled = asyncio.create_task(batcher(["shared", "own"]))
+    waiting = asyncio.create_task(batcher(["shared"]))
+    await asyncio.sleep(0.05)
+    assert batches == [["shared", "own"]], batches
+
+    cancelled.cancel()
+    await asyncio.sleep(0)
+    release.set()
+    rows = await asyncio.wait_for(waiting, TIMEOUT)
+    assert np.array_equal(rows, [vector_of("shared")]), rows
+    assert cancelled.cancelled()
+
+
+async def test_errors_reach_callers():
+    """A failing or short embedding call fails every caller of the batch"""
+
+    async def failing(texts, _priority=10):
+        raise RuntimeError("provider down")
+
+    batcher = EmbeddingBatcher(failing, max_batch_size=100, window=0.01)
+    results = await asyncio.wait_for(
+        asyncio.gather(batcher(["a"]), batcher(["b"]), return_exceptions=True),
+        TIMEOUT,
+    )
+    assert all(isinstance(r, RuntimeError) for r in results), results
+
+    async def short(texts, _priority=10):
+        return np.array([vector_of(text) for text in texts[:-1]])
+
+    batcher = EmbeddingBatcher(short, max_batch_size=100, window=0.01)
+    results = await asyncio.wait_for(
+        asyncio.gather(batcher(["a"]), batcher(["b"]), return_exceptions=True),
+        TIMEOUT,
+    )
+    assert all(isinstance(r, ValueError) for r in results), results
+
+
+async def main():
+    failures = 0
+    for test in (
+        test_coalesce_and_dedup,
+        test_split_batches,
+        test_query_priority_bypass,
+        test_cancelled_caller,
+        test_errors_reach_callers,
+    ):
+        try:
+            await test()
+            ASCIIColors.green(f"PASS {test.__name__}")
+        except (AssertionError, asyncio.TimeoutError) as e:
+            failures += 1
+            ASCIIColors.red(f"FAIL {test.__name__}: {e!r}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
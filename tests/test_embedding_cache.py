@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+"""
+EmbeddingCache tests
+
+Checks that cached texts skip the embedding function, that the cache file is
+reloaded by a new instance, and that workers sharing one cache file keep each
+other's records when one of them compacts the file.
+
+Usage:
+    python tests/test_embedding_cache.py
+"""
+
+import asyncio
+import multiprocessing
+import os
+import sys
+import tempfile
+
+import numpy as np
+from ascii_colors import ASCIIColors
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lightrag.utils import EmbeddingCache
+
+DIM = 8
+
+
+def vector_of(text: str) -> np.ndarray:
+    return np.full(DIM, float(sum(text.encode())), dtype=np.float32)
+
+
+def make_cache(working_dir: str, max_entries: int = 1000):
+    calls = []
+
+    async def embed(texts, _priority=10):
+        calls.append(list(texts))
+        return np.array([vector_of(text) for text in texts])
+
+    cache = EmbeddingCache(
+        embed,
+        working_dir=working_dir,
+        model_name="test-model",
+        embedding_dim=DIM,
+        max_bytes=max_entries * (16 + 4 * DIM),
+    )
+    return cache, calls
+
+
+async def test_hits_and_reload():
+    """Cached texts are not embedded again, also after a reload"""
+    with tempfile.TemporaryDirectory() as working_dir:
+        cache, calls = make_cache(working_dir)
+        first = await cache(["a", "b"])
+        second = await cache(["b", "c"])
+        assert calls == [["a", "b"], ["c"]], calls
+        assert np.array_equal(first[1], second[0])
+        await cache.close()
+
+        reloaded, calls = make_cache(working_dir)
+        result = await reloaded(["a", "b", "c"])
+        assert calls == [], calls
+        assert np.array_equal(result[2], vector_of("c"))
+        await reloaded.close()
+
+
+SHARED_TEXTS = [f"shared text {i}" for i in range(40)]
+OWN_TEXTS = 3
+WORKERS = 4
+# below the live entries of all workers, above half the records they append
+MAX_ENTRIES = 60
+
+
+def _worker(working_dir: str, worker: int, barrier):
+    async def run():
+        cache, _ = make_cache(working_dir, max_entries=MAX_ENTRIES)
+        for i in range(OWN_TEXTS):
+            await cache([f"worker {worker} text {i}"])
+        # Every worker has loaded the file and appends the shared texts again,
+        # until one of them compacts the file
+        barrier.wait()
+        for text in SHARED_TEXTS:
+            await cache([text])
+        await cache.close()
+
+    asyncio.run(run())
+
+
+async def test_compaction_keeps_other_workers():
+    """A compacting worker keeps the records appended by the others"""
+    with tempfile.TemporaryDirectory() as working_dir:
+        # Seed the file so that every worker appends to the same one
+        cache, _ = make_cache(working_dir)
+        await cache(["seed"])
+        await cache.close()
+
+        context = multiprocessing.get_context("spawn")
+        barrier = context.Barrier(WORKERS)
+        workers = [
+            context.Process(target=_worker, args=(working_dir, worker, barrier))
+            for worker in range(WORKERS)
+        ]
+        for process in workers:
+            process.start()
+        for process in workers:
+            process.join(60)
+            assert process.exitcode == 0, process.exitcode
+
+        reader, calls = make_cache(working_dir, max_entries=MAX_ENTRIES)
+        texts = [
+            f"worker {worker} text {i}"
+            for worker in range(WORKERS)
+            for i in range(OWN_TEXTS)
+        ]
+        await reader(texts + SHARED_TEXTS + ["seed"])
+        assert calls == [], f"{len(calls[0])} texts missing from the cache file"
+        records = reader._file_records
+        assert records <= 2 * MAX_ENTRIES, f"file not compacted: {records} records"
+
+
+async def main():
+    failures = 0
+    for test in (test_hits_and_reload, test_compaction_keeps_other_workers):
+        try:
+            await test()
+            ASCIIColors.green(f"PASS {test.__name__}")
+        except AssertionError as e:
+            failures += 1
+            ASCIIColors.red(f"FAIL {test.__name__}: {e!r}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1082,6 +1082,80 @@ async def test_graph_undirected_property(storage):
         return False
 
 
+async def test_graph_materialized_degree(storage):
+    """
+    测试物化度数 (enable_materialized_degree=True):
+    1. 插入节点和边后，存储的度数与实际的关系数一致
+    2. 重复插入同一条边不会重复计数
+    3. remove_edges 和 delete_node 后，相邻节点的度数相应减少
+    4. recompute_degrees (如支持) 后度数不变
+    """
+    previous = storage.global_config.get("enable_materialized_degree", False)
+    storage.global_config["enable_materialized_degree"] = True
+    try:
+        node_a, node_b, node_c = "度数节点A", "度数节点B", "度数节点C"
+        for node_id in (node_a, node_b, node_c):
+            print(f"插入节点: {node_id}")
+            await storage.upsert_node(
+                node_id,
+                {
+                    "entity_id": node_id,
+                    "description": f"{node_id}的描述",
+                    "entity_type": "测试",
+                },
+            )
+
+        async def check_degrees(expected: dict[str, int], step: str):
+            degrees = await storage.node_degrees_batch(list(expected))
+            print(f"{step}后的度数: {degrees}")
+            for node_id, degree in expected.items():
+                assert (
+                    await storage.node_degree(node_id) == degree
+                ), f"{step}后节点 {node_id} 的度数应为 {degree}"
+                assert (
+                    degrees.get(node_id, 0) == degree
+                ), f"{step}后批量获取的节点 {node_id} 的度数应为 {degree}"
+                # 存储度数的后端，度数属性与关系数一致
+                stored = (await storage.get_node(node_id) or {}).get("degree")
+                assert stored is None or int(stored) == degree, (
+                    f"{step}后节点 {node_id} 存储的度数为 {stored}，应为 {degree}"
+                )
+
+        await check_degrees({node_a: 0, node_b: 0, node_c: 0}, "插入节点")
+
+        edge_data = {"relationship": "关联", "weight": 1.0, "description": "测试边"}
+        print(f"插入边: {node_a} -> {node_b}, {node_a} -> {node_c}")
+        await storage.upsert_edge(node_a, node_b, edge_data)
+        await storage.upsert_edge(node_a, node_c, edge_data)
+        print(f"重复插入边: {node_b} -> {node_a}")
+        await storage.upsert_edge(node_b, node_a, {**edge_data, "weight": 2.0})
+        await check_degrees({node_a: 2, node_b: 1, node_c: 1}, "插入边")
+
+        print(f"删除边: {node_a} -> {node_c}")
+        await storage.remove_edges([(node_a, node_c)])
+        await check_degrees({node_a: 1, node_b: 1, node_c: 0}, "删除边")
+
+        print(f"删除节点: {node_b}")
+        await storage.delete_node(node_b)
+        await check_degrees({node_a: 0, node_c: 0}, "删除节点")
+
+        await storage.upsert_edge(node_a, node_c, edge_data)
+        try:
+            await storage.recompute_degrees()
+        except NotImplementedError:
+            print("该存储不存储度数，跳过重新计算度数")
+        await check_degrees({node_a: 1, node_c: 1}, "重新计算度数")
+
+        print("\n物化度数测试完成")
+        return True
+
+    except Exception as e:
+        ASCIIColors.red(f"测试过程中发生错误: {str(e)}")
+        return False
+    finally:
+        storage.global_config["enable_materialized_degree"] = previous
+
+
 async def main():
     """主函数"""
     # 显示程序标题
@@ -1120,11 +1194,12 @@ async def main():
         ASCIIColors.white("4. 无向图特性测试 (验证存储的无向图特性)")
         ASCIIColors.white("5. 特殊字符测试 (验证单引号、双引号和反斜杠等特殊字符)")
         ASCIIColors.white("6. 全部测试")
+        ASCIIColors.white("7. 物化度数测试 (enable_materialized_degree=True)")
 
-        choice = input("\n请输入选项 (1/2/3/4/5/6): ")
+        choice = input("\n请输入选项 (1/2/3/4/5/6/7): ")
 
         # 在执行测试前清理数据
-        if choice in ["1", "2", "3", "4", "5", "6"]:
+        if choice in ["1", "2", "3", "4", "5", "6", "7"]:
             ASCIIColors.yellow("\n执行测试前清理数据...")
             await storage.drop()
             ASCIIColors.green("数据清理完成\n")
@@ -1159,7 +1234,15 @@ async def main():
 
                         if undirected_result:
                             ASCIIColors.cyan("\n=== 开始特殊字符测试 ===")
-                            await test_graph_special_characters(storage)
+                            special_result = await test_graph_special_characters(
+                                storage
+                            )
+
+                            if special_result:
+                                ASCIIColors.cyan("\n=== 开始物化度数测试 ===")
+                                await test_graph_materialized_degree(storage)
+        elif choice == "7":
+            await test_graph_materialized_degree(storage)
         else:
             ASCIIColors.red("无效的选项")
 
@@ -0,0 +1,282 @@
+#!/usr/bin/env python
+"""
+priority_limit_async_func_call regression tests
+
+Checks that the limiter keeps admitting calls after queued calls were
+cancelled, either one by one or all at once by shutdown(), and that queued
+calls are granted in priority order. Every call is bounded by a timeout, so a
+limiter that stops dispatching fails instead of hanging.
+
+The AdaptiveConcurrency tests run on a fake clock and fake HTTP 429 errors:
+- a 429 halves the limit, once per cooldown
+- a retry-after hint holds queued calls until it expires
+- calls within the latency tolerance grow the limit, slower ones shrink it
+- notify_rate_limited reaches the limiter of the calling task
+
+Usage:
+    python tests/test_priority_limiter.py
+"""
+
+import asyncio
+import contextlib
+import os
+import sys
+from types import SimpleNamespace
+
+from ascii_colors import ASCIIColors
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lightrag import utils
+from lightrag.utils import (
+    AdaptiveConcurrency,
+    notify_rate_limited,
+    priority_limit_async_func_call,
+)
+
+TIMEOUT = 2.0
+
+
+class FakeClock:
+    """Stands in for the time module of lightrag.utils"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    perf_counter = time = monotonic
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@contextlib.contextmanager
+def fake_clock():
+    clock = FakeClock()
+    real_time, utils.time = utils.time, clock
+    try:
+        yield clock
+    finally:
+        utils.time = real_time
+
+
+class RateLimitError(Exception):
+    """API error with HTTP status 429, like the provider SDKs raise"""
+
+    status_code = 429
+
+    def __init__(self, retry_after=None):
+        super().__init__("429 Too Many Requests")
+        headers = {"retry-after": str(retry_after)} if retry_after else {}
+        self.response = SimpleNamespace(status_code=429, headers=headers)
+
+
+def make_adaptive(max_size: int, **kwargs):
+    """Limited call that fails with `error` or takes `latency` fake seconds"""
+    adaptive = AdaptiveConcurrency(max_size, **kwargs)
+
+    @priority_limit_async_func_call(max_size, adaptive=adaptive)
+    async def limited(clock, latency=1.0, error=None, body=None):
+        if body is not None:
+            await body()
+        clock.advance(latency)
+        if error is not None:
+            raise error
+        return latency
+
+    return limited, adaptive
+
+
+async def call_failing(limited, clock, error):
+    try:
+        await asyncio.wait_for(limited(clock, latency=0, error=error), TIMEOUT)
+    except RateLimitError:
+        return
+    raise AssertionError("the rate limit error was not raised")
+
+
+def make_limited(max_size: int):
+    release = asyncio.Event()
+    order = []
+
+    @priority_limit_async_func_call(max_size)
+    async def limited(name):
+        order.append(name)
+        await release.wait()
+        return name
+
+    return limited, release, order
+
+
+async def test_calls_after_shutdown():
+    """Calls made after shutdown() cancelled the queue are still admitted"""
+    limited, release, _ = make_limited(1)
+    running = asyncio.create_task(limited("running"))
+    queued = [asyncio.create_task(limited(f"queued {i}")) for i in range(3)]
+    await asyncio.sleep(0.01)
+
+    await limited.shutdown()
+    results = await asyncio.gather(*queued, return_exceptions=True)
+    assert all(isinstance(r, asyncio.CancelledError) for r in results), results
+
+    release.set()
+    assert await asyncio.wait_for(running, TIMEOUT) == "running"
+    assert await asyncio.wait_for(limited("after"), TIMEOUT) == "after"
+
+
+async def test_calls_after_cancelled_waiter():
+    """A cancelled queued call does not hold back the calls behind it"""
+    limited, release, _ = make_limited(1)
+    running = asyncio.create_task(limited("running"))
+    cancelled = asyncio.create_task(limited("cancelled"))
+    waiting = asyncio.create_task(limited("waiting"))
+    await asyncio.sleep(0.01)
+
+    cancelled.cancel()
+    release.set()
+    assert await asyncio.wait_for(running, TIMEOUT) == "running"
+    assert await asyncio.wait_for(waiting, TIMEOUT) == "waiting"
+    assert await asyncio.wait_for(limited("after"), TIMEOUT) == "after"
+
+
+async def test_priority_order():
+    """Queued calls are granted lowest priority value first"""
+    limited, release, order = make_limited(1)
+    running = asyncio.create_task(limited("running"))
+    await asyncio.sleep(0.01)
+    tasks = [
+        asyncio.create_task(limited(name, _priority=priority))
+        for name, priority in (("low", 10), ("high", 1), ("mid", 5))
+    ]
+    await asyncio.sleep(0.01)
+
+    release.set()
+    await asyncio.wait_for(asyncio.gather(running, *tasks), TIMEOUT)
+    assert order == ["running", "high", "mid", "low"], order
+
+
+async def test_rate_limit_decrease_with_cooldown():
+    """A 429 halves the limit, at most once per cooldown"""
+    with fake_clock() as clock:
+        limited, adaptive = make_adaptive(8, cooldown=1.0)
+        await call_failing(limited, clock, RateLimitError())
+        assert adaptive.limit == 4, adaptive.limit
+
+        # Calls started together fail together: one congestion signal
+        await call_failing(limited, clock, RateLimitError())
+        await call_failing(limited, clock, RateLimitError())
+        assert adaptive.limit == 4, adaptive.limit
+
+        clock.advance(1.0)
+        await call_failing(limited, clock, RateLimitError())
+        assert limited.concurrency_limit() == 2, limited.concurrency_limit()
+
+        clock.advance(1.0)
+        await call_failing(limited, clock, RateLimitError())
+        clock.advance(1.0)
+        await call_failing(limited, clock, RateLimitError())
+        assert adaptive.limit == adaptive.min_limit == 1, adaptive.limit
+
+
+async def test_retry_after_pauses_dispatch():
+    """Queued calls wait until the retry-after hint expires"""
+    with fake_clock() as clock:
+        limited, adaptive = make_adaptive(4)
+        await call_failing(limited, clock, RateLimitError(retry_after=0.05))
+        assert adaptive.paused_until == clock.now + 0.05, adaptive.paused_until
+
+        waiting = asyncio.create_task(limited(clock, latency=0))
+        # The resume timer fires on the real clock, the fake one has not moved
+        await asyncio.sleep(0.1)
+        assert not waiting.done(), "call dispatched during the retry-after pause"
+
+        clock.advance(0.05)
+        assert await asyncio.wait_for(waiting, TIMEOUT) == 0
+
+
+async def test_latency_tolerance():
+    """Calls within the latency tolerance grow the limit, slower ones shrink it"""
+    with fake_clock() as clock:
+        limited, adaptive = make_adaptive(8, latency_tolerance=3.0, cooldown=1.0)
+        await call_failing(limited, clock, RateLimitError())
+        assert adaptive.limit == 4
+
+        # Enough samples to judge latency, all at 1s
+        for _ in range(8):
+            await asyncio.wait_for(limited(clock, latency=1.0), TIMEOUT)
+        limit = adaptive._limit
+        assert adaptive.limit == 5, adaptive._limit
+
+        # Slower, but within 3 times the median: still growing
+        await asyncio.wait_for(limited(clock, latency=2.9), TIMEOUT)
+        assert adaptive._limit > limit, (adaptive._limit, limit)
+
+        limit = adaptive._limit
+        await asyncio.wait_for(limited(clock, latency=3.5), TIMEOUT)
+        assert adaptive._limit == limit * adaptive.latency_backoff, adaptive._limit
+
+        # Latency is judged per priority: slow extraction calls do not count
+        # against the median of fast query calls
+        limit = adaptive._limit
+        await asyncio.wait_for(limited(clock, latency=30, _priority=5), TIMEOUT)
+        assert adaptive._limit > limit, (adaptive._limit, limit)
+
+
+async def test_notify_rate_limited():
+    """notify_rate_limited reaches the limiter running the calling task"""
+    with fake_clock() as clock:
+        limited, adaptive = make_adaptive(8)
+        other, other_adaptive = make_adaptive(8)
+
+        async def retried_internally():
+            # Like a tenacity retry inside the model function
+            notify_rate_limited(0.05)
+
+        assert await limited(clock, latency=0, body=retried_internally) == 0
+        assert adaptive.limit == 4, adaptive.limit
+        assert adaptive.paused_until == clock.now + 0.05, adaptive.paused_until
+        assert other_adaptive.limit == 8, "another limiter was notified"
+
+        async def retried_in_child_task():
+            # Tasks created by the model function inherit the context
+            async def retry():
+                notify_rate_limited()
+
+            await asyncio.create_task(retry())
+
+        clock.advance(1.0)
+        await other(clock, latency=0, body=retried_in_child_task)
+        assert other_adaptive.limit == 4, other_adaptive.limit
+        assert adaptive.limit == 4, adaptive.limit
+
+        # Outside any adaptive limiter it is a no-op
+        notify_rate_limited(10)
+        assert adaptive.limit == 4 and other_adaptive.limit == 4
+
+
+async def main():
+    failures = 0
+    for test in (
+        test_calls_after_shutdown,
+        test_calls_after_cancelled_waiter,
+        test_priority_order,
+        test_rate_limit_decrease_with_cooldown,
+        test_retry_after_pauses_dispatch,
+        test_latency_tolerance,
+        test_notify_rate_limited,
+    ):
+        try:
+            await test()
+            ASCIIColors.green(f"PASS {test.__name__}")
+        except (AssertionError, asyncio.TimeoutError) as e:
+            failures += 1
+            ASCIIColors.red(f"FAIL {test.__name__}: {e!r}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+"""
+SharedKVStore multi-process tests
+
+Every test writes from spawned worker processes and reads from replicas in
+other processes, as the JSON storages do with SHARED_KV_ENGINE=shm:
+- update / delete / clear records are replayed by other replicas
+- a reader positioned on a generation that was compacted away catches up
+- _getvalue() returns a plain dict snapshot
+- a writer dying while publishing does not hang readers or later writers
+
+Usage:
+    python tests/test_shared_kv.py
+"""
+
+import multiprocessing
+import os
+import struct
+import sys
+import tempfile
+
+from ascii_colors import ASCIIColors
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lightrag.kg import shared_kv
+from lightrag.kg.shared_kv import SharedKVStore
+
+TIMEOUT = 30
+NAMESPACE = "test_kv"
+
+
+def run_in_process(target, *args):
+    """Run target(*args) in a spawned process, fail if it fails or hangs"""
+    process = multiprocessing.get_context("spawn").Process(target=target, args=args)
+    process.start()
+    process.join(TIMEOUT)
+    if process.is_alive():
+        process.kill()
+        raise AssertionError(f"{target.__name__} did not finish in {TIMEOUT}s")
+    assert process.exitcode == 0, f"{target.__name__} exited with {process.exitcode}"
+
+
+def write_ops(directory):
+    store = SharedKVStore(directory, NAMESPACE)
+    store.update({"a": 1, "b": {"nested": [1, 2]}, "c": "three"})
+    store["d"] = 4
+    store.pop("b")
+    del store["c"]
+    store.close()
+
+
+def write_clear_and_more(directory):
+    store = SharedKVStore(directory, NAMESPACE)
+    store.clear()
+    store.update({"after_clear": True})
+    store.close()
+
+
+def write_until_compacted(directory, count):
+    # A tiny threshold, so that the updates below compact several times
+    shared_kv.SHARED_KV_COMPACT_MIN_BYTES = 1024
+    store = SharedKVStore(directory, NAMESPACE)
+    for i in range(count):
+        store.update({"counter": i, f"key {i % 10}": "x" * 100})
+    assert store._generation > 0, "no compaction happened"
+    store.close()
+
+
+def die_while_publishing(directory):
+    store = SharedKVStore(directory, NAMESPACE)
+    store.update({"before_crash": 1})
+    # Append a record, then die between the two sequence writes of the control
+    # block, like a writer killed in the middle of _write_control
+    payload = b'{"during_crash": 2}'
+    record = shared_kv._RECORD.pack(shared_kv.OP_UPDATE, len(payload)) + payload
+    fd = os.open(store._log_path(store._generation), os.O_RDWR)
+    os.pwrite(fd, record, store._offset)
+    seq = shared_kv._CONTROL.unpack_from(store._control, 0)[0]
+    struct.pack_into("<Q", store._control, 0, seq + 1)
+    os._exit(0)
+
+
+def read_and_write_after_crash(directory):
+    store = SharedKVStore(directory, NAMESPACE)
+    assert store.get("before_crash") == 1, store._getvalue()
+    assert store.get("during_crash") == 2, store._getvalue()
+    store.update({"after_crash": 3})
+    store.close()
+
+
+def test_replay_update_delete_clear():
+    """Records written by another process are replayed by every replica"""
+    with tempfile.TemporaryDirectory() as directory:
+        reader = SharedKVStore(directory, NAMESPACE)
+        assert len(reader) == 0
+
+        run_in_process(write_ops, directory)
+        assert reader._getvalue() == {"a": 1, "d": 4}, reader._getvalue()
+        assert "b" not in reader and reader.get("c") is None
+
+        run_in_process(write_clear_and_more, directory)
+        assert dict(reader.items()) == {"after_clear": True}, dict(reader.items())
+
+        # A replica opened later replays the whole log
+        late = SharedKVStore(directory, NAMESPACE)
+        assert late._getvalue() == {"after_clear": True}
+        late.close()
+        reader.close()
+
+
+def test_reader_on_compacted_generation():
+    """A reader left on a compacted generation switches to the new log"""
+    count = 200
+    with tempfile.TemporaryDirectory() as directory:
+        writer = SharedKVStore(directory, NAMESPACE)
+        writer.update({"counter": -1})
+        writer.close()
+        reader = SharedKVStore(directory, NAMESPACE)
+        # The reader holds the generation 0 log open after replaying it
+        assert reader["counter"] == -1
+        assert reader._generation == 0 and reader._log_fd is not None
+
+        run_in_process(write_until_compacted, directory, count)
+        assert reader["counter"] == count - 1, reader.get("counter")
+        assert reader._generation > 0
+        expected = {f"key {i}": "x" * 100 for i in range(10)}
+        assert reader._getvalue() == {"counter": count - 1, **expected}
+        assert not os.path.exists(reader._log_path(0)), "old generation kept"
+        reader.close()
+
+
+def test_getvalue_snapshot():
+    """_getvalue returns a detached plain dict"""
+    with tempfile.TemporaryDirectory() as directory:
+        store = SharedKVStore(directory, NAMESPACE)
+        store.update({"a": {"x": 1}})
+        snapshot = store._getvalue()
+        assert type(snapshot) is dict and snapshot == {"a": {"x": 1}}
+        snapshot["b"] = 2
+        store.update({"c": 3})
+        assert "b" not in store and snapshot == {"a": {"x": 1}, "b": 2}
+        store.close()
+
+
+def test_writer_died_while_publishing():
+    """A control block left mid-update is recovered instead of spinning forever"""
+    with tempfile.TemporaryDirectory() as directory:
+        run_in_process(die_while_publishing, directory)
+        run_in_process(read_and_write_after_crash, directory)
+        store = SharedKVStore(directory, NAMESPACE)
+        assert store._getvalue() == {
+            "before_crash": 1,
+            "during_crash": 2,
+            "after_crash": 3,
+        }, store._getvalue()
+        store.close()
+
+
+def main():
+    if shared_kv.fcntl is None:
+        ASCIIColors.yellow("SharedKVStore needs fcntl, skipping")
+        return
+    failures = 0
+    for test in (
+        test_replay_update_delete_clear,
+        test_reader_on_compacted_generation,
+        test_getvalue_snapshot,
+        test_writer_died_while_publishing,
+    ):
+        try:
+            test()
+            ASCIIColors.green(f"PASS {test.__name__}")
+        except AssertionError as e:
+            failures += 1
+            ASCIIColors.red(f"FAIL {test.__name__}: {e!r}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
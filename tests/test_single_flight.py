@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+"""
+SingleFlight tests
+
+Checks that:
+- identical concurrent calls share one call, and its exception
+- limiter controls and the cache storage do not split calls, other arguments do
+- streaming calls and unserializable arguments are never shared
+- the shared call is only cancelled with its last waiting caller
+
+Usage:
+    python tests/test_single_flight.py
+"""
+
+import asyncio
+import os
+import sys
+
+from ascii_colors import ASCIIColors
+
+# Add project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lightrag.utils import SingleFlight
+
+TIMEOUT = 2.0
+
+
+def make_single_flight():
+    calls = []
+    release = asyncio.Event()
+
+    async def llm(prompt, **kwargs):
+        calls.append(prompt)
+        await release.wait()
+        if prompt == "fail":
+            raise RuntimeError("provider error")
+        return f"answer to {prompt}"
+
+    return SingleFlight(llm, name="llm"), calls, release
+
+
+async def run_all(release, *calls):
+    tasks = [asyncio.create_task(call) for call in calls]
+    await asyncio.sleep(0.01)
+    release.set()
+    return await asyncio.wait_for(
+        asyncio.gather(*tasks, return_exceptions=True), TIMEOUT
+    )
+
+
+async def test_identical_calls_shared():
+    """Identical in-flight calls reach the function once"""
+    single_flight, calls, release = make_single_flight()
+    results = await run_all(
+        release,
+        single_flight("q", system_prompt="s", _priority=5, hashing_kv=object()),
+        single_flight("q", system_prompt="s", _priority=10, _timeout=30),
+        single_flight("q", system_prompt="other"),
+        single_flight("fail"),
+        single_flight("fail"),
+    )
+    assert calls == ["q", "q", "fail"], calls
+    assert results[:3] == ["answer to q"] * 3, results
+    assert all(isinstance(r, RuntimeError) for r in results[3:]), results
+    assert not single_flight._in_flight
+
+    # Finished calls are not cached
+    release.clear()
+    assert await run_all(release, single_flight("q", system_prompt="s")) == [
+        "answer to q"
+    ]
+    assert calls == ["q", "q", "fail", "q"], calls
+
+
+async def test_unshared_calls():
+    """Streaming calls and unserializable arguments bypass coalescing"""
+    single_flight, calls, release = make_single_flight()
+    unserializable = object()
+    await run_all(
+        release,
+        single_flight("stream", stream=True),
+        single_flight("stream", stream=True),
+        single_flight("object", history=unserializable),
+        single_flight("object", history=unserializable),
+    )
+    assert calls == ["stream", "stream", "object", "object"], calls
+
+
+async def test_cancellation():
+    """The shared call survives until its last caller is cancelled"""
+    single_flight, calls, release = make_single_flight()
+    first = asyncio.create_task(single_flight("q"))
+    second = asyncio.create_task(single_flight("q"))
+    await asyncio.sleep(0.01)
+    task = single_flight._in_flight[next(iter(single_flight._in_flight))][0]
+
+    first.cancel()
+    await asyncio.sleep(0.01)
+    assert not task.cancelled(), "shared call cancelled with one caller left"
+    release.set()
+    assert await asyncio.wait_for(second, TIMEOUT) == "answer to q"
+
+    release.clear()
+    last = asyncio.create_task(single_flight("r"))
+    await asyncio.sleep(0.01)
+    task = single_flight._in_flight[next(iter(single_flight._in_flight))][0]
+    last.cancel()
+    await asyncio.sleep(0.01)
+    assert task.cancelled(), "shared call kept running without callers"
+    assert calls == ["q", "r"], calls
+
+
+async def main():
+    failures = 0
+    for test in (
+        test_identical_calls_shared,
+        test_unshared_calls,
+        test_cancellation,
+    ):
+        try:
+            await test()
+            ASCIIColors.green(f"PASS {test.__name__}")
+        except (AssertionError, asyncio.TimeoutError) as e:
+            failures += 1
+            ASCIIColors.red(f"FAIL {test.__name__}: {e!r}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())